@@ -0,0 +1,451 @@
+"""
+Índice das referências aos arquivos de client/public: aponta os que nada
+usa e os duplicados, e opcionalmente os tira da saída do build.
+
+Referências são procuradas em:
+  - código: client/src (.ts/.tsx/.css...), client/index.html, server/ e
+    scripts/, e os arquivos de texto do próprio client/public (svg, css,
+    manifest);
+  - conteúdo do banco: as exportações JSON de consultas em .manus/db
+    (resultados e comandos, ex.: os INSERTs dos posts) e, com --live-db, as
+    colunas de imagem/conteúdo de DB_COLUMNS lidas via mysql_pool.
+
+Uma referência é qualquer trecho com cara de caminho ("/images/a.png",
+"url(./b.svg)", "https://site/assets/c.webp?v=2") que, sem o prefixo,
+corresponda a um arquivo de client/public; um nome sem diretório vale para
+qualquer arquivo com esse nome. Strings entre aspas ('...', "...", `...`)
+valem inteiras, decodificadas, então nomes com espaço
+("/assets/logos-grupo/MDE - PNG.png") também contam. Caminhos montados em tempo de execução
+(`/images/blog/${slug}.webp` ou "/images/blog/" + slug) marcam o diretório
+inteiro como usado. client/public/optimized (gerado por optimize_images.py)
+não entra no índice: as variantes acompanham a imagem de origem.
+
+Relatório (JSON na saída padrão):
+  {"files": N, "bytes": ..., "referenced": {caminho: [origens]},
+   "unreferenced": [{"path", "bytes"}], "unreferencedBytes": ...,
+   "duplicates": [{"sha256", "bytes", "paths", "referenced"}],
+   "leftovers": [sobras .backup/.bak/.orig/~ em client/public],
+   "sourceLeftovers": [as mesmas sobras no código, que não são varridas],
+   "dynamicPrefixes": [...]}
+
+Com --prune DIR (a saída do build, ex.: dist/public depois do pnpm build),
+os arquivos não referenciados e as suas variantes otimizadas são removidos
+de DIR; client/public não é alterado. Se o nome de algum deles aparecer em
+qualquer lugar do código (referência que o índice não entendeu), nada é
+removido e o relatório lista esses arquivos em "mentioned".
+
+Uso:
+  python3 asset_index.py [--root client/public] [--src client/src ...]
+                         [--db-export .manus/db] [--live-db]
+                         [--prune dist/public] [--dry-run]
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from urllib.parse import quote, unquote
+
+from codemod_engine import BASE_DIR, write_atomic
+from optimize_images import MANIFEST_NAME, OUTPUT_DIRNAME, PUBLIC_DIR
+
+CLIENT_DIR = os.path.dirname(BASE_DIR)
+PROJECT_DIR = os.path.dirname(CLIENT_DIR)
+SOURCE_PATHS = (
+    BASE_DIR,
+    os.path.join(CLIENT_DIR, "index.html"),
+    os.path.join(PROJECT_DIR, "server"),
+    os.path.join(PROJECT_DIR, "scripts"),
+)
+DB_EXPORT_DIR = os.path.join(PROJECT_DIR, ".manus", "db")
+BUILD_DIR = os.path.join(PROJECT_DIR, "dist", "public")
+
+SOURCE_EXTENSIONS = (".ts", ".tsx", ".js", ".jsx", ".mjs", ".css", ".html", ".md")
+# Arquivos de client/public que também podem referenciar outros
+PUBLIC_TEXT_EXTENSIONS = (".svg", ".css", ".html", ".json", ".webmanifest", ".xml", ".txt")
+SKIP_DIRS = {"node_modules", ".git", "dist"}
+
+# Pedidos direto pelo navegador/robôs, sem referência no código
+ALWAYS_KEEP = {
+    "favicon.ico", "robots.txt", "sitemap.xml", "site.webmanifest", "manifest.json", "browserconfig.xml",
+    "apple-touch-icon.png", ".htaccess", "_redirects", "_headers", ".gitkeep",
+}
+LEFTOVER_SUFFIXES = (".backup", ".bak", ".orig", ".old", "~")
+
+# Colunas do banco que guardam URLs de imagem ou conteúdo com imagens (--live-db)
+DB_COLUMNS = {
+    "courses": ("image",),
+    "course_categories": ("image",),
+    "blog_posts": ("image", "content"),
+    "blog_post_gallery": ("image_url",),
+    "testimonials": ("image",),
+    "hero_banners": ("image",),
+    "certifications": ("image",),
+    "about_hero": ("image_url",),
+    "about_timeline": ("image_url",),
+    "about_units": ("image_url",),
+    "site_settings": ("value",),
+    "home_settings": ("value",),
+}
+DB_FETCH_ROWS = 500
+
+# Trecho com cara de caminho: uma classe só, sem nada depois (sem backtracking)
+_PATH_RE = re.compile(r"[\w./%@+~-]+")
+# String entre aspas de uma linha ('...', "...") ou template (`...`), com escapes
+_STRING_RE = re.compile(
+    r"'([^'\\\n]*(?:\\.[^'\\\n]*)*)'"
+    r'|"([^"\\\n]*(?:\\.[^"\\\n]*)*)"'
+    r"|`([^`\\]*(?:\\.[^`\\]*)*)`"
+)
+
+
+# ============================================================
+# ARQUIVOS DE client/public
+# ============================================================
+
+def iter_public_files(root):
+    """Arquivos de root (relpath com "/"), fora do diretório gerado optimized/."""
+    for dirpath, dirs, files in os.walk(root):
+        if os.path.abspath(dirpath) == os.path.abspath(root):
+            dirs[:] = [d for d in dirs if d != OUTPUT_DIRNAME]
+        dirs.sort()
+        for name in sorted(files):
+            yield os.path.relpath(os.path.join(dirpath, name), root).replace(os.sep, "/")
+
+
+def _sha256(filepath):
+    h = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def find_duplicates(root, paths):
+    """Grupos de arquivos idênticos; só arquivos de mesmo tamanho são lidos."""
+    by_size = {}
+    for path in paths:
+        by_size.setdefault(os.path.getsize(os.path.join(root, path)), []).append(path)
+    groups = []
+    for size, same_size in sorted(by_size.items()):
+        if size == 0 or len(same_size) < 2:
+            continue
+        by_hash = {}
+        for path in same_size:
+            by_hash.setdefault(_sha256(os.path.join(root, path)), []).append(path)
+        groups.extend((digest, size, group) for digest, group in sorted(by_hash.items()) if len(group) > 1)
+    return groups
+
+
+# ============================================================
+# REFERÊNCIAS
+# ============================================================
+
+class AssetIndex:
+    """
+    Caminhos de client/public -> origens que os referenciam. Os textos são
+    percorridos em tempo linear: cada trecho de caracteres de caminho é
+    isolado uma vez e comparado com os arquivos por lookup em conjunto.
+    """
+
+    def __init__(self, paths):
+        self.paths = set(paths)
+        self.by_name = {}
+        self.dirs = set()
+        for path in self.paths:
+            self.by_name.setdefault(path.rsplit("/", 1)[-1], []).append(path)
+            parts = path.split("/")[:-1]
+            for i in range(1, len(parts) + 1):
+                self.dirs.add("/".join(parts[:i]))
+        self.references = {}
+        self.dynamic_prefixes = {}
+
+    def _add(self, path, origin):
+        origins = self.references.setdefault(path, [])
+        if len(origins) < 5 and origin not in origins:
+            origins.append(origin)
+
+    def _resolve(self, token, origin, dynamic=False):
+        token = unquote(token).split("?", 1)[0].split("#", 1)[0]
+        parts = [part for part in token.split("/") if part not in ("", ".", "..")]
+        if not parts:
+            return
+        is_dir = token.endswith("/")
+        # O caminho pode vir com prefixo (domínio, "../public/"...): tenta cada sufixo
+        for i in range(len(parts)):
+            candidate = "/".join(parts[i:])
+            if is_dir:
+                if candidate in self.dirs:
+                    self.dynamic_prefixes.setdefault(candidate + "/", origin)
+                    return
+            elif dynamic:
+                # Início do caminho de um arquivo: `/images/selo-${nome}.png`
+                if any(path.startswith(candidate) for path in self.paths):
+                    self.dynamic_prefixes.setdefault(candidate, origin)
+                    return
+            elif candidate in self.paths:
+                self._add(candidate, origin)
+                return
+        if len(parts) == 1 and not dynamic:
+            for path in self.by_name.get(parts[0], ()):
+                self._add(path, origin)
+
+    def scan_text(self, text, origin):
+        """Registra as referências de um texto (código, conteúdo do banco...)."""
+        # Strings com espaço não saem inteiras do _PATH_RE: valem como um caminho só
+        for match in _STRING_RE.finditer(text):
+            value = unquote(next(group for group in match.groups() if group is not None)).strip()
+            if not any(c.isspace() for c in value) or not ("." in value or "/" in value):
+                continue
+            head, dynamic, _ = value.partition("${")
+            if head:
+                self._resolve(head, origin, dynamic=bool(dynamic))
+        for match in _PATH_RE.finditer(text):
+            token = match.group()
+            if "." in token or "/" in token:
+                # Caminho montado em tempo de execução: `/dir/${x}` ou "/dir/" + x
+                self._resolve(token, origin, dynamic=text.startswith("${", match.end()))
+
+    def is_referenced(self, path):
+        if path in self.references or path.rsplit("/", 1)[-1] in ALWAYS_KEEP:
+            return True
+        return any(path.startswith(prefix) for prefix in self.dynamic_prefixes)
+
+
+def is_leftover(name):
+    """Cópia esquecida: "x.backup", "x.tsx.backup_faixas", "x.bak", "x~"..."""
+    return name.endswith(LEFTOVER_SUFFIXES) or ".backup" in name
+
+
+def iter_source_files(paths, leftovers=None):
+    """Arquivos de código; as sobras (.backup...) vão para leftovers, sem serem lidas."""
+    for item in paths:
+        if os.path.isfile(item):
+            yield item
+            continue
+        for dirpath, dirs, files in os.walk(item):
+            dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS)
+            for name in sorted(files):
+                if is_leftover(name):
+                    if leftovers is not None:
+                        leftovers.append(_origin(os.path.join(dirpath, name)))
+                elif name.endswith(SOURCE_EXTENSIONS):
+                    yield os.path.join(dirpath, name)
+
+
+def _origin(filepath):
+    if os.path.abspath(filepath).startswith(PROJECT_DIR + os.sep):
+        return os.path.relpath(filepath, PROJECT_DIR)
+    return filepath
+
+
+def _read_text(filepath):
+    with open(filepath, "r", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+def scan_sources(index, paths):
+    """Varre o código; devolve as sobras (.backup...) encontradas no caminho."""
+    leftovers = []
+    for filepath in iter_source_files(paths, leftovers):
+        index.scan_text(_read_text(filepath), _origin(filepath))
+    return leftovers
+
+
+def scan_public_texts(index, root):
+    for path in sorted(index.paths):
+        if path.lower().endswith(PUBLIC_TEXT_EXTENSIONS):
+            index.scan_text(_read_text(os.path.join(root, path)), f"public:{path}")
+
+
+def _iter_strings(value):
+    if isinstance(value, str):
+        yield value
+    elif isinstance(value, dict):
+        for item in value.values():
+            yield from _iter_strings(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _iter_strings(item)
+
+
+def scan_db_exports(index, export_dir):
+    """Strings de todas as exportações JSON (consulta e linhas) de export_dir."""
+    if not os.path.isdir(export_dir):
+        return 0
+    count = 0
+    for name in sorted(os.listdir(export_dir)):
+        if not name.endswith(".json"):
+            continue
+        try:
+            with open(os.path.join(export_dir, name), "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except ValueError:
+            print(f"Aviso: exportação inválida ignorada: {name}", file=sys.stderr)
+            continue
+        for text in _iter_strings(data):
+            index.scan_text(text, f"db-export:{name}")
+        count += 1
+    return count
+
+
+def scan_live_db(index, columns=None):
+    """Lê as colunas de DB_COLUMNS do banco (DATABASE_URL) em blocos."""
+    import mysql_pool
+
+    columns = columns or DB_COLUMNS
+    with mysql_pool.connection() as conn:
+        for table, table_columns in columns.items():
+            cursor = conn.cursor()
+            try:
+                cursor.execute(f"SELECT {', '.join(f'`{c}`' for c in table_columns)} FROM `{table}`")
+                while True:
+                    rows = cursor.fetchmany(DB_FETCH_ROWS)
+                    if not rows:
+                        break
+                    for row in rows:
+                        for value in row:
+                            if isinstance(value, str):
+                                index.scan_text(value, f"db:{table}")
+            except Exception as e:
+                print(f"Aviso: tabela {table} ignorada: {e}", file=sys.stderr)
+            finally:
+                cursor.close()
+
+
+# ============================================================
+# RELATÓRIO E LIMPEZA DO BUILD
+# ============================================================
+
+def build_report(root, index, source_leftovers=()):
+    paths = sorted(index.paths)
+    sizes = {path: os.path.getsize(os.path.join(root, path)) for path in paths}
+    unreferenced = [path for path in paths if not index.is_referenced(path)]
+    duplicates = [
+        {"sha256": digest, "bytes": size, "paths": group,
+         "referenced": [path for path in group if index.is_referenced(path)]}
+        for digest, size, group in find_duplicates(root, paths)
+    ]
+    return {
+        "files": len(paths),
+        "bytes": sum(sizes.values()),
+        "referenced": {path: index.references[path] for path in paths if path in index.references},
+        "unreferenced": [{"path": path, "bytes": sizes[path]} for path in unreferenced],
+        "unreferencedBytes": sum(sizes[path] for path in unreferenced),
+        "duplicates": duplicates,
+        "leftovers": [path for path in paths if is_leftover(path.rsplit("/", 1)[-1])],
+        "sourceLeftovers": list(source_leftovers),
+        "dynamicPrefixes": sorted(index.dynamic_prefixes),
+    }
+
+
+def find_mentioned(paths, sources):
+    """
+    Arquivos de paths cujo nome (cru ou codificado para URL) aparece em
+    algum arquivo de sources: o --prune não remove nada se houver algum.
+    """
+    names = {}
+    for path in paths:
+        name = path.rsplit("/", 1)[-1]
+        names.setdefault(name, []).append(path)
+        names.setdefault(quote(name), []).append(path)
+    mentioned = set()
+    for filepath in iter_source_files(sources):
+        text = _read_text(filepath)
+        for name, owners in names.items():
+            if name in text:
+                mentioned.update(owners)
+    return sorted(mentioned)
+
+
+def prune_build(build_dir, paths, dry_run=False):
+    """
+    Remove de build_dir os arquivos em paths e as variantes otimizadas deles
+    (pelo manifesto de optimize_images, que é regravado sem essas entradas).
+    Retorna (arquivos removidos, bytes liberados).
+    """
+    removed = freed = 0
+    targets = [os.path.join(build_dir, path) for path in paths]
+
+    manifest_path = os.path.join(build_dir, OUTPUT_DIRNAME, MANIFEST_NAME)
+    manifest = None
+    if os.path.exists(manifest_path):
+        with open(manifest_path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+        images = manifest.get("images", {})
+        for path in paths:
+            entry = images.pop(path, None)
+            if entry:
+                targets.extend(os.path.join(build_dir, v["src"].lstrip("/")) for v in entry.get("variants", []))
+
+    for target in targets:
+        if not os.path.isfile(target):
+            continue
+        size = os.path.getsize(target)
+        if dry_run:
+            print(f"[dry-run] remover {os.path.relpath(target, build_dir)}", file=sys.stderr)
+        else:
+            os.remove(target)
+        removed += 1
+        freed += size
+
+    if manifest is not None and not dry_run:
+        data = json.dumps(manifest, indent=1, sort_keys=True, ensure_ascii=False)
+        write_atomic(manifest_path, data.encode("utf-8"))
+    return removed, freed
+
+
+def run(root=PUBLIC_DIR, sources=SOURCE_PATHS, db_export=DB_EXPORT_DIR, live_db=False):
+    index = AssetIndex(iter_public_files(root))
+    source_leftovers = scan_sources(index, sources)
+    scan_public_texts(index, root)
+    if db_export:
+        scan_db_exports(index, db_export)
+    if live_db:
+        scan_live_db(index)
+    return build_report(root, index, source_leftovers)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Indexa as referências aos arquivos públicos e aponta os não usados.")
+    parser.add_argument("--root", default=PUBLIC_DIR, help="diretório público (padrão: client/public)")
+    parser.add_argument("--src", action="append", help="arquivo/diretório de código a varrer (repetível; "
+                                                       "padrão: client/src, client/index.html, server/ e scripts/)")
+    parser.add_argument("--db-export", default=DB_EXPORT_DIR, help="exportações JSON do banco (padrão: .manus/db; '' desliga)")
+    parser.add_argument("--live-db", action="store_true", help="também lê as colunas de imagem do banco (DATABASE_URL)")
+    parser.add_argument("--prune", metavar="BUILD_DIR", nargs="?", const=BUILD_DIR,
+                        help="remove os não referenciados da saída do build (padrão: dist/public)")
+    parser.add_argument("--dry-run", action="store_true", help="com --prune, só lista o que seria removido")
+    args = parser.parse_args(argv)
+
+    try:
+        report = run(args.root, args.src or SOURCE_PATHS, args.db_export, args.live_db)
+    except Exception as e:
+        print(json.dumps({"error": str(e)}, ensure_ascii=False))
+        return 1
+
+    if args.prune:
+        if not os.path.isdir(args.prune):
+            print(json.dumps({"error": f"Diretório do build não encontrado: {args.prune}"}, ensure_ascii=False))
+            return 1
+        candidates = [item["path"] for item in report["unreferenced"]]
+        mentioned = find_mentioned(candidates, args.src or SOURCE_PATHS)
+        if mentioned:
+            report["mentioned"] = mentioned
+            print(json.dumps(report, indent=2, ensure_ascii=False))
+            print(f"--prune recusado: {len(mentioned)} arquivo(s) sem referência têm o nome citado no código",
+                  file=sys.stderr)
+            return 1
+        removed, freed = prune_build(args.prune, candidates, args.dry_run)
+        report["pruned"] = {"files": removed, "bytes": freed, "dryRun": args.dry_run}
+
+    print(json.dumps(report, indent=2, ensure_ascii=False))
+    print(f"{len(report['unreferenced'])} de {report['files']} arquivo(s) sem referência "
+          f"({report['unreferencedBytes'] / 1048576:.1f} MB), {len(report['duplicates'])} grupo(s) de duplicados",
+          file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,7 +1,7 @@
 #!/bin/bash
 
 # Script de monitoramento automático com sincronização via GitHub API
-# Monitora alterações e faz push automático a cada 60 segundos
+# Monitora alterações (inotify, com polling de 60 segundos como reserva) e faz push automático
 
 PROJECT_DIR="/home/ubuntu/faculdade_site_online"
 LOG_FILE="/tmp/auto-sync-monitor.log"
@@ -21,6 +21,15 @@ log "Diretório: $PROJECT_DIR"
 log "Token configurado: $([ -n "$GITHUB_TOKEN" ] && echo 'Sim' || echo 'Não')"
 log "=========================================="
 
+# Monitoramento por eventos (inotify): sincroniza segundos depois de cada
+# rajada de alterações e não faz nada enquanto nada muda.
+GITHUB_TOKEN="$GITHUB_TOKEN" python3 "$PROJECT_DIR/auto_sync_watcher.py" \
+    --project-dir "$PROJECT_DIR" \
+    --sync-cmd "bash $SYNC_SCRIPT" \
+    --log-file "$LOG_FILE" && exit 0
+
+log "Watcher inotify indisponível. Usando polling a cada 60 segundos..."
+
 # Loop de monitoramento
 while true; do
     # Verificar se há alterações a cada 60 segundos
@@ -0,0 +1,327 @@
+"""
+Sincronização automática com o GitHub orientada a eventos (inotify).
+
+Substitui o laço de polling do auto-sync-monitor.sh (git status a cada
+60 s): o processo fica bloqueado no descritor do inotify e não faz nada
+enquanto nada muda. Cada rajada de alterações vira uma única sincronização:
+depois do primeiro evento, espera QUIET segundos sem eventos novos (no
+máximo MAX_DELAY segundos no total) e então roda o comando de sync.
+Eventos que chegam durante um sync disparam outro logo em seguida.
+
+Ignora .git, node_modules e saídas de build (IGNORED_DIRS), inclusive
+diretórios criados depois que o watcher subiu.
+
+Contadores (syncs, eventos, eventos agrupados, falhas) vão para o log a
+cada sync, para o arquivo --stats-file (JSON) e para o log ao receber
+SIGUSR1.
+
+Uso:
+  python3 auto_sync_watcher.py --project-dir DIR [--sync-cmd "bash sync-github-secure.sh"]
+      [--quiet 2] [--max-delay 10] [--log-file ARQUIVO] [--stats-file ARQUIVO]
+
+Para testar contra um repositório bare local:
+  git init --bare /tmp/remoto.git && git clone /tmp/remoto.git /tmp/copia
+  python3 auto_sync_watcher.py --project-dir /tmp/copia \\
+      --sync-cmd "git add -A && git commit -qm auto && git push -q origin HEAD"
+"""
+import argparse
+import ctypes
+import ctypes.util
+import errno
+import json
+import os
+import select
+import signal
+import struct
+import subprocess
+import sys
+import time
+
+from codemod_engine import write_atomic
+
+PROJECT_DIR = "/home/ubuntu/faculdade_site_online"
+DEFAULT_SYNC_CMD = "bash sync-github-secure.sh"
+DEFAULT_LOG_FILE = "/tmp/auto-sync-monitor.log"
+DEFAULT_STATS_FILE = "/tmp/auto-sync-watcher.json"
+
+# Segundos sem eventos antes de sincronizar / espera máxima desde o 1º evento
+QUIET = 2.0
+MAX_DELAY = 10.0
+
+IGNORED_DIRS = frozenset({
+    ".git", "node_modules", "dist", "build", ".manus", ".cache", "__pycache__",
+    ".pytest_cache", "coverage", "optimized",
+})
+
+# ============================================================
+# INOTIFY (ctypes)
+# ============================================================
+
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_ISDIR = 0x40000000
+
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+WATCH_MASK = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE
+              | IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+
+_EVENT = struct.Struct("iIII")
+
+_libc = None
+
+
+def _inotify():
+    global _libc
+    if _libc is None:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        libc.inotify_init1.argtypes = [ctypes.c_int]
+        libc.inotify_add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        libc.inotify_rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        _libc = libc
+    return _libc
+
+
+def _check(result):
+    if result < 0:
+        err = ctypes.get_errno()
+        raise OSError(err, os.strerror(err))
+    return result
+
+
+def parse_events(buffer):
+    """Decodifica o buffer lido do inotify em (wd, mask, nome)."""
+    offset = 0
+    while offset + _EVENT.size <= len(buffer):
+        wd, mask, _cookie, length = _EVENT.unpack_from(buffer, offset)
+        offset += _EVENT.size
+        name = buffer[offset:offset + length].split(b"\0", 1)[0]
+        offset += length
+        yield wd, mask, os.fsdecode(name)
+
+
+class TreeWatch:
+    """Watches inotify recursivos em um diretório, pulando os ignorados."""
+
+    def __init__(self, root, ignored=IGNORED_DIRS):
+        self.root = os.path.abspath(root)
+        self.ignored = ignored
+        self.fd = _check(_inotify().inotify_init1(IN_NONBLOCK | IN_CLOEXEC))
+        self.paths = {}  # wd -> diretório
+        self.add_tree(self.root)
+
+    def close(self):
+        os.close(self.fd)
+
+    def fileno(self):
+        return self.fd
+
+    def add_tree(self, top):
+        """Adiciona watches em top e subdiretórios. Retorna quantos."""
+        added = 0
+        for dirpath, dirs, _files in os.walk(top):
+            dirs[:] = [d for d in dirs if d not in self.ignored]
+            try:
+                wd = _check(_inotify().inotify_add_watch(self.fd, os.fsencode(dirpath), WATCH_MASK))
+            except OSError as e:
+                if e.errno in (errno.ENOENT, errno.ENOTDIR, errno.EACCES):
+                    continue  # sumiu ou sem acesso: ignora
+                raise  # ENOSPC: aumente fs.inotify.max_user_watches
+            self.paths[wd] = dirpath
+            added += 1
+        return added
+
+    def rescan(self):
+        """Depois de um estouro da fila: refaz os watches do zero."""
+        for wd in list(self.paths):
+            _inotify().inotify_rm_watch(self.fd, wd)
+        self.paths.clear()
+        return self.add_tree(self.root)
+
+    def read(self):
+        """
+        Lê os eventos disponíveis e devolve quantos importam (alterações
+        fora dos diretórios ignorados). Acompanha diretórios novos/removidos.
+        """
+        relevant = 0
+        while True:
+            try:
+                buffer = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                return relevant
+            for wd, mask, name in parse_events(buffer):
+                if mask & IN_Q_OVERFLOW:
+                    self.rescan()
+                    relevant += 1
+                    continue
+                if mask & IN_IGNORED:
+                    self.paths.pop(wd, None)
+                    continue
+                parent = self.paths.get(wd)
+                if parent is None or name in self.ignored:
+                    continue
+                if mask & IN_ISDIR and mask & (IN_CREATE | IN_MOVED_TO):
+                    # Diretório novo: o que já existir dentro dele não gerou evento
+                    self.add_tree(os.path.join(parent, name))
+                if mask & (IN_DELETE_SELF | IN_MOVE_SELF):
+                    continue  # já contado no diretório pai
+                relevant += 1
+
+
+# ============================================================
+# WATCHER
+# ============================================================
+
+def _drain(fd):
+    try:
+        return os.read(fd, 512)
+    except BlockingIOError:
+        return b""
+
+
+class SyncWatcher:
+    """Agrupa rajadas de eventos em uma sincronização por rajada."""
+
+    def __init__(self, project_dir, sync_cmd=DEFAULT_SYNC_CMD, quiet=QUIET, max_delay=MAX_DELAY,
+                 log_file=None, stats_file=None, ignored=IGNORED_DIRS):
+        self.project_dir = os.path.abspath(project_dir)
+        self.sync_cmd = sync_cmd
+        self.quiet = quiet
+        self.max_delay = max_delay
+        self.log_file = log_file
+        self.stats_file = stats_file
+        self.ignored = ignored
+        self.stats = {"syncs": 0, "failedSyncs": 0, "events": 0, "eventsMerged": 0,
+                      "lastSyncAt": None, "lastSyncMs": None}
+        self._stop = False
+
+    def log(self, message):
+        line = f"[{time.strftime('%Y-%m-%d %H:%M:%S')}] {message}"
+        print(line, flush=True)
+        if self.log_file:
+            with open(self.log_file, "a", encoding="utf-8") as f:
+                f.write(line + "\n")
+
+    def log_stats(self, *_):
+        self.log("Contadores: " + json.dumps(self.stats))
+
+    def stop(self, *_):
+        self._stop = True
+
+    def sync(self, events):
+        """Roda o comando de sync uma vez para `events` eventos agrupados."""
+        self.log(f"{events} alteração(ões) detectada(s). Sincronizando com GitHub...")
+        start = time.perf_counter()
+        proc = subprocess.run(self.sync_cmd, shell=True, cwd=self.project_dir,
+                              stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+        output = proc.stdout.decode("utf-8", "replace").strip()
+        if output:
+            self.log(output)
+
+        self.stats["syncs"] += 1
+        self.stats["events"] += events
+        self.stats["eventsMerged"] += max(0, events - 1)
+        self.stats["lastSyncAt"] = time.strftime("%Y-%m-%dT%H:%M:%S")
+        self.stats["lastSyncMs"] = round((time.perf_counter() - start) * 1000, 1)
+        if proc.returncode != 0:
+            self.stats["failedSyncs"] += 1
+            self.log(f"Sync terminou com código {proc.returncode}.")
+        if self.stats_file:
+            write_atomic(self.stats_file, json.dumps(self.stats).encode("utf-8"))
+        self.log_stats()
+
+    def run(self, initial_sync=True, max_syncs=None):
+        """
+        Observa a árvore até SIGTERM/SIGINT (ou max_syncs syncs). Com
+        initial_sync, sincroniza uma vez ao subir para enviar o que mudou
+        enquanto o watcher estava parado.
+        """
+        watch = TreeWatch(self.project_dir, self.ignored)
+        self.log(f"Observando {self.project_dir} ({len(watch.paths)} diretório(s)); "
+                 f"ignorando {', '.join(sorted(self.ignored))}")
+        poller = select.poll()
+        poller.register(watch.fileno(), select.POLLIN)
+        # Sinais acordam o poll (senão ele voltaria a bloquear após o handler)
+        wakeup_r, wakeup_w = os.pipe2(os.O_NONBLOCK | os.O_CLOEXEC)
+        poller.register(wakeup_r, select.POLLIN)
+        try:
+            previous_wakeup = signal.set_wakeup_fd(wakeup_w)
+        except ValueError:
+            previous_wakeup = None  # fora da thread principal
+
+        pending = 1 if initial_sync else 0
+        first = last = time.monotonic()
+        try:
+            while not self._stop and (max_syncs is None or self.stats["syncs"] < max_syncs):
+                if pending:
+                    deadline = min(last + self.quiet, first + self.max_delay)
+                    timeout_ms = max(0, int((deadline - time.monotonic()) * 1000))
+                else:
+                    timeout_ms = None  # nada pendente: bloqueia até o próximo evento
+                ready = {fd for fd, _ in poller.poll(timeout_ms)}
+                if wakeup_r in ready:
+                    while _drain(wakeup_r):
+                        pass
+                if watch.fileno() in ready:
+                    events = watch.read()
+                    if events:
+                        now = time.monotonic()
+                        if not pending:
+                            first = now
+                        pending += events
+                        last = now
+                if ready:
+                    continue
+                if pending:
+                    events, pending = pending, 0
+                    self.sync(events)
+            if pending and self._stop:
+                self.sync(pending)  # não perde a última rajada ao encerrar
+        finally:
+            if previous_wakeup is not None:
+                signal.set_wakeup_fd(previous_wakeup)
+            os.close(wakeup_r)
+            os.close(wakeup_w)
+            watch.close()
+        return self.stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Sincroniza o projeto com o GitHub a cada rajada de alterações (inotify).")
+    parser.add_argument("--project-dir", default=PROJECT_DIR, help="diretório observado")
+    parser.add_argument("--sync-cmd", default=DEFAULT_SYNC_CMD, help="comando de sync (roda no diretório do projeto)")
+    parser.add_argument("--quiet", type=float, default=QUIET, help="segundos sem eventos antes de sincronizar")
+    parser.add_argument("--max-delay", type=float, default=MAX_DELAY, help="espera máxima desde o primeiro evento")
+    parser.add_argument("--ignore", action="append", default=[], help="nome de diretório a ignorar (repetível)")
+    parser.add_argument("--log-file", default=DEFAULT_LOG_FILE)
+    parser.add_argument("--stats-file", default=DEFAULT_STATS_FILE, help="JSON com os contadores, atualizado a cada sync")
+    parser.add_argument("--no-initial-sync", action="store_true", help="não sincroniza ao subir")
+    parser.add_argument("--max-syncs", type=int, help="sai depois de N syncs (testes)")
+    args = parser.parse_args(argv)
+
+    watcher = SyncWatcher(args.project_dir, args.sync_cmd, args.quiet, args.max_delay,
+                          args.log_file, args.stats_file, IGNORED_DIRS | set(args.ignore))
+    signal.signal(signal.SIGTERM, watcher.stop)
+    signal.signal(signal.SIGINT, watcher.stop)
+    signal.signal(signal.SIGUSR1, watcher.log_stats)
+    try:
+        watcher.run(initial_sync=not args.no_initial_sync, max_syncs=args.max_syncs)
+    except OSError as e:
+        print(json.dumps({"error": f"inotify indisponível: {e}"}, ensure_ascii=False))
+        return 1
+    watcher.log("Watcher finalizado. Contadores: " + json.dumps(watcher.stats))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,338 @@
+"""
+Benchmark do extract_curriculum.py com um corpus sintético de PDFs.
+
+Gera PDFs dos três layouts suportados (tabela inline/EJA, linhas
+alternadas/Técnico por módulos e blocos por semestre) em tamanhos
+crescentes, mede páginas/s, disciplinas/s e pico de memória (RSS) de cada
+caso em um processo separado e compara com um baseline salvo.
+
+O tempo de cada caso é a mediana de várias execuções (o melhor tempo
+oscila demais entre rodadas), e páginas/s conta só as páginas realmente
+lidas: a leitura para no fim da grade, antes das páginas de enchimento.
+Ao mudar o desempenho de propósito, regrave o baseline no mesmo commit.
+
+Roda offline, só com Python e PyPDF2 (os PDFs são escritos à mão, sem
+bibliotecas de geração).
+
+Uso:
+  python3 bench_curriculum.py                     # roda e compara com o baseline
+  python3 bench_curriculum.py --update-baseline   # grava o baseline atual
+  python3 bench_curriculum.py --quick             # só os casos pequenos
+  python3 bench_curriculum.py --sizes 10x100,500x5000 --layouts inline
+"""
+import argparse
+import json
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+LAYOUTS = ("inline", "alternating", "semesters")
+
+# (páginas, disciplinas)
+DEFAULT_SIZES = [(1, 10), (10, 100), (50, 1000), (100, 5000), (500, 500), (500, 5000)]
+QUICK_SIZES = [(1, 10), (10, 100), (50, 1000)]
+
+# Casos muito rápidos são repetidos até somar pelo menos este tempo,
+# para a mediana não ser só ruído
+MIN_CASE_SECONDS = 0.5
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "bench_curriculum_baseline.json")
+
+SUBJECT_WORDS = [
+    "GESTÃO", "ANÁLISE", "LÓGICA", "REDAÇÃO", "FÍSICA", "QUÍMICA", "HISTÓRIA",
+    "ÉTICA", "ESTATÍSTICA", "BIOLOGIA", "INFORMÁTICA", "ADMINISTRAÇÃO",
+]
+
+
+# ============================================================
+# GERAÇÃO DOS PDFs
+# ============================================================
+
+def _escape_pdf_string(text):
+    return text.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)")
+
+
+DEFAULT_FONT = "<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica /Encoding /WinAnsiEncoding >>"
+
+
+def make_pdf(pages):
+    """
+    Escreve um PDF mínimo (uma fonte Type1 Helvetica com WinAnsiEncoding)
+    com uma linha de texto por item de cada página. Retorna os bytes.
+    """
+    streams = []
+    for lines in pages:
+        content = "BT /F1 10 Tf 40 800 Td 12 TL\n"
+        content += "".join(f"({_escape_pdf_string(line)}) Tj T*\n" for line in lines)
+        content += "ET"
+        streams.append(content)
+    return make_pdf_from_streams(streams)
+
+
+def make_pdf_from_streams(streams, font=DEFAULT_FONT):
+    """
+    Escreve um PDF com um content stream (texto, cp1252) por página e a
+    fonte /F1 dada (dicionário PDF como texto). Retorna os bytes.
+    """
+    num_pages = len(streams)
+    font_id = 3 + 2 * num_pages
+    kids = " ".join(f"{3 + 2 * i} 0 R" for i in range(num_pages))
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        f"<< /Type /Pages /Kids [{kids}] /Count {num_pages} >>".encode(),
+    ]
+    for i, content in enumerate(streams):
+        data = content.encode("cp1252")
+        objects.append(
+            f"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 595 842] "
+            f"/Resources << /Font << /F1 {font_id} 0 R >> >> /Contents {4 + 2 * i} 0 R >>".encode()
+        )
+        objects.append(b"<< /Length %d >>\nstream\n" % len(data) + data + b"\nendstream")
+    objects.append(font.encode())
+
+    out = bytearray(b"%PDF-1.4\n")
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(out))
+        out += f"{number} 0 obj\n".encode() + obj + b"\nendobj\n"
+    xref = len(out)
+    out += f"xref\n0 {len(objects) + 1}\n0000000000 65535 f \n".encode()
+    out += "".join(f"{offset:010d} 00000 n \n" for offset in offsets).encode()
+    out += f"trailer\n<< /Size {len(objects) + 1} /Root 1 0 R >>\nstartxref\n{xref}\n%%EOF\n".encode()
+    return bytes(out)
+
+
+def _subject_name(index):
+    """Nome único só com letras (os padrões de disciplina não aceitam dígitos)."""
+    code = ""
+    n = index
+    for _ in range(3):
+        code += chr(ord("A") + n % 26)
+        n //= 26
+    return f"{SUBJECT_WORDS[index % len(SUBJECT_WORDS)]} {code}"
+
+
+def _split_pages(items, num_pages):
+    """Distribui as linhas de forma uniforme entre as páginas."""
+    per_page = -(-len(items) // num_pages) or 1
+    pages = [items[i:i + per_page] for i in range(0, len(items), per_page)]
+    while len(pages) < num_pages:
+        pages.append(["Página sem grade curricular."])
+    return pages
+
+
+def generate_layout(layout, num_pages, num_subjects, per_block=10):
+    """
+    Gera as páginas (listas de linhas) de um documento no layout pedido.
+    Cada bloco (módulo/semestre) tem per_block disciplinas.
+    """
+    blocks = []
+    for i in range(num_subjects):
+        name = _subject_name(i)
+        block = i // per_block + 1
+        workload = 20 + (i * 7) % 80
+        if layout == "inline":
+            blocks.append([f"{name} {workload}h {workload // 4} {1 + i % 3}"])
+        elif layout == "alternating":
+            header = [f"MÓDULO {block}"] if i % per_block == 0 else []
+            blocks.append(header + [name, str(workload)])
+        elif layout == "semesters":
+            header = [f"{block}º SEMESTRE"] if i % per_block == 0 else []
+            blocks.append(header + [f"{name.title()} - {workload}h"])
+        else:
+            raise ValueError(f"Layout desconhecido: {layout}")
+
+    if layout == "inline":
+        head = ["PROJETO EJA PREMIUM", "DISCIPLINASCARGA HORÁRIAQDE DE AULASPROVAS"]
+    elif layout == "alternating":
+        head = ["TÉCNICO EM BENCHMARK", "ESTRUTURA CURRICULAR"]
+    else:
+        head = ["Curso de Benchmark", ""]
+
+    lines = head + [line for block in blocks for line in block]
+    lines.append("CARGA HORÁRIA TOTAL")
+    return _split_pages(lines, num_pages)
+
+
+def build_corpus(directory, layouts, sizes):
+    """Gera o corpus em disco. Retorna [(caso, caminho, páginas, disciplinas)]."""
+    os.makedirs(directory, exist_ok=True)
+    corpus = []
+    for layout in layouts:
+        for num_pages, num_subjects in sizes:
+            case = f"{layout}/{num_pages}x{num_subjects}"
+            path = os.path.join(directory, f"{layout}_{num_pages}x{num_subjects}.pdf")
+            with open(path, "wb") as f:
+                f.write(make_pdf(generate_layout(layout, num_pages, num_subjects)))
+            corpus.append((case, path, num_pages, num_subjects))
+    return corpus
+
+
+# ============================================================
+# MEDIÇÃO
+# ============================================================
+
+def measure(pdf_path, repeat, backend=None):
+    """
+    Roda no processo filho: extrai o PDF pelo menos repeat vezes (e até
+    somar MIN_CASE_SECONDS) e devolve a mediana dos tempos, as páginas
+    lidas, o número de disciplinas e o pico de RSS (KB) do processo.
+    """
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from extract_curriculum import extract_curriculum_from_pdf
+    from extract_pdf_text import DEFAULT_BACKEND
+
+    backend = backend or DEFAULT_BACKEND
+    # Uma execução com timings só para saber quantas páginas são lidas
+    # (as medidas abaixo rodam sem timings, que têm custo próprio)
+    probe = extract_curriculum_from_pdf(pdf_path, timings=True, backend=backend)
+    pages_read = probe.get("timings", {}).get("pagesRead")
+    times = []
+    result = {}
+    while len(times) < repeat or sum(times) < MIN_CASE_SECONDS:
+        start = time.perf_counter()
+        result = extract_curriculum_from_pdf(pdf_path, backend=backend)
+        times.append(time.perf_counter() - start)
+    return {
+        "seconds": statistics.median(times),
+        "runs": len(times),
+        "pagesRead": pages_read,
+        "subjects": len(result.get("subjects", [])),
+        "error": result.get("error"),
+        "peakRssKb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+    }
+
+
+def run_case(pdf_path, repeat, backend=None):
+    """Mede um caso em um processo Python novo, para isolar o pico de RSS."""
+    command = [sys.executable, os.path.abspath(__file__), "--measure", pdf_path, "--repeat", str(repeat)]
+    if backend:
+        command += ["--backend", backend]
+    completed = subprocess.run(
+        command,
+        capture_output=True, text=True, check=True,
+    )
+    return json.loads(completed.stdout)
+
+
+def compare(results, baseline, tolerance):
+    """Lista as regressões em relação ao baseline (queda de vazão ou alta de RSS)."""
+    regressions = []
+    for case, current in results.items():
+        previous = baseline.get(case)
+        if not previous:
+            continue
+        if current["pagesPerSec"] < previous["pagesPerSec"] * (1 - tolerance):
+            regressions.append(
+                f"{case}: {current['pagesPerSec']:.1f} páginas/s (baseline {previous['pagesPerSec']:.1f})"
+            )
+        if current["peakRssKb"] > previous["peakRssKb"] * (1 + tolerance):
+            regressions.append(
+                f"{case}: pico de RSS {current['peakRssKb']} KB (baseline {previous['peakRssKb']} KB)"
+            )
+    return regressions
+
+
+def _case_result(measured, num_pages):
+    pages_read = measured["pagesRead"] or num_pages
+    return {
+        "pagesPerSec": round(pages_read / measured["seconds"], 2),
+        "subjectsPerSec": round(measured["subjects"] / measured["seconds"], 2),
+        "peakRssKb": measured["peakRssKb"],
+    }
+
+
+def _parse_sizes(value):
+    sizes = []
+    for item in value.split(","):
+        pages, subjects = item.lower().split("x")
+        sizes.append((int(pages), int(subjects)))
+    return sizes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark do extract_curriculum.py com PDFs sintéticos.")
+    parser.add_argument("--layouts", default=",".join(LAYOUTS), help="layouts separados por vírgula")
+    parser.add_argument("--sizes", help="casos PÁGINASxDISCIPLINAS separados por vírgula (ex.: 10x100,500x5000)")
+    parser.add_argument("--quick", action="store_true", help="roda só os casos pequenos")
+    parser.add_argument("--repeat", type=int, default=5, help="execuções por caso (vale a mediana)")
+    parser.add_argument("--corpus-dir", help="onde gravar os PDFs gerados (padrão: diretório temporário)")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="arquivo de baseline")
+    parser.add_argument("--update-baseline", action="store_true", help="grava os resultados como novo baseline")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="regressão tolerada (0.25 = 25%%)")
+    parser.add_argument("--backend", help="backend de extração de texto (padrão: o do extract_curriculum)")
+    parser.add_argument("--measure", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.measure:
+        print(json.dumps(measure(args.measure, args.repeat, args.backend)))
+        return 0
+
+    layouts = [layout for layout in args.layouts.split(",") if layout]
+    sizes = _parse_sizes(args.sizes) if args.sizes else (QUICK_SIZES if args.quick else DEFAULT_SIZES)
+
+    baseline = None
+    if not args.update_baseline and os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f)
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        corpus = build_corpus(args.corpus_dir or tmp_dir, layouts, sizes)
+
+        results = {}
+        failures = []
+        print(f"{'caso':<28} {'páginas/s':>10} {'disc./s':>10} {'RSS (MB)':>9}")
+        for case, path, num_pages, num_subjects in corpus:
+            measured = run_case(path, args.repeat, args.backend)
+            if measured["error"] or measured["subjects"] != num_subjects:
+                failures.append(
+                    f"{case}: esperava {num_subjects} disciplinas, obteve {measured['subjects']}"
+                    + (f" ({measured['error']})" if measured["error"] else "")
+                )
+            results[case] = _case_result(measured, num_pages)
+            # Uma regressão só conta se aparecer de novo numa segunda medida
+            if baseline and compare({case: results[case]}, baseline, args.tolerance):
+                retry = _case_result(run_case(path, args.repeat, args.backend), num_pages)
+                if retry["pagesPerSec"] > results[case]["pagesPerSec"]:
+                    results[case] = retry
+            print(f"{case:<28} {results[case]['pagesPerSec']:>10.1f} "
+                  f"{results[case]['subjectsPerSec']:>10.1f} {results[case]['peakRssKb'] / 1024:>9.1f}")
+
+    if failures:
+        print("\nResultados incorretos:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+
+    if args.update_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline, encoding="utf-8") as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"\nBaseline gravado em {args.baseline}")
+        return 0
+
+    if baseline is None:
+        print(f"\nSem baseline em {args.baseline}; rode com --update-baseline para criar.")
+        return 0
+
+    regressions = compare(results, baseline, args.tolerance)
+    if regressions:
+        print("\nRegressões de desempenho:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("\nSem regressões em relação ao baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -27,6 +27,7 @@ export default function CurriculumPDFImport({ courseId, onSuccess }: CurriculumP
   const [extractedData, setExtractedData] = useState<CurriculumSubject[] | null>(null);
   const [isProcessing, setIsProcessing] = useState(false);
   const [editingSubjects, setEditingSubjects] = useState<CurriculumSubject[]>([]);
+  const [isPartial, setIsPartial] = useState(false);
 
   const importMutation = trpc.adminCurriculum.importFromPDF.useMutation();
   const saveMutation = trpc.adminCurriculum.saveParsedCurriculum.useMutation();
@@ -44,6 +45,7 @@ export default function CurriculumPDFImport({ courseId, onSuccess }: CurriculumP
       }
       setFile(selectedFile);
       setExtractedData(null);
+      setIsPartial(false);
     }
   };
 
@@ -67,7 +69,12 @@ export default function CurriculumPDFImport({ courseId, onSuccess }: CurriculumP
           if (result.success && result.data.subjects) {
             setExtractedData(result.data.subjects);
             setEditingSubjects(result.data.subjects);
-            toast.success(`${result.data.subjects.length} disciplinas extraídas com sucesso!`);
+            setIsPartial(Boolean(result.data.partial));
+            if (result.data.partial) {
+              toast.warning(result.data.warning || "Extração incompleta: o PDF não foi lido até o fim");
+            } else {
+              toast.success(`${result.data.subjects.length} disciplinas extraídas com sucesso!`);
+            }
           } else {
             toast.error("Nenhuma disciplina encontrada no PDF");
           }
@@ -94,11 +101,13 @@ export default function CurriculumPDFImport({ courseId, onSuccess }: CurriculumP
       await saveMutation.mutateAsync({
         courseId,
         subjects: editingSubjects,
+        partial: isPartial,
       });
       toast.success("Grade curricular importada com sucesso!");
       setIsOpen(false);
       setFile(null);
       setExtractedData(null);
+      setIsPartial(false);
       setEditingSubjects([]);
       onSuccess();
     } catch (error: any) {
@@ -119,6 +128,7 @@ export default function CurriculumPDFImport({ courseId, onSuccess }: CurriculumP
   const handleReset = () => {
     setFile(null);
     setExtractedData(null);
+    setIsPartial(false);
     setEditingSubjects([]);
   };
 
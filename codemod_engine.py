@@ -0,0 +1,352 @@
+"""
+Motor de reescrita compartilhado pelos scripts de cores/tema
+(fix_colors.py, global_fix_colors.py, final_global_fix.py,
+update_blue_color.py, update_inline_gradients.py).
+
+Cada script declara só um RuleSet (lista de padrão -> substituição). O
+motor compila o conjunto inteiro uma única vez em uma alternância de
+regex e reescreve cada arquivo em uma passagem, despachando cada trecho
+encontrado para a substituição da regra que o encontrou. Arquivos em que
+nenhuma regra pode casar (nenhum dos literais obrigatórios aparece nos
+bytes) nem chegam a ser decodificados.
+
+Semântica: numa mesma posição vale a primeira regra da lista; o texto
+substituído não é reprocessado pelas regras seguintes. Os conjuntos de
+regras foram escritos para dar o mesmo resultado que a antiga sequência
+de re.sub (regras que nunca casavam porque uma anterior já tinha trocado
+o texto foram removidas).
+
+Execuções incrementais: um manifesto guarda, para cada arquivo, tamanho,
+mtime, SHA-256 do conteúdo e a versão dos conjuntos de regras já
+aplicados. Cada combinação de conjuntos tem o seu manifesto (a chave
+inclui o hash das regras), então execuções com regras diferentes sobre a
+mesma árvore não se confundem. Arquivos que não mudaram desde a última execução com as mesmas
+regras são pulados sem serem lidos; os demais são divididos entre um pool
+de processos e gravados de forma atômica (arquivo temporário + rename).
+
+Uso (vários conjuntos em uma só varredura, na ordem informada):
+  python3 codemod_engine.py fix_colors global_fix_colors final_global_fix
+  python3 codemod_engine.py update_blue_color --root client/src
+  python3 codemod_engine.py fix_colors --force        # ignora o manifesto
+"""
+import argparse
+import hashlib
+import importlib
+import json
+import os
+import re
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+BASE_DIR = "/var/www/faculdade-site/client/src"
+DEFAULT_EXTENSIONS = (".tsx", ".ts", ".css")
+
+# Manifestos ficam fora da árvore do site (que é sincronizada com o GitHub)
+MANIFEST_DIR = os.environ.get("CODEMOD_MANIFEST_DIR", os.path.expanduser("~/.cache/codemods"))
+MANIFEST_FORMAT = 1
+
+# Abaixo disso não compensa subir processos
+PARALLEL_MIN_FILES = 32
+
+_META_CHARS = set(".^$*+?{}[]|()")
+
+
+class Rule:
+    """
+    Uma regra de reescrita. pattern é uma regex (ou um texto literal, com
+    literal=True); replacement segue as regras de re.sub. Com path, a
+    regra só vale para arquivos cujo caminho contém esse trecho.
+    """
+
+    def __init__(self, pattern, replacement, literal=False, path=None):
+        self.pattern = re.escape(pattern) if literal else pattern
+        self.replacement = replacement
+        self.path = path
+        self.regex = re.compile(self.pattern)
+        if "\\" in replacement:
+            self._template = replacement
+        else:
+            self._template = None
+
+    def expand(self, text):
+        """Substituição do trecho text (já casado por esta regra)."""
+        if self._template is None:
+            return self.replacement
+        return self.regex.sub(self._template, text, count=1)
+
+
+def _literal_prefix(pattern):
+    """Trecho literal com que todo casamento da regex precisa começar."""
+    prefix = []
+    i = 0
+    while i < len(pattern):
+        char = pattern[i]
+        if char == "\\":
+            if i + 1 < len(pattern) and not pattern[i + 1].isalnum():
+                prefix.append(pattern[i + 1])
+                i += 2
+                continue
+            break
+        if char in _META_CHARS:
+            break
+        prefix.append(char)
+        i += 1
+    # Um quantificador logo depois torna o último caractere opcional
+    if prefix and i < len(pattern) and pattern[i] in "*?{":
+        prefix.pop()
+    return "".join(prefix)
+
+
+class RuleSet:
+    """
+    Conjunto de regras compilado uma vez para reescrever arquivos em uma
+    passagem. name identifica o conjunto nas mensagens; message é o prefixo
+    impresso para cada arquivo alterado.
+    """
+
+    def __init__(self, name, rules, extensions=DEFAULT_EXTENSIONS, message=None):
+        self.name = name
+        self.rules = [rule if isinstance(rule, Rule) else Rule(*rule) for rule in rules]
+        self.extensions = tuple(extensions)
+        self.message = message or name
+        self._matchers = {}
+
+        # Versão derivada das próprias regras: qualquer mudança invalida o manifesto
+        fingerprint = json.dumps(
+            [name, self.extensions, [(r.pattern, r.replacement, r.path) for r in self.rules]]
+        )
+        self.version = hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()[:16]
+
+        # Pré-filtro em bytes: algum literal obrigatório de alguma regra
+        prefixes = [_literal_prefix(rule.pattern) for rule in self.rules]
+        if all(prefixes):
+            literals = sorted({p.encode("utf-8") for p in prefixes}, key=len, reverse=True)
+            self.prefilter = re.compile(b"|".join(re.escape(p) for p in literals))
+        else:
+            self.prefilter = None
+
+    def applies_to(self, filepath):
+        return filepath.endswith(self.extensions)
+
+    def may_match(self, data):
+        """False quando nenhuma regra pode casar com estes bytes."""
+        return self.prefilter is None or self.prefilter.search(data) is not None
+
+    def _matcher(self, filepath):
+        """Alternância das regras ativas para o arquivo (cacheada por escopo)."""
+        active = tuple(i for i, rule in enumerate(self.rules) if rule.path is None or rule.path in filepath)
+        matcher = self._matchers.get(active)
+        if matcher is None:
+            groups = {}
+            parts = []
+            group = 1
+            for i in active:
+                rule = self.rules[i]
+                groups[group] = rule
+                parts.append(f"({rule.pattern})")
+                group += 1 + rule.regex.groups
+            regex = re.compile("|".join(parts)) if parts else None
+            matcher = self._matchers[active] = (regex, groups)
+        return matcher
+
+    def rewrite(self, text, filepath=""):
+        """Aplica todas as regras a text em uma única passagem."""
+        regex, groups = self._matcher(filepath)
+        if regex is None:
+            return text
+        return regex.sub(lambda m: groups[m.lastindex].expand(m.group()), text)
+
+
+def iter_source_files(base_dir, extensions=DEFAULT_EXTENSIONS):
+    for root, dirs, files in os.walk(base_dir):
+        for file in files:
+            if file.endswith(tuple(extensions)):
+                yield os.path.join(root, file)
+
+
+def rules_key(rule_sets, filepath):
+    """Versão combinada dos conjuntos que se aplicam ao arquivo."""
+    return "+".join(rule_set.version for rule_set in rule_sets if rule_set.applies_to(filepath))
+
+
+def write_atomic(filepath, data):
+    """Grava via arquivo temporário no mesmo diretório + os.replace."""
+    directory = os.path.dirname(filepath) or "."
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".codemod-", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        try:
+            os.chmod(tmp_path, os.stat(filepath).st_mode & 0o7777)
+        except FileNotFoundError:
+            pass
+        os.replace(tmp_path, filepath)
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.unlink(tmp_path)
+        raise
+
+
+def rewrite_file(filepath, rule_sets):
+    """
+    Aplica os conjuntos (na ordem) a um arquivo, com uma leitura e no
+    máximo uma escrita. Retorna (nomes dos conjuntos que alteraram o
+    arquivo, SHA-256 do conteúdo final).
+    """
+    active = [rule_set for rule_set in rule_sets if rule_set.applies_to(filepath)]
+    with open(filepath, "rb") as f:
+        data = f.read()
+    if not any(rule_set.may_match(data) for rule_set in active):
+        return [], hashlib.sha256(data).hexdigest()
+
+    content = new_content = data.decode("utf-8")
+    changed = []
+    for rule_set in active:
+        rewritten = rule_set.rewrite(new_content, filepath)
+        if rewritten != new_content:
+            changed.append(rule_set.name)
+            new_content = rewritten
+
+    if new_content != content:
+        data = new_content.encode("utf-8")
+        write_atomic(filepath, data)
+    return changed, hashlib.sha256(data).hexdigest()
+
+
+# ============================================================
+# MANIFESTO
+# ============================================================
+
+def default_manifest_path(base_dir, rule_sets=()):
+    """Um manifesto por diretório e combinação de conjuntos de regras (na ordem)."""
+    versions = "+".join(rule_set.version for rule_set in rule_sets)
+    key = hashlib.sha256(f"{os.path.abspath(base_dir)}\0{versions}".encode("utf-8")).hexdigest()[:16]
+    return os.path.join(MANIFEST_DIR, f"{key}.json")
+
+
+def load_manifest(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if manifest.get("format") != MANIFEST_FORMAT:
+        return {}
+    return manifest.get("files", {})
+
+
+def save_manifest(path, files):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    data = json.dumps({"format": MANIFEST_FORMAT, "files": files}, separators=(",", ":"), sort_keys=True)
+    write_atomic(path, data.encode("utf-8"))
+
+
+def _file_entry(st, sha256, key):
+    return {"mtime": st.st_mtime_ns, "size": st.st_size, "sha256": sha256, "rules": key}
+
+
+def _is_current(entry, st, key, filepath):
+    """True se o arquivo já foi processado com estas regras e não mudou."""
+    if not entry or entry.get("rules") != key:
+        return False
+    if entry.get("mtime") == st.st_mtime_ns and entry.get("size") == st.st_size:
+        return True
+    if entry.get("size") != st.st_size:
+        return False
+    # Só o mtime mudou (ex.: checkout/touch): confere o conteúdo
+    with open(filepath, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest() == entry.get("sha256")
+
+
+# ============================================================
+# EXECUÇÃO
+# ============================================================
+
+_worker_rule_sets = None
+
+
+def _init_worker(rule_sets):
+    global _worker_rule_sets
+    _worker_rule_sets = rule_sets
+
+
+def _process(filepath):
+    """Worker: reescreve um arquivo e devolve o necessário para o manifesto."""
+    try:
+        changed, sha256 = rewrite_file(filepath, _worker_rule_sets)
+    except Exception as e:
+        return filepath, None, None, str(e)
+    return filepath, changed, sha256, None
+
+
+def run(rule_sets, base_dir=BASE_DIR, workers=None, manifest_path=None, force=False):
+    """
+    Varre base_dir uma vez aplicando os conjuntos de regras. Com o
+    manifesto (padrão), arquivos inalterados desde a última execução com as
+    mesmas regras são pulados. force=True reprocessa tudo. Retorna
+    (processados, pulados).
+    """
+    if isinstance(rule_sets, RuleSet):
+        rule_sets = [rule_sets]
+    messages = {rule_set.name: rule_set.message for rule_set in rule_sets}
+    extensions = tuple({ext for rule_set in rule_sets for ext in rule_set.extensions})
+    manifest_path = manifest_path or default_manifest_path(base_dir, rule_sets)
+    previous = {} if force else load_manifest(manifest_path)
+
+    files = {}
+    pending = []
+    for filepath in iter_source_files(base_dir, extensions):
+        relpath = os.path.relpath(filepath, base_dir)
+        key = rules_key(rule_sets, filepath)
+        st = os.stat(filepath)
+        entry = previous.get(relpath)
+        if _is_current(entry, st, key, filepath):
+            files[relpath] = entry if entry["mtime"] == st.st_mtime_ns else dict(entry, mtime=st.st_mtime_ns)
+        else:
+            pending.append(filepath)
+
+    skipped = len(files)
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(pending) >= PARALLEL_MIN_FILES:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker,
+                                 initargs=(rule_sets,)) as executor:
+            results = list(executor.map(_process, pending, chunksize=8))
+    else:
+        _init_worker(rule_sets)
+        results = [_process(filepath) for filepath in pending]
+
+    for filepath, changed, sha256, error in results:
+        if error is not None:
+            print(f"Error fixing {filepath}: {error}")
+            continue
+        for name in changed:
+            print(f"{messages[name]}: {filepath}")
+        files[os.path.relpath(filepath, base_dir)] = _file_entry(
+            os.stat(filepath), sha256, rules_key(rule_sets, filepath)
+        )
+
+    save_manifest(manifest_path, files)
+    return len(pending), skipped
+
+
+def load_rule_set(module_name):
+    """Importa o script informado (ex.: fix_colors) e devolve o RULES dele."""
+    return importlib.import_module(module_name.removesuffix(".py")).RULES
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aplica conjuntos de regras de cores/tema em uma só varredura.")
+    parser.add_argument("scripts", nargs="+", help="scripts com RULES (ex.: fix_colors update_blue_color)")
+    parser.add_argument("--root", default=BASE_DIR, help="diretório dos fontes do cliente")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processos para reescrever os arquivos")
+    parser.add_argument("--manifest", help="arquivo do manifesto (padrão: em $CODEMOD_MANIFEST_DIR ou ~/.cache/codemods)")
+    parser.add_argument("--force", action="store_true", help="reprocessa todos os arquivos, ignorando o manifesto")
+    args = parser.parse_args(argv)
+
+    processed, skipped = run([load_rule_set(name) for name in args.scripts], args.root,
+                             args.workers, args.manifest, args.force)
+    print(f"{processed} arquivo(s) processado(s), {skipped} sem mudanças desde a última execução")
+
+
+if __name__ == "__main__":
+    main()
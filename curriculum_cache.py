@@ -0,0 +1,132 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+
+# A cada quantas gravações a limpeza roda mesmo sem o limite estourado
+# (outros processos gravam no mesmo diretório sem que este veja)
+PRUNE_EVERY = 32
+
+
+class CurriculumCache:
+    """
+    Cache em disco dos resultados de extract_curriculum_from_pdf.
+
+    A chave é o SHA-256 dos bytes do PDF (mais uma variante opcional, ex.: as
+    opções com que o resultado foi produzido), prefixado pela versão do parser.
+    Trocar a versão invalida as entradas antigas automaticamente: elas nunca
+    mais são encontradas e são as primeiras a sair na próxima limpeza.
+
+    O tamanho total é limitado por max_bytes com descarte LRU; o último acesso
+    de cada entrada fica registrado no mtime do arquivo. A varredura do
+    diretório só roda quando a estimativa de tamanho passa do limite ou a
+    cada PRUNE_EVERY gravações, não em toda gravação.
+    """
+
+    def __init__(self, directory, version, max_bytes=64 * 1024 * 1024):
+        self.directory = directory
+        self.version = str(version)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Tamanho estimado do diretório (None: ainda não medido) e gravações desde a última limpeza
+        self._approx_bytes = None
+        self._puts = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def key(self, data, variant=""):
+        h = hashlib.sha256(data)
+        if variant:
+            h.update(b"\0" + variant.encode("utf-8"))
+        return h.hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, f"v{self.version}-{key}.json")
+
+    def get(self, data, variant=""):
+        """Retorna o resultado em cache para os bytes do PDF (e a variante), ou None."""
+        path = self._path(self.key(data, variant))
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                result = json.load(f)
+            os.utime(path)
+        except (FileNotFoundError, ValueError):
+            with self._lock:
+                self.misses += 1
+            return None
+        with self._lock:
+            self.hits += 1
+        return result
+
+    def put(self, data, result, variant=""):
+        """Grava o resultado de forma atômica e aplica o limite de tamanho."""
+        path = self._path(self.key(data, variant))
+        fd, tmp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                json.dump(result, f, ensure_ascii=False, separators=(",", ":"))
+                size = f.tell()
+            os.replace(tmp_path, path)
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+        with self._lock:
+            self._puts += 1
+            if self._approx_bytes is not None:
+                self._approx_bytes += size
+            due = (self._approx_bytes is None or self._approx_bytes > self.max_bytes
+                   or self._puts >= PRUNE_EVERY)
+        if due:
+            self.prune()
+
+    def _entries(self):
+        entries = []
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.is_file() and entry.name.endswith(".json"):
+                    try:
+                        st = entry.stat()
+                    except FileNotFoundError:
+                        # Removida por outro processo (prune/put) entre a listagem e o stat
+                        continue
+                    entries.append((entry.name, st.st_mtime, st.st_size))
+        return entries
+
+    def prune(self):
+        """Remove entradas de outras versões e as menos usadas acima do limite."""
+        current = f"v{self.version}-"
+        entries = []
+        for name, mtime, size in self._entries():
+            if not name.startswith(current):
+                self._remove(name)
+            else:
+                entries.append((mtime, size, name))
+
+        total = sum(size for _, size, _ in entries)
+        for _, size, name in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            self._remove(name)
+            total -= size
+        with self._lock:
+            self._approx_bytes = total
+            self._puts = 0
+
+    def _remove(self, name):
+        try:
+            os.unlink(os.path.join(self.directory, name))
+        except FileNotFoundError:
+            pass
+
+    def stats(self):
+        entries = self._entries()
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(entries),
+                "bytes": sum(size for _, _, size in entries),
+            }
@@ -0,0 +1,175 @@
+"""
+Modelo tipado e serialização compacta dos resultados de extract_curriculum.
+
+Subject e Curriculum usam __slots__ (sem __dict__ por instância) e os nomes
+das disciplinas são internados: no processamento do catálogo inteiro, as
+disciplinas que se repetem entre cursos ("Língua Portuguesa", "Ética
+Profissional"...) compartilham a mesma string.
+
+Formatos de saída (dumps):
+  - padrão: o JSON indentado de sempre;
+  - compact=True: o mesmo JSON sem indentação nem espaços;
+  - columns=True: compacto e com as disciplinas em colunas
+      {"courseName": ..., "totalSemesters": ...,
+       "subjectColumns": {"semester": [...], "subjectName": [...], "workload": [...]}}
+    (description/numClasses/numExams só aparecem se alguma disciplina tiver).
+
+Uso como biblioteca:
+  from extract_curriculum import extract
+  curriculum = extract("grade.pdf")
+  for subject in curriculum.subjects:
+      print(subject.semester, subject.subject_name, subject.workload)
+  if curriculum.partial:
+      print(curriculum.warning)
+"""
+import json
+import sys
+
+_COMPACT = {"ensure_ascii": False, "separators": (",", ":")}
+
+
+class CurriculumError(Exception):
+    """Extração sem resultado (o "error" da saída JSON; code é o "code")."""
+
+    def __init__(self, message, code=None):
+        super().__init__(message)
+        self.code = code
+
+
+# Campos opcionais: atributo -> chave no JSON (só saem quando preenchidos).
+# numClasses/numExams vêm da tabela inline (EJA).
+_OPTIONAL_FIELDS = (("description", "description"), ("num_classes", "numClasses"), ("num_exams", "numExams"))
+
+
+class Subject:
+    __slots__ = ("semester", "subject_name", "workload", "description", "num_classes", "num_exams")
+
+    def __init__(self, semester, subject_name, workload, description=None, num_classes=None, num_exams=None):
+        self.semester = semester
+        self.subject_name = sys.intern(subject_name)
+        self.workload = workload
+        self.description = description
+        self.num_classes = num_classes
+        self.num_exams = num_exams
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data["semester"], data["subjectName"], data["workload"], data.get("description"),
+                   data.get("numClasses"), data.get("numExams"))
+
+    def to_dict(self):
+        data = {"semester": self.semester, "subjectName": self.subject_name, "workload": self.workload}
+        for attr, key in _OPTIONAL_FIELDS:
+            value = getattr(self, attr)
+            if value is not None:
+                data[key] = value
+        return data
+
+    def _key(self):
+        return (self.semester, self.subject_name, self.workload, self.description, self.num_classes, self.num_exams)
+
+    def __eq__(self, other):
+        if not isinstance(other, Subject):
+            return NotImplemented
+        return self._key() == other._key()
+
+    def __repr__(self):
+        return f"Subject({self.semester!r}, {self.subject_name!r}, {self.workload!r})"
+
+
+class Curriculum:
+    """
+    Grade extraída. partial=True (com o motivo em warning) quando o tempo
+    limite cortou a leitura: as disciplinas são só as lidas até ali.
+    """
+
+    __slots__ = ("course_name", "total_semesters", "subjects", "timings", "partial", "warning")
+
+    def __init__(self, course_name, total_semesters, subjects, timings=None, partial=False, warning=None):
+        self.course_name = course_name
+        self.total_semesters = total_semesters
+        self.subjects = subjects
+        self.timings = timings
+        self.partial = partial
+        self.warning = warning
+
+    @classmethod
+    def from_dict(cls, data):
+        """Aceita o resultado em linhas ("subjects") ou em colunas ("subjectColumns")."""
+        if "error" in data:
+            raise CurriculumError(data["error"], data.get("code"))
+        if "subjectColumns" in data:
+            columns = data["subjectColumns"]
+            missing = [None] * len(columns["subjectName"])
+            optional = [columns.get(key) or missing for _, key in _OPTIONAL_FIELDS]
+            subjects = [Subject(*row) for row in zip(columns["semester"], columns["subjectName"],
+                                                      columns["workload"], *optional)]
+        else:
+            subjects = [Subject.from_dict(sub) for sub in data["subjects"]]
+        return cls(data.get("courseName"), data.get("totalSemesters"), subjects, data.get("timings"),
+                   bool(data.get("partial")), data.get("warning"))
+
+    def to_dict(self):
+        data = {
+            "courseName": self.course_name,
+            "totalSemesters": self.total_semesters,
+            "subjects": [sub.to_dict() for sub in self.subjects],
+        }
+        self._add_status(data)
+        return data
+
+    def _add_status(self, data):
+        if self.partial:
+            data["partial"] = True
+            data["warning"] = self.warning
+        if self.timings is not None:
+            data["timings"] = self.timings
+
+    def to_columns(self):
+        subjects = self.subjects
+        columns = {
+            "semester": [sub.semester for sub in subjects],
+            "subjectName": [sub.subject_name for sub in subjects],
+            "workload": [sub.workload for sub in subjects],
+        }
+        for attr, key in _OPTIONAL_FIELDS:
+            values = [getattr(sub, attr) for sub in subjects]
+            if any(value is not None for value in values):
+                columns[key] = values
+        data = {"courseName": self.course_name, "totalSemesters": self.total_semesters,
+                "subjectColumns": columns}
+        self._add_status(data)
+        return data
+
+    def __len__(self):
+        return len(self.subjects)
+
+    def __repr__(self):
+        partial = ", parcial" if self.partial else ""
+        return f"Curriculum({self.course_name!r}, {len(self.subjects)} disciplina(s){partial})"
+
+
+def _to_columns(result):
+    # Mantém os demais campos (file, elapsedMs, courseId, pages...) como estão
+    data = {key: value for key, value in result.items() if key != "subjects"}
+    data["subjectColumns"] = Curriculum.from_dict(result).to_columns()["subjectColumns"]
+    return data
+
+
+def dumps(result, compact=False, columns=False):
+    """
+    Serializa um resultado (dict de extract_curriculum_from_pdf, linha do
+    modo --batch, catálogo de extract_catalog_from_pdf ou Curriculum).
+    Resultados com "error" saem como estão.
+    """
+    if isinstance(result, Curriculum):
+        data = result.to_columns() if columns else result.to_dict()
+    elif columns and "courses" in result:
+        data = dict(result, courses=[_to_columns(course) for course in result["courses"]])
+    elif columns and "error" not in result:
+        data = _to_columns(result)
+    else:
+        data = result
+    if compact or columns:
+        return json.dumps(data, **_COMPACT)
+    return json.dumps(data, indent=2, ensure_ascii=False)
@@ -0,0 +1,353 @@
+"""
+Índice persistente das ocorrências de cores (design tokens) em client/src.
+
+Cada ocorrência guarda arquivo, offset, o token como aparece no código
+(ex.: "#9d197d", "from-[#da1069]", "text-purple-600", "oklch(0.6 0.2 20)")
+e o contexto: "className" (classes Tailwind), "css" (arquivos .css),
+"inline-style" (objetos style={{...}}) ou "script" (demais strings TS).
+
+O índice é atualizado de forma incremental pelo mtime/tamanho dos
+arquivos e gravado compactado (tabela de tokens + offsets em delta, gzip).
+Consultas ("onde a cor X é usada") não leem a árvore, e as trocas de cor
+reescrevem só os offsets indexados, conferindo cada um antes.
+
+Uso:
+  python3 design_tokens.py update                     # atualiza o índice
+  python3 design_tokens.py where "#da1069"            # onde a cor é usada
+  python3 design_tokens.py where purple-600 --context className
+  python3 design_tokens.py recolour blue-500 "#3559AC" [--dry-run]
+  python3 design_tokens.py stats                      # cores mais usadas
+"""
+import argparse
+import bisect
+import functools
+import gzip
+import hashlib
+import json
+import os
+import re
+import sys
+
+from codemod_engine import BASE_DIR, MANIFEST_DIR, iter_source_files, write_atomic
+
+INDEX_FORMAT = 1
+INDEX_EXTENSIONS = (".tsx", ".ts", ".css")
+
+CONTEXTS = ("className", "css", "inline-style", "script")
+
+_PALETTE = (
+    "slate|gray|zinc|neutral|stone|red|orange|amber|yellow|lime|green|emerald|teal|"
+    "cyan|sky|blue|indigo|violet|purple|fuchsia|pink|rose"
+)
+_THEME = "primary|secondary|accent|muted|destructive|background|foreground"
+_UTILITIES = (
+    "bg|text|border|from|via|to|ring|shadow|fill|stroke|outline|divide|placeholder|"
+    "decoration|caret|accent"
+)
+_HEX = r"\#(?:[0-9a-fA-F]{8}|[0-9a-fA-F]{6}|[0-9a-fA-F]{3,4})"
+
+_TOKEN_RE = re.compile(rf"""
+    (?P<utility>(?<![\w-])(?:{_UTILITIES})-
+        (?:\[{_HEX}\]|(?:{_PALETTE})-\d{{2,3}}|(?:{_THEME}))
+        (?:/\d{{1,3}})?(?![\w-]))
+  | (?P<hex>(?<![\w&/]){_HEX}(?![\w-]))
+  | (?P<palette>(?<![\w-])(?:{_PALETTE})-\d{{2,3}}(?:/\d{{1,3}})?(?![\w-]))
+  | (?P<function>(?<![\w-])(?:rgba?|hsla?|oklch|oklab)\([^()]*\))
+""", re.X)
+
+_UTILITY_RE = re.compile(rf"(?P<utility>(?:{_UTILITIES}))-(?P<value>.+?)(?P<opacity>/\d{{1,3}})?$")
+_OPACITY_RE = re.compile(r"/\d{1,3}$")
+
+_STYLE_OPEN_RE = re.compile(r"style=\{\{")
+
+
+@functools.lru_cache(maxsize=4096)
+def colour_of(token):
+    """Cor normalizada de um token: "#rrggbb", "purple-600", "primary" ou a função CSS."""
+    match = _UTILITY_RE.match(token)
+    if match and not token.startswith("#"):
+        value = match.group("value")
+        if value.startswith("[") and value.endswith("]"):
+            value = value[1:-1]
+        token = value
+    else:
+        token = _OPACITY_RE.sub("", token)
+    if token.startswith("#"):
+        digits = token[1:].lower()
+        if len(digits) in (3, 4):
+            digits = "".join(c * 2 for c in digits)
+        return "#" + digits
+    if "(" in token:
+        return re.sub(r"\s+", " ", token.lower())
+    return token
+
+
+def recolour_token(token, new_colour):
+    """
+    Reescreve um token com outra cor, mantendo utilitário e opacidade.
+    Ex.: ("to-[#3b82f6]", "#3559AC") -> "to-[#3559AC]";
+         ("text-blue-500/50", "#3559AC") -> "text-[#3559AC]/50";
+         ("blue-500", "#3559AC") -> "[#3559AC]".
+    """
+    is_hex = new_colour.startswith("#")
+    match = _UTILITY_RE.match(token)
+    if match and not token.startswith("#") and "(" not in token:
+        value = f"[{new_colour}]" if is_hex else new_colour
+        return f"{match.group('utility')}-{value}{match.group('opacity') or ''}"
+    if token.startswith("#") or "(" in token:
+        return new_colour
+    # Nome da paleta solto (ex.: "blue-500"): valor arbitrário no Tailwind
+    opacity = _OPACITY_RE.search(token)
+    value = f"[{new_colour}]" if is_hex else new_colour
+    return value + (opacity.group() if opacity else "")
+
+
+def _context(filepath, text, offset, kind):
+    if filepath.endswith(".css"):
+        return "css"
+    window = text[max(0, offset - 400):offset]
+    opened = None
+    for opened in _STYLE_OPEN_RE.finditer(window):
+        pass
+    if opened is not None and "}}" not in window[opened.end():]:
+        return "inline-style"
+    if kind == "utility":
+        return "className"
+    return "script"
+
+
+def scan_text(filepath, text):
+    """Lista (offset, token, contexto) de todas as cores do texto."""
+    return [
+        (match.start(), match.group(), _context(filepath, text, match.start(), match.lastgroup))
+        for match in _TOKEN_RE.finditer(text)
+    ]
+
+
+def default_index_path(base_dir):
+    key = hashlib.sha256(os.path.abspath(base_dir).encode("utf-8")).hexdigest()[:16]
+    return os.path.join(MANIFEST_DIR, f"tokens-{key}.json.gz")
+
+
+class TokenIndex:
+    """
+    Índice de ocorrências de cores de uma árvore de fontes.
+
+    files: {caminho relativo: {"mtime", "size", "occurrences": [(offset, token, contexto)]}}
+    """
+
+    def __init__(self, base_dir=BASE_DIR, path=None):
+        self.base_dir = base_dir
+        self.path = path or default_index_path(base_dir)
+        self.files = {}
+
+    # ---------------- persistência ----------------
+
+    @classmethod
+    def load(cls, base_dir=BASE_DIR, path=None):
+        index = cls(base_dir, path)
+        try:
+            with gzip.open(index.path, "rt", encoding="utf-8") as f:
+                data = json.load(f)
+        except (FileNotFoundError, OSError, ValueError):
+            return index
+        if data.get("format") != INDEX_FORMAT:
+            return index
+        tokens = data["tokens"]
+        for relpath, (mtime, size, flat) in data["files"].items():
+            occurrences = []
+            offset = 0
+            for i in range(0, len(flat), 3):
+                offset += flat[i]
+                occurrences.append((offset, tokens[flat[i + 1]], CONTEXTS[flat[i + 2]]))
+            index.files[relpath] = {"mtime": mtime, "size": size, "occurrences": occurrences}
+        return index
+
+    def save(self):
+        tokens = {}
+        files = {}
+        for relpath, entry in self.files.items():
+            flat = []
+            previous = 0
+            for offset, token, context in entry["occurrences"]:
+                flat += [offset - previous, tokens.setdefault(token, len(tokens)), CONTEXTS.index(context)]
+                previous = offset
+            files[relpath] = [entry["mtime"], entry["size"], flat]
+        data = {"format": INDEX_FORMAT, "tokens": list(tokens), "files": files}
+        os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+        payload = json.dumps(data, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+        write_atomic(self.path, gzip.compress(payload, mtime=0))
+
+    # ---------------- atualização ----------------
+
+    def _index_file(self, relpath, st=None):
+        filepath = os.path.join(self.base_dir, relpath)
+        with open(filepath, "r", encoding="utf-8") as f:
+            text = f.read()
+        st = st or os.stat(filepath)
+        self.files[relpath] = {
+            "mtime": st.st_mtime_ns,
+            "size": st.st_size,
+            "occurrences": scan_text(filepath, text),
+        }
+
+    def update(self):
+        """Reindexa só os arquivos novos ou alterados. Retorna (reindexados, removidos)."""
+        seen = set()
+        reindexed = 0
+        for filepath in iter_source_files(self.base_dir, INDEX_EXTENSIONS):
+            relpath = os.path.relpath(filepath, self.base_dir)
+            seen.add(relpath)
+            st = os.stat(filepath)
+            entry = self.files.get(relpath)
+            if entry and entry["mtime"] == st.st_mtime_ns and entry["size"] == st.st_size:
+                continue
+            try:
+                self._index_file(relpath, st)
+            except (UnicodeDecodeError, OSError) as e:
+                print(f"Erro ao indexar {filepath}: {e}", file=sys.stderr)
+                self.files.pop(relpath, None)
+                continue
+            reindexed += 1
+        removed = [relpath for relpath in self.files if relpath not in seen]
+        for relpath in removed:
+            del self.files[relpath]
+        return reindexed, len(removed)
+
+    # ---------------- consultas ----------------
+
+    def where(self, colour=None, token=None, context=None):
+        """Ocorrências (arquivo, offset, token, contexto) filtradas por cor, token e/ou contexto."""
+        wanted = colour_of(colour) if colour else None
+        for relpath in sorted(self.files):
+            for offset, occ_token, occ_context in self.files[relpath]["occurrences"]:
+                if token is not None and occ_token != token:
+                    continue
+                if wanted is not None and colour_of(occ_token) != wanted:
+                    continue
+                if context is not None and occ_context != context:
+                    continue
+                yield relpath, offset, occ_token, occ_context
+
+    def colour_counts(self):
+        counts = {}
+        for entry in self.files.values():
+            for _, token, _ in entry["occurrences"]:
+                colour = colour_of(token)
+                counts[colour] = counts.get(colour, 0) + 1
+        return counts
+
+    # ---------------- reescrita ----------------
+
+    def patch(self, edits):
+        """
+        Aplica edits = [(arquivo, offset, token_antigo, token_novo)] tocando
+        só esses offsets. Arquivos alterados desde a indexação são
+        reindexados e a edição é pulada se o token não estiver mais lá.
+        Retorna {arquivo: edições aplicadas}.
+        """
+        by_file = {}
+        for relpath, offset, old, new in edits:
+            by_file.setdefault(relpath, []).append((offset, old, new))
+
+        applied = {}
+        for relpath, file_edits in by_file.items():
+            filepath = os.path.join(self.base_dir, relpath)
+            with open(filepath, "r", encoding="utf-8") as f:
+                text = f.read()
+            parts = []
+            end = len(text)
+            count = 0
+            for offset, old, new in sorted(file_edits, reverse=True):
+                if offset + len(old) > end or text[offset:offset + len(old)] != old:
+                    continue
+                parts.append(text[offset + len(old):end])
+                parts.append(new)
+                end = offset
+                count += 1
+            if count:
+                parts.append(text[:end])
+                write_atomic(filepath, "".join(reversed(parts)).encode("utf-8"))
+                applied[relpath] = count
+            self._index_file(relpath)
+        return applied
+
+    def recolour(self, old_colour, new_colour, context=None, dry_run=False):
+        """Troca todas as ocorrências de old_colour por new_colour. Retorna as edições."""
+        edits = [
+            (relpath, offset, token, recolour_token(token, new_colour))
+            for relpath, offset, token, _ in self.where(colour=old_colour, context=context)
+        ]
+        if not dry_run:
+            self.patch(edits)
+        return edits
+
+    def locate(self, relpath, offsets):
+        """Converte offsets de um arquivo em (linha, coluna), ambos a partir de 1."""
+        with open(os.path.join(self.base_dir, relpath), "r", encoding="utf-8") as f:
+            text = f.read()
+        newlines = [i for i, char in enumerate(text) if char == "\n"]
+        positions = []
+        for offset in offsets:
+            line = bisect.bisect_left(newlines, offset)
+            start = newlines[line - 1] + 1 if line else 0
+            positions.append((line + 1, offset - start + 1))
+        return positions
+
+
+def _print_occurrences(index, occurrences):
+    by_file = {}
+    for relpath, offset, token, context in occurrences:
+        by_file.setdefault(relpath, []).append((offset, token, context))
+    for relpath, items in by_file.items():
+        positions = index.locate(relpath, [offset for offset, _, _ in items])
+        for (line, column), (_, token, context) in zip(positions, items):
+            print(f"{relpath}:{line}:{column}\t{token}\t{context}")
+    return sum(len(items) for items in by_file.values())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Índice de ocorrências de cores do client/src.")
+    parser.add_argument("--root", default=BASE_DIR, help="diretório dos fontes do cliente")
+    parser.add_argument("--index", help="arquivo do índice (padrão: em $CODEMOD_MANIFEST_DIR ou ~/.cache/codemods)")
+    commands = parser.add_subparsers(dest="command", required=True)
+    commands.add_parser("update", help="atualiza o índice")
+    where = commands.add_parser("where", help="lista onde uma cor é usada")
+    where.add_argument("colour", help='cor ou token (ex.: "#da1069", purple-600, primary)')
+    where.add_argument("--context", choices=CONTEXTS)
+    recolour = commands.add_parser("recolour", help="troca uma cor por outra nos offsets indexados")
+    recolour.add_argument("old")
+    recolour.add_argument("new")
+    recolour.add_argument("--context", choices=CONTEXTS)
+    recolour.add_argument("--dry-run", action="store_true", help="só mostra o que seria trocado")
+    stats = commands.add_parser("stats", help="cores mais usadas")
+    stats.add_argument("--top", type=int, default=20)
+    args = parser.parse_args(argv)
+
+    index = TokenIndex.load(args.root, args.index)
+    reindexed, removed = index.update()
+
+    if args.command == "update":
+        total = sum(len(entry["occurrences"]) for entry in index.files.values())
+        print(f"{len(index.files)} arquivo(s), {total} ocorrência(s); "
+              f"{reindexed} reindexado(s), {removed} removido(s)")
+    elif args.command == "where":
+        found = _print_occurrences(index, index.where(colour=args.colour, context=args.context))
+        print(f"{found} ocorrência(s)", file=sys.stderr)
+    elif args.command == "recolour":
+        edits = index.recolour(args.old, args.new, args.context, args.dry_run)
+        for relpath, offset, old, new in edits:
+            print(f"{relpath}@{offset}\t{old} -> {new}")
+        verb = "seriam trocada(s)" if args.dry_run else "trocada(s)"
+        print(f"{len(edits)} ocorrência(s) {verb}", file=sys.stderr)
+    elif args.command == "stats":
+        counts = sorted(index.colour_counts().items(), key=lambda item: (-item[1], item[0]))
+        for colour, count in counts[:args.top]:
+            print(f"{count:6d}  {colour}")
+
+    if reindexed or removed or args.command == "recolour":
+        index.save()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,9 +2,197 @@ import PyPDF2
 import re
 import json
 import sys
+import os
+import signal
+import argparse
+import threading
+import socketserver
+import contextlib
+import io
+import time
+import math
+import resource
+import base64
+import binascii
+import traceback
+import unicodedata
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
+from curriculum_cache import CurriculumCache
+from curriculum_model import Curriculum, CurriculumError, Subject, dumps
+import mysql_pool
+from extract_pdf_text import BACKENDS, DEFAULT_BACKEND, iter_page_texts
 
-def extract_curriculum_from_pdf(pdf_path):
+# Versão do parser. Incremente sempre que a saída de
+# extract_curriculum_from_pdf mudar: invalida o cache de resultados.
+PARSER_VERSION = 4
+
+DEFAULT_CACHE_DIR = os.environ.get("CURRICULUM_CACHE_DIR")
+
+# Quantas páginas iniciais são usadas para detectar o nome do curso
+COURSE_NAME_PAGES = 3
+
+# Tempo máximo (segundos) para ler e analisar um PDF; 0 desliga. Estourado
+# o prazo, a extração devolve o que achou até ali, marcado como parcial.
+DEFAULT_TIME_BUDGET = float(os.environ.get("CURRICULUM_TIME_BUDGET", "30"))
+
+# De quantas em quantas linhas o prazo é conferido
+_BUDGET_CHECK_LINES = 64
+
+
+# ============================================================
+# LIMITES DE RECURSOS
+# ============================================================
+# Um PDF enorme (ou malformado de propósito) não pode tomar a CPU e a
+# memória do servidor do site. Além do time_budget (que devolve a grade
+# parcial), a extração tem limites rígidos; ao atingir um deles o resultado
+# é {"error": ..., "code": ...}, para o chamador distinguir "grande demais"
+# de "nenhuma disciplina". Códigos:
+#   too_large, too_many_pages, timeout, memory  -> limites de recursos
+#   not_found, invalid_pdf, no_text, no_subjects -> problemas do documento
+#   invalid_request                              -> requisição/argumentos inválidos
+#   internal, load_failed                        -> falha do extrator / ao gravar no banco
+#
+# O limite de memória (RLIMIT_AS) vale para o processo inteiro: é aplicado
+# no modo de arquivo único e nos workers do servidor/lote, nunca no
+# processo principal do servidor.
+
+MAX_PDF_BYTES = int(float(os.environ.get("CURRICULUM_MAX_MB", "50")) * 1024 * 1024)
+MAX_PAGES = int(os.environ.get("CURRICULUM_MAX_PAGES", "500"))
+# Prazo rígido (segundos) de uma extração; 0 desliga
+DEADLINE = float(os.environ.get("CURRICULUM_DEADLINE", "60"))
+MAX_MEMORY_MB = int(os.environ.get("CURRICULUM_MAX_MEMORY_MB", "1024"))
+
+
+class ResourceLimitError(Exception):
+    """Limite de recursos atingido; code vai no campo "code" do erro."""
+
+    def __init__(self, code, message):
+        super().__init__(message)
+        self.code = code
+
+    def result(self):
+        return _error(self.code, str(self))
+
+
+def _error(code, message):
+    return {"error": message, "code": code}
+
+
+# Erros de leitura do PyPDF2 (arquivo corrompido, truncado, cifrado...): só
+# estes viram "invalid_pdf"; qualquer outra exceção é bug e sai como "internal"
+PDF_READ_ERRORS = (PyPDF2.errors.PyPdfError, PyPDF2.errors.ParseError)
+
+
+def limit_memory(max_memory_mb=MAX_MEMORY_MB):
+    """Limita o espaço de endereçamento deste processo (RLIMIT_AS); 0 desliga."""
+    if max_memory_mb:
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        limit = max_memory_mb * 1024 * 1024
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_AS, (limit, hard))
+
+
+def limit_cpu(seconds):
+    """
+    Limita o tempo de CPU deste processo (RLIMIT_CPU): garantia final, para
+    quando o prazo rígido não consegue interromper (código em C). Só para
+    processos de uma extração só; o kernel encerra o processo com SIGXCPU.
+    """
+    if seconds:
+        _, hard = resource.getrlimit(resource.RLIMIT_CPU)
+        used = resource.getrusage(resource.RUSAGE_SELF).ru_utime + resource.getrusage(resource.RUSAGE_SELF).ru_stime
+        limit = int(used + math.ceil(seconds)) + 5
+        if hard != resource.RLIM_INFINITY:
+            limit = min(limit, hard)
+        resource.setrlimit(resource.RLIMIT_CPU, (limit, hard))
+
+
+def _deadline_expired(signum, frame):
+    raise ResourceLimitError("timeout", "Tempo limite da extração excedido.")
+
+
+@contextlib.contextmanager
+def hard_deadline(seconds=DEADLINE):
+    """
+    Interrompe o bloco com ResourceLimitError("timeout") após seconds
+    (SIGALRM). Só funciona na thread principal; fora dela não faz nada.
+    """
+    if not seconds or threading.current_thread() is not threading.main_thread():
+        yield
+        return
+    previous = signal.signal(signal.SIGALRM, _deadline_expired)
+    signal.setitimer(signal.ITIMER_REAL, seconds)
+    try:
+        yield
+    finally:
+        signal.setitimer(signal.ITIMER_REAL, 0)
+        signal.signal(signal.SIGALRM, previous)
+
+
+def run_limited(func, *args, deadline=DEADLINE, **kwargs):
+    """
+    Executa uma extração sob o prazo rígido; limites atingidos viram erro
+    com "code", e uma exceção inesperada vira "internal" (traceback no stderr).
+    """
+    try:
+        with hard_deadline(deadline):
+            return func(*args, **kwargs)
+    except ResourceLimitError as e:
+        return e.result()
+    except MemoryError:
+        return _error("memory", "Memória insuficiente para processar o PDF.")
+    except Exception as e:
+        traceback.print_exc()
+        return _error("internal", f"Erro interno ao processar o PDF: {e}")
+
+
+def _check_size(source, max_bytes):
+    if not max_bytes:
+        return
+    if isinstance(source, io.BytesIO):
+        size = source.getbuffer().nbytes
+    elif hasattr(source, "read"):
+        return
+    else:
+        size = os.path.getsize(source)
+    if size > max_bytes:
+        raise ResourceLimitError("too_large", f"O PDF tem {size / 1048576:.1f} MB; o limite é "
+                                              f"{max_bytes / 1048576:g} MB.")
+
+
+def _check_pages(reader, max_pages):
+    if max_pages and len(reader.pages) > max_pages:
+        raise ResourceLimitError("too_many_pages", f"O PDF tem {len(reader.pages)} páginas; "
+                                                   f"o limite é {max_pages}.")
+
+
+def check_limits(source, max_bytes=None, max_pages=None):
+    """
+    Aplica os limites de tamanho e de páginas (padrão: MAX_PDF_BYTES/
+    MAX_PAGES) sem ler o conteúdo das páginas: o tamanho vem do stat e as
+    páginas, da árvore de páginas. Lança ResourceLimitError, os erros de
+    PDF_READ_ERRORS ou FileNotFoundError.
+    """
+    _check_size(source, MAX_PDF_BYTES if max_bytes is None else max_bytes)
+    max_pages = MAX_PAGES if max_pages is None else max_pages
+    if max_pages:
+        with _open_pdf(source) as file:
+            _check_pages(PyPDF2.PdfReader(file), max_pages)
+            if hasattr(file, "seek"):
+                file.seek(0)
+
+
+def _open_pdf(source):
+    """Aceita um caminho ou um arquivo já aberto (ex.: io.BytesIO)."""
+    if hasattr(source, "read"):
+        return contextlib.nullcontext(source)
+    return open(source, "rb")
+
+
+def extract_curriculum_from_pdf(pdf_path, page_workers=1, timings=False, backend=DEFAULT_BACKEND,
+                                time_budget=None, max_pages=None, max_bytes=None):
     """
     Extrai a grade curricular (disciplinas, carga horária, etc.) de PDFs
     de cursos da LA Educação.
@@ -27,57 +215,184 @@ def extract_curriculum_from_pdf(pdf_path):
       Disciplinas agrupadas por "SEMESTRE X" ou "PERÍODO X".
     
     O script tenta todos os formatos e retorna o que encontrar mais resultados.
+
+    Com page_workers > 1, o texto das páginas de PDFs grandes é extraído em
+    paralelo por um pool de processos (o resultado é o mesmo).
+
+    backend escolhe a extração de texto das páginas (veja
+    extract_pdf_text.BACKENDS); o padrão ("full") é o extract_text() do
+    PyPDF2. "fast" lê direto o content stream (com fallback para o "full"
+    nas páginas que não entende), e "auto" só o usa num PDF quando as
+    primeiras páginas saem idênticas às do "full".
+
+    Com timings=True o resultado ganha um objeto "timings" com a duração de
+    cada etapa (abrir, extrair, cada formato, nome do curso, deduplicação),
+    e a duração e o número de linhas de cada página. Desligado, não há
+    nenhuma medição no caminho de execução.
+
+    time_budget (segundos; padrão DEFAULT_TIME_BUDGET, 0 desliga) limita a
+    leitura e a análise: ao estourar, a leitura para e o resultado traz só
+    as disciplinas achadas até ali, com "partial": true e um "warning"
+    dizendo quantas páginas foram lidas. Sem nenhuma disciplina, é erro.
+
+    PDFs acima de max_bytes ou max_pages (padrão: MAX_PDF_BYTES/MAX_PAGES,
+    0 desliga) são recusados antes da leitura das páginas. Todo erro vem
+    com um "code" (veja LIMITES DE RECURSOS).
     """
-    text = ""
+    # ============================================================
+    # LER E ANALISAR PÁGINA A PÁGINA
+    # ============================================================
+    # As páginas são analisadas conforme são extraídas; a leitura para
+    # quando a grade termina (ex.: "CARGA HORÁRIA TOTAL"), sem extrair o
+    # resto do documento. O nome do curso só é procurado nas primeiras
+    # páginas.
+    if timings:
+        stages = {}
+        pages = []
+        parser = TimedCurriculumLineParser()
+        started = previous = time.perf_counter()
+    else:
+        parser = CurriculumLineParser()
+    if time_budget is None:
+        time_budget = DEFAULT_TIME_BUDGET
+    if max_pages is None:
+        max_pages = MAX_PAGES
+    if max_bytes is None:
+        max_bytes = MAX_PDF_BYTES
+    deadline = time.monotonic() + time_budget if time_budget > 0 else None
+    timed_out = False
+    pages_read = 0
+    head_pages = []
+    has_text = False
     try:
-        with open(pdf_path, "rb") as file:
+        _check_size(pdf_path, max_bytes)
+        with _open_pdf(pdf_path) as file:
             reader = PyPDF2.PdfReader(file)
-            for page_num in range(len(reader.pages)):
-                page = reader.pages[page_num]
-                page_text = page.extract_text()
-                if page_text:
-                    text += page_text + "\n"
+            _check_pages(reader, max_pages)
+            if timings:
+                previous = time.perf_counter()
+                stages["openMs"] = _ms(previous - started)
+            source = None
+            if page_workers > 1:
+                source = file.getvalue() if isinstance(file, io.BytesIO) else pdf_path
+            for page_num, page_text in enumerate(iter_page_texts(reader, source, page_workers, backend)):
+                if deadline is not None and time.monotonic() > deadline:
+                    timed_out = True
+                    break
+                if timings:
+                    extracted = time.perf_counter()
+                lines = page_text.split("\n") if page_text else ()
+                if lines:
+                    if page_num < COURSE_NAME_PAGES:
+                        head_pages.append(page_text + "\n")
+                    if not has_text and page_text.strip():
+                        has_text = True
+                    if deadline is None:
+                        for raw_line in lines:
+                            parser.feed(raw_line)
+                    else:
+                        timed_out = not _feed_until(parser, lines, deadline)
+                pages_read = page_num + 1
+                if timings:
+                    now = time.perf_counter()
+                    pages.append({
+                        "page": page_num + 1,
+                        "extractMs": _ms(extracted - previous),
+                        "parseMs": _ms(now - extracted),
+                        "lines": len(lines),
+                    })
+                    previous = now
+                if parser.finished or timed_out:
+                    break
     except FileNotFoundError:
-        return {"error": f"Erro: O arquivo {pdf_path} não foi encontrado."}
-    except Exception as e:
-        return {"error": f"Erro ao ler o PDF: {e}"}
+        return _error("not_found", f"Erro: O arquivo {pdf_path} não foi encontrado.")
+    except ResourceLimitError as e:
+        return e.result()
+    except MemoryError:
+        return _error("memory", "Memória insuficiente para processar o PDF.")
+    except PDF_READ_ERRORS as e:
+        return _error("invalid_pdf", f"Erro ao ler o PDF: {e}")
 
-    if not text.strip():
-        return {"error": "Não foi possível extrair texto do PDF. O arquivo pode estar escaneado ou protegido."}
+    if timings:
+        stages["extractMs"] = _ms(sum(p["extractMs"] for p in pages) / 1000)
+        stages["parseMs"] = _ms(sum(p["parseMs"] for p in pages) / 1000)
+        stages["formats"] = {name: _ms(seconds) for name, seconds in parser.format_seconds.items()}
+        stages["backend"] = backend
+        stages["pagesRead"] = len(pages)
+        stages["pagesTotal"] = len(reader.pages)
+        stages["lines"] = sum(p["lines"] for p in pages)
 
-    # ============================================================
-    # EXTRAIR NOME DO CURSO
-    # ============================================================
-    course_name = extract_course_name(text)
+    if timed_out and not parser.results():
+        result = _error("timeout", f"Tempo limite de {time_budget:g}s excedido antes de encontrar alguma "
+                                   f"disciplina (lidas {pages_read} de {len(reader.pages)} página(s)).")
+    elif not has_text:
+        result = _error("no_text", "Não foi possível extrair texto do PDF. O arquivo pode estar escaneado ou protegido.")
+    else:
+        # ============================================================
+        # EXTRAIR NOME DO CURSO
+        # ============================================================
+        if timings:
+            mark = time.perf_counter()
+        course_name = extract_course_name("".join(head_pages))
+        if timings:
+            stages["courseNameMs"] = _ms(time.perf_counter() - mark)
 
-    # ============================================================
-    # TENTAR TODOS OS FORMATOS E USAR O MELHOR RESULTADO
-    # ============================================================
-    results = []
+        # ============================================================
+        # USAR O MELHOR RESULTADO ENTRE OS FORMATOS
+        # ============================================================
+        result = build_curriculum(course_name, parser.results(), stages if timings else None)
+        if timed_out:
+            result["partial"] = True
+            result["warning"] = (f"Tempo limite de {time_budget:g}s excedido: grade parcial, "
+                                 f"lidas {pages_read} de {len(reader.pages)} página(s).")
+
+    if timings:
+        stages["totalMs"] = _ms(time.perf_counter() - started)
+        stages["pages"] = pages
+        result["timings"] = stages
+    return result
+
+
+def _feed_until(parser, lines, deadline):
+    """Alimenta o parser com as linhas; False se o prazo acabar no meio."""
+    for start in range(0, len(lines), _BUDGET_CHECK_LINES):
+        if time.monotonic() > deadline:
+            return False
+        for raw_line in lines[start:start + _BUDGET_CHECK_LINES]:
+            parser.feed(raw_line)
+    return True
 
-    # Formato A: Tabela inline (disciplina + carga na mesma linha)
-    subjects_a = try_format_inline_table(text)
-    if subjects_a:
-        results.append(("inline", subjects_a))
 
-    # Formato B: Tabela alternada (disciplina numa linha, carga na próxima)
-    subjects_b = try_format_alternating_lines(text)
-    if subjects_b:
-        results.append(("alternating", subjects_b))
+def _ms(seconds):
+    return round(seconds * 1000, 3)
 
-    # Formato C: Com semestres/períodos explícitos
-    subjects_c = try_format_semesters(text)
-    if subjects_c:
-        results.append(("semesters", subjects_c))
 
-    # Escolher o resultado com mais disciplinas
+def _cacheable(result):
+    """Só resultados completos e sem erro vão para o cache (sem timings)."""
+    if "error" in result or result.get("partial"):
+        return None
+    return {k: v for k, v in result.items() if k != "timings"}
+
+
+def build_curriculum(course_name, results, timings=None):
+    """
+    Monta o resultado final a partir de (formato, disciplinas) de cada
+    formato que encontrou algo: escolhe o que tiver mais disciplinas.
+    Se timings (dict) for informado, registra a duração da deduplicação.
+    """
     if not results:
-        return {"error": "Nenhuma disciplina foi encontrada no PDF. Verifique se o documento contém uma grade curricular válida."}
+        return _error("no_subjects", "Nenhuma disciplina foi encontrada no PDF. Verifique se o documento contém "
+                                     "uma grade curricular válida.")
 
     best_format, best_subjects = max(results, key=lambda x: len(x[1]))
 
     # Filtrar disciplinas duplicadas
+    if timings is not None:
+        mark = time.perf_counter()
     unique_subjects = deduplicate_subjects(best_subjects)
+    if timings is not None:
+        timings["deduplicateMs"] = _ms(time.perf_counter() - mark)
+        timings["format"] = best_format
 
     # Calcular total de semestres/módulos
     total_semesters = max((s["semester"] for s in unique_subjects), default=1)
@@ -89,75 +404,333 @@ def extract_curriculum_from_pdf(pdf_path):
     }
 
 
-def extract_course_name(text):
-    """Tenta extrair o nome do curso do texto do PDF."""
-    
-    # Padrão: "TÉCNICO EM XXX" ou "CURSO DE XXX" no início
-    patterns = [
+def extract(source, page_workers=1, backend=DEFAULT_BACKEND, cache=None, timings=False, time_budget=None):
+    """
+    API de biblioteca: extrai a grade de um PDF (caminho ou arquivo aberto)
+    e devolve um Curriculum (disciplinas como Subject, com __slots__).
+    Levanta CurriculumError quando não há grade no PDF. Se time_budget
+    (veja extract_curriculum_from_pdf) cortar a leitura, o Curriculum vem
+    com partial=True e o motivo em warning.
+    """
+    if cache is not None and not hasattr(source, "read"):
+        result = extract_curriculum_cached(source, cache, page_workers, timings, backend, time_budget)
+    else:
+        result = extract_curriculum_from_pdf(source, page_workers, timings, backend, time_budget)
+    return Curriculum.from_dict(result)
+
+
+def extract_curriculum_cached(pdf_path, cache, page_workers=1, timings=False, backend=DEFAULT_BACKEND,
+                              time_budget=None, max_pages=None, max_bytes=None):
+    """
+    Igual a extract_curriculum_from_pdf, mas consulta o cache pelo conteúdo
+    do arquivo antes de processar. Só resultados completos e sem erro são
+    gravados.
+    """
+    try:
+        _check_size(pdf_path, MAX_PDF_BYTES if max_bytes is None else max_bytes)
+        with open(pdf_path, "rb") as file:
+            data = file.read()
+    except FileNotFoundError:
+        return _error("not_found", f"Erro: O arquivo {pdf_path} não foi encontrado.")
+    except ResourceLimitError as e:
+        return e.result()
+
+    return extract_curriculum_from_bytes(data, cache, page_workers, timings, backend, time_budget,
+                                         max_pages, max_bytes)
+
+
+def cache_variant(backend=DEFAULT_BACKEND, max_pages=None, max_bytes=None):
+    """
+    Parte da chave do cache além do conteúdo do PDF: o backend e os limites
+    com que o resultado foi produzido (um resultado obtido com limites mais
+    folgados não pode ser servido sob limites mais apertados).
+    """
+    max_pages = MAX_PAGES if max_pages is None else max_pages
+    max_bytes = MAX_PDF_BYTES if max_bytes is None else max_bytes
+    return f"{backend}:{max_pages}:{max_bytes}"
+
+
+def extract_curriculum_from_bytes(data, cache=None, page_workers=1, timings=False, backend=DEFAULT_BACKEND,
+                                  time_budget=None, max_pages=None, max_bytes=None):
+    """
+    Extrai a grade de um PDF já em memória, consultando o cache se houver
+    (veja cache_variant). As medições de timings e os resultados parciais
+    nunca vão para o cache.
+    """
+    variant = cache_variant(backend, max_pages, max_bytes)
+    result = cache.get(data, variant) if cache is not None else None
+    if result is None:
+        result = extract_curriculum_from_pdf(io.BytesIO(data), page_workers, timings, backend, time_budget,
+                                             max_pages, max_bytes)
+        cacheable = _cacheable(result) if cache is not None else None
+        if cacheable is not None:
+            cache.put(data, cacheable, variant)
+    return result
+
+
+def select_backend(pdf_path, backends=None, repeat=1):
+    """
+    Extrai o PDF com cada backend e escolhe o mais rápido que produz as
+    mesmas disciplinas que o "full" (a extração completa, usada como
+    referência). Retorna {"backend": nome, "backends": {nome: {"ms",
+    "sameSubjects"}}}.
+    """
+    try:
+        with _open_pdf(pdf_path) as file:
+            data = file.read()
+    except FileNotFoundError:
+        return _error("not_found", f"Erro: O arquivo {pdf_path} não foi encontrado.")
+
+    names = list(backends or BACKENDS)
+    if "full" not in names:
+        names.append("full")
+    measured = {}
+    for name in names:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = extract_curriculum_from_pdf(io.BytesIO(data), backend=name)
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+        measured[name] = (best, result)
+
+    reference = measured["full"][1]
+    report = {}
+    for name, (seconds, result) in measured.items():
+        same = result.get("subjects") == reference.get("subjects") and result.get("error") == reference.get("error")
+        report[name] = {"ms": _ms(seconds), "sameSubjects": same}
+    chosen = min((name for name in report if report[name]["sameSubjects"]), key=lambda name: report[name]["ms"])
+    return {"backend": chosen, "backends": report}
+
+
+def read_pdf_stream(stream, encoding="raw", chunk_size=64 * 1024, max_bytes=None):
+    """
+    Lê o PDF de um stream binário (ex.: sys.stdin.buffer) para a memória.
+
+    Com encoding="base64" o conteúdo é decodificado em blocos conforme
+    chega, ignorando quebras de linha, sem montar a string base64 inteira.
+    Lança ValueError se o base64 for inválido e ResourceLimitError
+    ("too_large") assim que passar de max_bytes (padrão: MAX_PDF_BYTES).
+    """
+    if max_bytes is None:
+        max_bytes = MAX_PDF_BYTES
+    buffer = io.BytesIO()
+
+    def check_size():
+        if max_bytes and buffer.tell() > max_bytes:
+            raise ResourceLimitError("too_large", f"O PDF passa do limite de {max_bytes / 1048576:g} MB.")
+
+    if encoding != "base64":
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            buffer.write(chunk)
+            check_size()
+        return buffer.getvalue()
+
+    pending = b""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        chunk = pending + b"".join(chunk.split())
+        # Só decodifica múltiplos de 4 caracteres; o resto espera o próximo bloco
+        cut = len(chunk) - len(chunk) % 4
+        try:
+            buffer.write(base64.b64decode(chunk[:cut], validate=True))
+        except binascii.Error as e:
+            raise ValueError(f"PDF em base64 inválido: {e}")
+        check_size()
+        pending = chunk[cut:]
+    if pending:
+        raise ValueError("PDF em base64 inválido: conteúdo truncado.")
+    return buffer.getvalue()
+
+
+# Padrão: "TÉCNICO EM XXX" ou "CURSO DE XXX" no início
+_COURSE_NAME_RES = [
+    re.compile(pattern, re.IGNORECASE) for pattern in (
         r"(TÉCNICO\s+EM\s+[A-ZÀ-Ú\s]+?)(?:\n|ESTRUTURA|MÓDULO|Um curso)",
         r"(TECNÓLOGO\s+EM\s+[A-ZÀ-Ú\s]+?)(?:\n|ESTRUTURA|MÓDULO|Um curso)",
         r"(BACHARELADO\s+EM\s+[A-ZÀ-Ú\s]+?)(?:\n|ESTRUTURA|MÓDULO|Um curso)",
         r"(LICENCIATURA\s+EM\s+[A-ZÀ-Ú\s]+?)(?:\n|ESTRUTURA|MÓDULO|Um curso)",
         r"PROJETO\s+([\w\s]+?)(?:\n|PREMIUM|FOMENTANDO)",
         r"Curso\s+(?:de|em)\s+([\w\s-]+?)(?:\n\n|\nSEMESTRE|\nMÓDULO|\nPERÍODO)",
-    ]
-    
-    for pattern in patterns:
-        match = re.search(pattern, text, re.IGNORECASE)
+    )
+]
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+def extract_course_name(text):
+    """Tenta extrair o nome do curso do texto do PDF."""
+    for pattern in _COURSE_NAME_RES:
+        match = pattern.search(text)
         if match:
             name = match.group(1).strip()
             # Limpar espaços extras
-            name = re.sub(r'\s+', ' ', name)
-            return name
-    
+            return _WHITESPACE_RE.sub(' ', name)
+
     return "Curso Não Identificado"
 
 
+# ============================================================
+# CLASSIFICAÇÃO DE LINHAS
+# ============================================================
+# Todos os padrões são compilados uma única vez. O texto é percorrido em
+# uma só passagem (CurriculumLineParser) que alimenta os três formatos ao
+# mesmo tempo; as funções try_format_* continuam disponíveis para rodar um
+# formato isolado.
+
+# Palavras que são ruído APENAS quando são exatamente iguais
+_EXACT_NOISE = frozenset([
+    "DISCIPLINAS", "DISCIPLINA", "CARGA", "CARGA HORÁRIA", "CARGA HORARIA",
+    "QDE DE", "HORÁRIA", "HORARIA", "PROVAS", "AULAS",
+    "MÓDULO", "MODULO", "SEMESTRE", "PERÍODO", "PERIODO",
+    "ESTRUTURA CURRICULAR", "ESTRUTURA", "CURRICULAR",
+    "PLANO DE ESTUDOS", "AVALIAÇÃO", "AVALIACAO", "CERTIFICAÇÃO",
+    "PRAZO", "HORAS", "CADA DISCIPLINA",
+    "FORMAÇÃO", "CERTIFICADO", "BIBLIOTECA",
+])
+
+# Palavras que são ruído quando o texto COMEÇA com elas
+_STARTSWITH_NOISE = (
+    "CARGA HORARIA TOTAL", "CARGA HORÁRIA TOTAL", "TOTAL DO CURSO",
+    "CARGA HOR",
+)
+
+# Apenas um número, opcionalmente seguido de "h"/"horas" (ex.: "3", "800 HORAS")
+# (o texto já chega sem espaços nas pontas: sem \s* antes do $, que era
+# quadrático em "1" + milhares de espaços + "x")
+_NUMBER_NOISE_RE = re.compile(r'^\d+\s*(h|horas?)?$', re.IGNORECASE)
+
+# Formato A
+_TABLE_START_RE = re.compile(r'^DISCIPLINAS?', re.IGNORECASE)
+_TABLE_END_RE = re.compile(
+    r"^(AVALIA[CÇ][AÃ]O|CERTIFICA[CÇ][AÃ]O|CADA DISCIPLINA|CARGA HOR[AÁ]RIA TOTAL|CARGA HORARIA TOTAL)",
+    re.IGNORECASE
+)
+
+# Formato B
+# Números (carga, módulo, semestre) têm no máximo 18 dígitos: int() de
+# milhares de dígitos é lento e, acima de 4300, o Python o recusa
+_MODULE_RE = re.compile(r"(MÓDULO|MODULO)\s*(\d{1,18})(?!\d)", re.IGNORECASE)
+_STRUCTURE_RE = re.compile(r"ESTRUTURA\s+CURRICULAR", re.IGNORECASE)
+_CURRICULUM_END_RE = re.compile(r"^(CARGA\s+HOR[AÁ]RIA\s+TOTAL|CARGA\s+HORARIA\s+TOTAL)", re.IGNORECASE)
+_SUBJECT_START_RE = re.compile(r'^[A-ZÀ-Úa-zà-ú]')
+_WORKLOAD_LINE_RE = re.compile(r'^(\d{1,18})\s*h?$', re.IGNORECASE)  # linha já sem espaços nas pontas
+
+# Formato C
+_SEMESTER_KEYWORD_RE = re.compile(r"SEMESTRE|PERÍODO|PERIODO", re.IGNORECASE)
+_SEMESTER_NUMBER_AFTER_RE = re.compile(r"\s*(\d{1,18}(?!\d))?")
+_ORDINAL_MARKS = "ºª°"
+
+
+# ============================================================
+# TOKENIZADOR DE LINHAS (tempo linear)
+# ============================================================
+# As linhas de disciplina eram reconhecidas com padrões preguiçosos como
+# ^([A-ZÀ-Úa-zà-ú][A-ZÀ-Úa-zà-ú\s\-\.]+?)\s+(\d+)h, que num PDF extraído
+# como uma linha enorme sem quebras (ex.: milhares de espaços sem a carga
+# horária no fim) fazem backtracking quadrático. As funções abaixo dão o
+# mesmo resultado desses padrões, mas em tempo linear: o nome é lido de uma
+# vez com uma classe gulosa (sem backtracking) e os pontos onde o nome pode
+# terminar (antes de espaços, de um traço) são testados cada um uma única
+# vez com padrões ancorados curtos.
+#
+# Todas recebem a linha já normalizada com strip().
+
+# Formato A: nome + "XXXh", opcionalmente seguido de aulas e provas
+_INLINE_NAME_RE = re.compile(r"[A-ZÀ-Úa-zà-ú][A-ZÀ-Úa-zà-ú\s\-\.]*")
+_INLINE_4COL_TAIL_RE = re.compile(r"(\d{1,18})h\s+(\d{1,18})\s+(\d{1,18})(?!\d)")
+_INLINE_2COL_TAIL_RE = re.compile(r"(\d{1,18})h")
+
+# Formato C: "Nome da Disciplina - XXh" ou "Nome XXXh"
+_SEMESTER_NAME_START_RE = re.compile(r"[A-ZÀ-Úa-zà-ú]", re.IGNORECASE)
+_SEMESTER_NAME_RE = re.compile(r"[\w\s.,-]*")
+# O nome só pode terminar na posição 2 ou no início de um trecho de espaços
+# (nunca no meio dele): cada trecho é percorrido uma vez só.
+_NAME_CUT = r"(?:(?<=^..)|(?<!\s))"
+_DASH_TAIL_RE = re.compile(_NAME_CUT + r"\s*[-–]\s*(\d{1,18})\s*h", re.IGNORECASE)
+_SPACES_TAIL_RE = re.compile(_NAME_CUT + r"\s+(\d{1,18})\s*h", re.IGNORECASE)
+
+
+def match_inline_subject(line):
+    """
+    Disciplina do formato A: (nome, carga, aulas, provas), com aulas e
+    provas None na forma de 2 colunas, ou None se a linha não for uma.
+    """
+    name = _INLINE_NAME_RE.match(line)
+    if name is None:
+        return None
+    end = name.end()
+    # Os números só podem vir logo depois do trecho de espaços que fecha o
+    # nome; o nome (com ao menos 2 caracteres) termina no início dele.
+    cut = max(len(line[:end].rstrip()), 2)
+    if cut >= end:
+        return None
+    tail = _INLINE_4COL_TAIL_RE.match(line, end)
+    if tail:
+        return line[:cut], int(tail.group(1)), int(tail.group(2)), int(tail.group(3))
+    tail = _INLINE_2COL_TAIL_RE.match(line, end)
+    if tail:
+        return line[:cut], int(tail.group(1)), None, None
+    return None
+
+
+def match_semester_subject(line):
+    """Disciplina do formato C: (nome, carga) ou None."""
+    if len(line) < 2 or not _SEMESTER_NAME_START_RE.match(line):
+        return None
+    end = _SEMESTER_NAME_RE.match(line, 1).end()
+    # "Nome - XXh" tem precedência sobre "Nome XXh"; o nome vai até o
+    # primeiro ponto em que a carga horária casa
+    for pattern in (_DASH_TAIL_RE, _SPACES_TAIL_RE):
+        tail = pattern.search(line, 2)
+        if tail and tail.start() <= end:
+            return line[:tail.start()], int(tail.group(1))
+    return None
+
+
+def find_semester_heading(line):
+    """
+    Cabeçalho de semestre/período ("1º SEMESTRE", "PERÍODO 3", "SEMESTRE"):
+    (número antes, número depois), cada um str ou None; None se não houver.
+    """
+    keyword = _SEMESTER_KEYWORD_RE.search(line)
+    if keyword is None:
+        return None
+    # Número antes: dígitos, um º/ª/° opcional e espaços colados à palavra
+    pos = len(line[:keyword.start()].rstrip())
+    if pos and line[pos - 1] in _ORDINAL_MARKS:
+        pos -= 1
+    start = pos
+    while start and line[start - 1].isdecimal():
+        start -= 1
+    before = line[start:pos] if 0 < pos - start <= 18 else None
+    after = _SEMESTER_NUMBER_AFTER_RE.match(line, keyword.end()).group(1)
+    return before, after
+
+
 def is_header_or_noise(name):
     """Verifica se o texto é um cabeçalho ou ruído, não uma disciplina."""
     name_upper = name.upper().strip()
-    
-    # Palavras que são ruído APENAS quando são exatamente iguais
-    exact_noise = [
-        "DISCIPLINAS", "DISCIPLINA", "CARGA", "CARGA HORÁRIA", "CARGA HORARIA",
-        "QDE DE", "HORÁRIA", "HORARIA", "PROVAS", "AULAS",
-        "MÓDULO", "MODULO", "SEMESTRE", "PERÍODO", "PERIODO",
-        "ESTRUTURA CURRICULAR", "ESTRUTURA", "CURRICULAR",
-        "PLANO DE ESTUDOS", "AVALIAÇÃO", "AVALIACAO", "CERTIFICAÇÃO",
-        "PRAZO", "HORAS", "CADA DISCIPLINA",
-        "FORMAÇÃO", "CERTIFICADO", "BIBLIOTECA",
-    ]
-    
-    # Palavras que são ruído quando o texto COMEÇA com elas
-    startswith_noise = [
-        "CARGA HORARIA TOTAL", "CARGA HORÁRIA TOTAL", "TOTAL DO CURSO",
-        "CARGA HOR",
-    ]
-    
-    for noise in exact_noise:
-        if name_upper == noise:
-            return True
-    
-    for noise in startswith_noise:
-        if name_upper.startswith(noise):
-            return True
-    
+
+    if name_upper in _EXACT_NOISE or name_upper.startswith(_STARTSWITH_NOISE):
+        return True
+
     # Muito curto (menos de 3 caracteres)
     if len(name_upper) < 3:
         return True
-    
-    # É apenas um número
-    if re.match(r'^\d+$', name_upper):
-        return True
-    
-    # Começa com número seguido de espaço (como "3" ou "800 HORAS")
-    if re.match(r'^\d+\s*(h|horas?)?\s*$', name_upper, re.IGNORECASE):
+
+    # É apenas um número, ou número + horas (como "3" ou "800 HORAS")
+    if _NUMBER_NOISE_RE.match(name_upper):
         return True
-    
+
     return False
 
 
-def try_format_inline_table(text):
+class _InlineTableFormat:
     """
     FORMATO A: Disciplina e dados na MESMA linha.
     Exemplos:
@@ -165,150 +738,112 @@ def try_format_inline_table(text):
       "MATEMÁTICA 315h 38 3"
       "HISTÓRIA 72h"
     """
-    subjects = []
-    lines = text.split("\n")
-    in_table = False
-    
-    for line in lines:
-        line = line.strip()
-        
+
+    def __init__(self):
+        self.subjects = []
+        self.in_table = False
+        self.done = False
+
+    def feed(self, line):
         # Detectar início da tabela (pode estar colado: "DISCIPLINASCARGA")
         # Deve começar com DISCIPLINA (cabeçalho de tabela) - não no meio de uma frase
-        if re.match(r'^DISCIPLINAS?', line, re.IGNORECASE):
-            in_table = True
-            continue
-        
-        if not in_table:
-            continue
-        
+        if _TABLE_START_RE.match(line):
+            self.in_table = True
+            return
+
+        if not self.in_table:
+            return
+
         # Detectar fim da tabela (só quando já estamos dentro da tabela)
-        if re.search(r"^(AVALIA[CÇ][AÃ]O|CERTIFICA[CÇ][AÃ]O|CADA DISCIPLINA|CARGA HOR[AÁ]RIA TOTAL|CARGA HORARIA TOTAL)", line, re.IGNORECASE):
-            break
-        
-        # Formato: NOME XXXh N N (4 colunas)
-        match_4col = re.match(
-            r"^([A-ZÀ-Úa-zà-ú][A-ZÀ-Úa-zà-ú\s\-\.]+?)\s+(\d+)h\s+(\d+)\s+(\d+)",
-            line
-        )
-        if match_4col:
-            subject_name = match_4col.group(1).strip()
-            if is_header_or_noise(subject_name):
-                continue
-            subjects.append({
-                "semester": 1,
-                "subjectName": subject_name.title(),
-                "workload": int(match_4col.group(2)),
-                "numClasses": int(match_4col.group(3)),
-                "numExams": int(match_4col.group(4))
-            })
-            continue
-        
-        # Formato: NOME XXXh (2 colunas)
-        match_2col = re.match(
-            r"^([A-ZÀ-Úa-zà-ú][A-ZÀ-Úa-zà-ú\s\-\.]+?)\s+(\d+)h",
-            line
-        )
-        if match_2col:
-            subject_name = match_2col.group(1).strip()
-            if is_header_or_noise(subject_name):
-                continue
-            subjects.append({
-                "semester": 1,
-                "subjectName": subject_name.title(),
-                "workload": int(match_2col.group(2))
-            })
-            continue
-    
-    return subjects
+        if _TABLE_END_RE.match(line):
+            self.done = True
+            return
+
+        # Formato: NOME XXXh N N (4 colunas) ou NOME XXXh (2 colunas)
+        match = match_inline_subject(line)
+        if match:
+            subject_name, workload, num_classes, num_exams = match
+            subject_name = subject_name.strip()
+            if not is_header_or_noise(subject_name):
+                subject = {
+                    "semester": 1,
+                    "subjectName": sys.intern(subject_name.title()),
+                    "workload": workload
+                }
+                if num_classes is not None:
+                    subject["numClasses"] = num_classes
+                    subject["numExams"] = num_exams
+                self.subjects.append(subject)
 
 
-def try_format_alternating_lines(text):
+class _AlternatingLinesFormat:
     """
     FORMATO B: Disciplina em uma linha, carga horária na próxima linha.
     Exemplos:
       "REDAÇÃO TÉCNICA"
       "50"
-      
+
       "INFORMÁTICA APLICADA"
       "40"
-    
+
     Organizado por MÓDULOS ou sem módulos.
     """
-    subjects = []
-    lines = text.split("\n")
-    current_module = 0
-    in_curriculum = False
-    i = 0
-    
-    while i < len(lines):
-        line = lines[i].strip()
-        
+
+    def __init__(self):
+        self.subjects = []
+        self.current_module = 0
+        self.in_curriculum = False
+        self.done = False
+        # Última disciplina, aguardando a carga horária na próxima linha
+        self.pending = None
+
+    def feed(self, line):
+        pending = self.pending
+        if pending is not None:
+            self.pending = None
+            # Próxima linha é apenas um número (carga horária): consumir a linha
+            workload_match = _WORKLOAD_LINE_RE.match(line)
+            if workload_match:
+                pending["workload"] = int(workload_match.group(1))
+                return
+
         # Detectar início da grade (MÓDULO, ESTRUTURA CURRICULAR, etc.)
-        if re.search(r"(MÓDULO|MODULO)\s*(\d+)", line, re.IGNORECASE):
-            match = re.search(r"(MÓDULO|MODULO)\s*(\d+)", line, re.IGNORECASE)
-            current_module = int(match.group(2))
-            in_curriculum = True
-            i += 1
-            continue
-        
-        if re.search(r"ESTRUTURA\s+CURRICULAR", line, re.IGNORECASE):
-            in_curriculum = True
-            i += 1
-            continue
-        
+        module_match = _MODULE_RE.search(line)
+        if module_match:
+            self.current_module = int(module_match.group(2))
+            self.in_curriculum = True
+            return
+
+        if _STRUCTURE_RE.search(line):
+            self.in_curriculum = True
+            return
+
         # Detectar fim da grade
-        if re.search(r"^(CARGA\s+HOR[AÁ]RIA\s+TOTAL|CARGA\s+HORARIA\s+TOTAL)", line, re.IGNORECASE):
-            break
-        
+        if _CURRICULUM_END_RE.match(line):
+            self.done = True
+            return
+
         # Ignorar cabeçalhos
         if is_header_or_noise(line):
-            i += 1
-            continue
-        
-        if not in_curriculum:
-            i += 1
-            continue
-        
-        # Verificar se a linha atual parece um nome de disciplina
-        # (texto com letras, não é apenas número, não é cabeçalho)
-        is_subject_name = (
-            re.match(r'^[A-ZÀ-Úa-zà-ú]', line) and
-            not re.match(r'^\d+\s*$', line) and
-            not re.match(r'^\d+\s*(h|horas?)\s*$', line, re.IGNORECASE) and
-            len(line) >= 3 and
-            not is_header_or_noise(line)
-        )
-        
-        if is_subject_name:
-            subject_name = line.strip()
-            workload = 0
-            
-            # Verificar se a próxima linha é um número (carga horária)
-            if i + 1 < len(lines):
-                next_line = lines[i + 1].strip()
-                
-                # Próxima linha é apenas um número (carga horária)
-                workload_match = re.match(r'^(\d+)\s*h?\s*$', next_line, re.IGNORECASE)
-                if workload_match:
-                    workload = int(workload_match.group(1))
-                    i += 1  # Pular a linha da carga horária
-            
+            return
+
+        if not self.in_curriculum:
+            return
+
+        # A linha parece um nome de disciplina: começa com letra e já
+        # passou pelo filtro de cabeçalhos (que exige ao menos 3 caracteres)
+        if _SUBJECT_START_RE.match(line):
             # Usar módulo atual ou 1 como padrão
-            semester = current_module if current_module > 0 else 1
-            
             subject_data = {
-                "semester": semester,
-                "subjectName": subject_name.title(),
-                "workload": workload
+                "semester": self.current_module if self.current_module > 0 else 1,
+                "subjectName": sys.intern(line.title()),
+                "workload": 0
             }
-            subjects.append(subject_data)
-        
-        i += 1
-    
-    return subjects
+            self.subjects.append(subject_data)
+            self.pending = subject_data
 
 
-def try_format_semesters(text):
+class _SemesterFormat:
     """
     FORMATO C: Disciplinas agrupadas por semestres/períodos.
     Exemplos:
@@ -318,56 +853,114 @@ def try_format_semesters(text):
       "2º SEMESTRE"
       ...
     """
-    subjects = []
-    lines = text.split("\n")
-    current_semester = 0
-    
-    semester_pattern = re.compile(
-        r"(?:(\d+)[ºª°]?\s*)?(?:SEMESTRE|PERÍODO|PERIODO)\s*(\d+)?",
-        re.IGNORECASE
-    )
-    
-    for line in lines:
-        line = line.strip()
-        
+
+    def __init__(self):
+        self.subjects = []
+        self.current_semester = 0
+        self.done = False
+
+    def feed(self, line):
         # Detectar semestre/período
-        sem_match = semester_pattern.search(line)
-        if sem_match:
+        heading = find_semester_heading(line)
+        if heading:
             # Pegar o número do semestre (pode estar antes ou depois)
-            sem_num = sem_match.group(1) or sem_match.group(2)
+            sem_num = heading[0] or heading[1]
             if sem_num:
-                current_semester = int(sem_num)
+                self.current_semester = int(sem_num)
             else:
-                current_semester += 1
-            continue
-        
-        if current_semester == 0:
-            continue
-        
+                self.current_semester += 1
+            return
+
+        if self.current_semester == 0:
+            return
+
         # Tentar extrair disciplina com carga horária
-        # Formato: "Nome da Disciplina - XXh" ou "Nome XXXh"
-        patterns = [
-            r"^([A-ZÀ-Úa-zà-ú][\w\s.,-]+?)\s*[-–]\s*(\d+)\s*h",
-            r"^([A-ZÀ-Úa-zà-ú][\w\s.,-]+?)\s+(\d+)\s*h",
-        ]
-        
-        for pattern in patterns:
-            match = re.match(pattern, line, re.IGNORECASE)
-            if match:
-                subject_name = match.group(1).strip()
-                workload = int(match.group(2))
-                
-                if is_header_or_noise(subject_name):
-                    break
-                
-                subjects.append({
-                    "semester": current_semester,
-                    "subjectName": subject_name.title() if subject_name.isupper() else subject_name,
-                    "workload": workload
+        match = match_semester_subject(line)
+        if match:
+            subject_name = match[0].strip()
+            if not is_header_or_noise(subject_name):
+                self.subjects.append({
+                    "semester": self.current_semester,
+                    "subjectName": sys.intern(subject_name.title() if subject_name.isupper() else subject_name),
+                    "workload": match[1]
                 })
-                break
-    
-    return subjects
+
+
+class CurriculumLineParser:
+    """
+    Percorre as linhas uma única vez e alimenta os três formatos ao mesmo
+    tempo. Cada linha é normalizada (strip) uma vez só; um formato que já
+    encontrou o fim da sua grade deixa de receber linhas.
+    """
+
+    def __init__(self):
+        self.formats = (
+            ("inline", _InlineTableFormat()),
+            ("alternating", _AlternatingLinesFormat()),
+            ("semesters", _SemesterFormat()),
+        )
+        # Vira True na linha de encerramento da grade ("CARGA HORÁRIA TOTAL")
+        # depois que alguma disciplina já foi encontrada: o resto do
+        # documento não precisa ser lido.
+        self.finished = False
+
+    def feed(self, raw_line):
+        line = raw_line.strip()
+        for _, fmt in self.formats:
+            if not fmt.done:
+                fmt.feed(line)
+        if not self.finished and _CURRICULUM_END_RE.match(line) and self.results():
+            self.finished = True
+
+    def feed_text(self, text):
+        for raw_line in text.split("\n"):
+            self.feed(raw_line)
+
+    def results(self):
+        """Lista de (formato, disciplinas) dos formatos que acharam algo."""
+        return [(name, fmt.subjects) for name, fmt in self.formats if fmt.subjects]
+
+
+class TimedCurriculumLineParser(CurriculumLineParser):
+    """CurriculumLineParser que acumula o tempo gasto em cada formato."""
+
+    def __init__(self):
+        super().__init__()
+        self.format_seconds = {name: 0.0 for name, _ in self.formats}
+
+    def feed(self, raw_line):
+        clock = time.perf_counter
+        line = raw_line.strip()
+        for name, fmt in self.formats:
+            if not fmt.done:
+                start = clock()
+                fmt.feed(line)
+                self.format_seconds[name] += clock() - start
+        if not self.finished and _CURRICULUM_END_RE.match(line) and self.results():
+            self.finished = True
+
+
+def _run_format(fmt, text):
+    for raw_line in text.split("\n"):
+        if fmt.done:
+            break
+        fmt.feed(raw_line.strip())
+    return fmt.subjects
+
+
+def try_format_inline_table(text):
+    """FORMATO A isolado. Ver _InlineTableFormat."""
+    return _run_format(_InlineTableFormat(), text)
+
+
+def try_format_alternating_lines(text):
+    """FORMATO B isolado. Ver _AlternatingLinesFormat."""
+    return _run_format(_AlternatingLinesFormat(), text)
+
+
+def try_format_semesters(text):
+    """FORMATO C isolado. Ver _SemesterFormat."""
+    return _run_format(_SemesterFormat(), text)
 
 
 def deduplicate_subjects(subjects):
@@ -382,10 +975,815 @@ def deduplicate_subjects(subjects):
     return unique
 
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
-        print(json.dumps({"error": "Uso: python3 extract_curriculum.py <caminho_do_pdf>"}))
+def normalize_name(name):
+    """Nome sem acentos, caixa e espaços extras (para comparar disciplinas e cursos)."""
+    name = unicodedata.normalize("NFKD", name)
+    name = "".join(ch for ch in name if not unicodedata.combining(ch))
+    return " ".join(name.casefold().split())
+
+
+def subject_key(semester, name):
+    """Chave de comparação de disciplinas: (semestre, nome normalizado)."""
+    return semester, normalize_name(name)
+
+
+def diff_subjects(stored, subjects):
+    """
+    Compara as linhas gravadas de um curso (dicts com id, semester,
+    subjectName, workload, description e order) com as disciplinas
+    extraídas (já deduplicadas, na ordem da grade; order = posição) e
+    devolve as operações mínimas para chegar nelas:
+
+      {"insert": [(order, disciplina)], "update": [(id, {coluna: valor})],
+       "reorder": [(id, order)], "delete": [id], "unchanged": n}
+
+    As disciplinas casam pela chave (semestre, nome normalizado) num índice
+    por hash. "update" traz só as colunas que mudaram (o nome também, quando
+    só a grafia mudou); "reorder", as linhas em que só a posição mudou. A
+    descrição só é comparada quando a disciplina extraída tem uma: a escrita
+    no painel não se perde a cada reimportação.
+    """
+    index = {}
+    for row in sorted(stored, key=lambda row: (row["order"], row["id"])):
+        index.setdefault(subject_key(row["semester"], row["subjectName"]), []).append(row)
+    # Chaves repetidas casam na ordem em que estavam gravadas
+    for rows in index.values():
+        rows.reverse()
+
+    ops = {"insert": [], "update": [], "reorder": [], "delete": [], "unchanged": 0}
+    for order, sub in enumerate(subjects):
+        # Os nomes gravados são cortados no tamanho da coluna: casa pelo mesmo corte
+        rows = index.get(subject_key(sub["semester"], sub["subjectName"][:255]))
+        if not rows:
+            ops["insert"].append((order, sub))
+            continue
+        row = rows.pop()
+        changes = {}
+        if row["subjectName"] != sub["subjectName"][:255]:
+            changes["subjectName"] = sub["subjectName"][:255]
+        if row["workload"] != sub["workload"]:
+            changes["workload"] = sub["workload"]
+        if sub.get("description") is not None and row["description"] != sub["description"]:
+            changes["description"] = sub["description"]
+        if changes:
+            if row["order"] != order:
+                changes["order"] = order
+            ops["update"].append((row["id"], changes))
+        elif row["order"] != order:
+            ops["reorder"].append((row["id"], order))
+        else:
+            ops["unchanged"] += 1
+    ops["delete"] = [row["id"] for rows in index.values() for row in rows]
+    return ops
+
+
+# ============================================================
+# CATÁLOGOS (vários cursos no mesmo PDF)
+# ============================================================
+# Instituições parceiras mandam um catálogo só com dezenas de cursos. O
+# texto é lido uma vez e cortado nos títulos de curso ("TÉCNICO EM ...",
+# "TECNÓLOGO EM ...", "BACHARELADO EM ...", "LICENCIATURA EM ...", sozinhos
+# na linha e em maiúsculas); cada trecho é analisado por um parser próprio,
+# em paralelo num pool de processos. O título repetido no cabeçalho das
+# páginas do mesmo curso não abre trecho novo, e trechos sem disciplinas
+# (capa, sumário, apresentação) são descartados.
+
+_COURSE_HEADING_RE = re.compile(r"(?:T[ÉE]CNICO|TECN[ÓO]LOGO|BACHARELADO|LICENCIATURA)\s+EM\s+[A-ZÀ-Ú][A-ZÀ-Ú\s-]*")
+# Títulos são curtos: linhas maiores nem são testadas
+_MAX_HEADING_LEN = 150
+
+
+def find_course_heading(line):
+    """Nome do curso se a linha (já com strip) for um título de curso; senão None."""
+    if len(line) > _MAX_HEADING_LEN:
+        return None
+    match = _COURSE_HEADING_RE.fullmatch(line)
+    if match is None:
+        return None
+    return _WHITESPACE_RE.sub(" ", line)
+
+
+class CatalogSegmenter:
+    """
+    Corta as páginas de um catálogo em trechos, um por curso. Cada trecho é
+    [nome do curso ou None, primeira página, última página, linhas de cada
+    página]; o que vem antes do primeiro título fica num trecho sem nome.
+    """
+
+    def __init__(self):
+        self.segments = []
+        self.has_text = False
+        self._key = None
+
+    def feed_page(self, page_text, page):
+        if not page_text:
+            return
+        if not self.has_text and page_text.strip():
+            self.has_text = True
+        for raw_line in page_text.split("\n"):
+            heading = find_course_heading(raw_line.strip())
+            if heading is not None:
+                key = normalize_name(heading)
+                if key != self._key:
+                    self._key = key
+                    self.segments.append([heading, page, page, []])
+            elif not self.segments:
+                self.segments.append([None, page, page, []])
+            segment = self.segments[-1]
+            if not segment[3] or segment[2] != page:
+                segment[3].append([])
+            segment[2] = page
+            segment[3][-1].append(raw_line)
+
+
+def _parse_segment(job):
+    """
+    Worker: analisa as páginas de um curso do catálogo como um PDF de um
+    curso só, parando no fim da página em que a grade termina.
+    """
+    course_name, pages = job
+    parser = CurriculumLineParser()
+    for lines in pages:
+        for raw_line in lines:
+            parser.feed(raw_line)
+        if parser.finished:
+            break
+    if course_name is None:
+        course_name = extract_course_name("\n".join(line for lines in pages for line in lines))
+    return build_curriculum(course_name, parser.results())
+
+
+def extract_catalog_from_pdf(pdf_path, workers=1, page_workers=1, backend=DEFAULT_BACKEND,
+                             time_budget=None, max_pages=None, max_bytes=None):
+    """
+    Extrai as grades de todos os cursos de um catálogo (veja CATÁLOGOS).
+    Um PDF de um curso só também funciona: vira uma lista de um item.
+
+    Devolve {"courses": [...], "totalCourses": n, "skippedSegments": n}, em
+    que cada curso é um resultado como o de extract_curriculum_from_pdf mais
+    "pages": [primeira, última]. Os trechos são analisados em um pool de
+    workers processos (1: no próprio processo); page_workers, backend,
+    max_pages e max_bytes valem para a leitura, como em
+    extract_curriculum_from_pdf.
+
+    time_budget limita a leitura das páginas: ao estourar, saem os cursos
+    lidos até ali, com "partial": true no catálogo e no último curso.
+    """
+    if time_budget is None:
+        time_budget = DEFAULT_TIME_BUDGET
+    if max_pages is None:
+        max_pages = MAX_PAGES
+    if max_bytes is None:
+        max_bytes = MAX_PDF_BYTES
+    deadline = time.monotonic() + time_budget if time_budget > 0 else None
+    segmenter = CatalogSegmenter()
+    timed_out = False
+    pages_read = 0
+    try:
+        _check_size(pdf_path, max_bytes)
+        with _open_pdf(pdf_path) as file:
+            reader = PyPDF2.PdfReader(file)
+            total_pages = len(reader.pages)
+            _check_pages(reader, max_pages)
+            source = None
+            if page_workers > 1:
+                source = file.getvalue() if isinstance(file, io.BytesIO) else pdf_path
+            for page_num, page_text in enumerate(iter_page_texts(reader, source, page_workers, backend)):
+                if deadline is not None and time.monotonic() > deadline:
+                    timed_out = True
+                    break
+                segmenter.feed_page(page_text, page_num + 1)
+                pages_read = page_num + 1
+    except FileNotFoundError:
+        return _error("not_found", f"Erro: O arquivo {pdf_path} não foi encontrado.")
+    except ResourceLimitError as e:
+        return e.result()
+    except MemoryError:
+        return _error("memory", "Memória insuficiente para processar o PDF.")
+    except PDF_READ_ERRORS as e:
+        return _error("invalid_pdf", f"Erro ao ler o PDF: {e}")
+
+    if not segmenter.has_text:
+        return _error("no_text", "Não foi possível extrair texto do PDF. O arquivo pode estar escaneado ou protegido.")
+
+    segments = segmenter.segments
+    jobs = [(name, pages) for name, _, _, pages in segments]
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs))) as executor:
+            results = list(executor.map(_parse_segment, jobs))
+    else:
+        results = [_parse_segment(job) for job in jobs]
+
+    courses = []
+    for (_, first_page, last_page, _), result in zip(segments, results):
+        if "error" not in result:
+            result["pages"] = [first_page, last_page]
+            courses.append(result)
+    if timed_out and courses and courses[-1]["pages"][1] == pages_read:
+        courses[-1]["partial"] = True
+
+    if not courses:
+        if timed_out:
+            return _error("timeout", f"Tempo limite de {time_budget:g}s excedido antes de encontrar alguma "
+                                     f"disciplina (lidas {pages_read} de {total_pages} página(s)).")
+        return _error("no_subjects", "Nenhuma disciplina foi encontrada no catálogo. Verifique se o documento "
+                                     "contém grades curriculares válidas.")
+    catalog = {"courses": courses, "totalCourses": len(courses), "skippedSegments": len(segments) - len(courses)}
+    if timed_out:
+        catalog["partial"] = True
+        catalog["warning"] = (f"Tempo limite de {time_budget:g}s excedido: catálogo parcial, "
+                              f"lidas {pages_read} de {total_pages} página(s).")
+    return catalog
+
+
+# ============================================================
+# MODO SERVIDOR (workers pré-aquecidos em socket Unix)
+# ============================================================
+
+def _warm_worker(max_memory_mb=None):
+    """
+    Inicializador dos workers do servidor: aplica o limite de memória e
+    executa o parser sobre um texto mínimo para que imports e o cache de
+    regex já estejam prontos antes do primeiro PDF real.
+    """
+    if max_memory_mb is not None:
+        limit_memory(max_memory_mb)
+    sample = "TÉCNICO EM EXEMPLO\nDISCIPLINAS\nMÓDULO 1\nREDAÇÃO TÉCNICA\n50\n1º SEMESTRE\nÉtica - 40h\n"
+    extract_course_name(sample)
+    try_format_inline_table(sample)
+    try_format_alternating_lines(sample)
+    try_format_semesters(sample)
+    return os.getpid()
+
+
+def _handle_request(request):
+    """Executa uma requisição do servidor dentro de um worker."""
+    timings = bool(request.get("timings"))
+    time_budget = request.get("time_budget")
+    backend = request.get("backend") or DEFAULT_BACKEND
+    source = request.get("path")
+    if request.get("bytes") is not None:
+        source = io.BytesIO(request["bytes"])
+    elif not source:
+        return _error("invalid_request", "Requisição inválida: informe o campo 'path' ou 'data'.")
+    if request.get("catalog"):
+        # Os workers do servidor não podem abrir um pool próprio: trechos em sequência
+        return run_limited(extract_catalog_from_pdf, source, backend=backend, time_budget=time_budget)
+    return run_limited(extract_curriculum_from_pdf, source, timings=timings, backend=backend,
+                       time_budget=time_budget)
+
+
+class CurriculumServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """
+    Servidor de extração em socket Unix.
+
+    Protocolo: JSON delimitado por nova linha. Cada linha recebida é uma
+    requisição ({"id": ..., "path": "/tmp/arquivo.pdf"}, ou com o PDF em
+    base64 no campo "data" no lugar de "path") e cada resposta é
+    uma linha com o mesmo "id" e o resultado de extract_curriculum_from_pdf
+    (com "catalog": true, o de extract_catalog_from_pdf). O campo opcional
+    "backend" escolhe a extração de texto, como --backend na linha de comando.
+    Respostas de uma mesma conexão podem sair fora de ordem; use o "id".
+
+    A fila é limitada a workers + queue_size requisições em andamento. Quando
+    ela enche, a conexão deixa de ser lida (backpressure) e, se a vaga não
+    abrir em queue_timeout segundos, a requisição é recusada com
+    {"code": "busy"}. Linhas/PDFs acima de MAX_PDF_BYTES são recusados com
+    {"code": "too_large"} sem chegar aos workers.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, socket_path, workers=2, queue_size=8, queue_timeout=30.0, cache=None, time_budget=None):
+        self.socket_path = socket_path
+        self.queue_timeout = queue_timeout
+        self.cache = cache
+        self.time_budget = time_budget
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_warm_worker,
+                                            initargs=(MAX_MEMORY_MB,))
+        self.slots = threading.BoundedSemaphore(workers + queue_size)
+        self.stats = {"requests": 0, "completed": 0, "rejected": 0}
+        self.stats_lock = threading.Lock()
+
+        # Pré-aquecer todos os workers antes de aceitar conexões
+        warm = [self.executor.submit(_warm_worker) for _ in range(workers)]
+        for future in warm:
+            future.result()
+
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
+        super().__init__(socket_path, _CurriculumRequestHandler)
+
+    def count(self, key):
+        with self.stats_lock:
+            self.stats[key] += 1
+
+    def server_close(self):
+        super().server_close()
+        self.executor.shutdown(wait=False, cancel_futures=True)
+        if os.path.exists(self.socket_path):
+            os.unlink(self.socket_path)
+
+
+class _CurriculumRequestHandler(socketserver.StreamRequestHandler):
+    """Lê requisições NDJSON de uma conexão e despacha para o pool."""
+
+    def setup(self):
+        super().setup()
+        self.write_lock = threading.Lock()
+        self.pending = threading.Semaphore(0)
+        self.in_flight = 0
+
+    def send(self, response):
+        line = json.dumps(response, ensure_ascii=False) + "\n"
+        with self.write_lock:
+            try:
+                self.wfile.write(line.encode("utf-8"))
+                self.wfile.flush()
+            except (BrokenPipeError, ConnectionResetError):
+                pass
+
+    def handle(self):
+        server = self.server
+        # Uma requisição não passa do PDF em base64 mais folga para o JSON
+        max_line = MAX_PDF_BYTES * 4 // 3 + 64 * 1024 if MAX_PDF_BYTES else -1
+        while True:
+            raw = self.rfile.readline(max_line)
+            if not raw:
+                break
+            if len(raw) == max_line and not raw.endswith(b"\n"):
+                # O resto da linha não foi lido: não há como continuar a conexão
+                self.send(_error("too_large", f"Requisição acima do limite de {MAX_PDF_BYTES / 1048576:g} MB."))
+                break
+            raw = raw.strip()
+            if not raw:
+                continue
+            try:
+                request = json.loads(raw)
+            except ValueError:
+                self.send(_error("invalid_request", "Requisição inválida: JSON malformado."))
+                continue
+
+            request_id = request.get("id")
+            if request.get("op") == "ping":
+                self.send({"id": request_id, "ok": True})
+                continue
+            if request.get("op") == "stats":
+                with server.stats_lock:
+                    stats = dict(server.stats)
+                if server.cache is not None:
+                    stats["cache"] = server.cache.stats()
+                self.send({"id": request_id, **stats})
+                continue
+
+            server.count("requests")
+
+            backend = request.get("backend")
+            if backend is not None and backend not in BACKENDS:
+                self.send({"id": request_id, **_error("invalid_request", f"Backend desconhecido: {backend!r} "
+                                                                         f"(opções: {', '.join(sorted(BACKENDS))}).")})
+                continue
+
+            # PDF enviado em base64: decodificar aqui e mandar os bytes ao worker
+            data = None
+            if request.get("data") is not None:
+                try:
+                    data = base64.b64decode(request.pop("data"), validate=True)
+                except (ValueError, TypeError) as e:
+                    self.send({"id": request_id, **_error("invalid_pdf", f"PDF em base64 inválido: {e}")})
+                    continue
+                source = io.BytesIO(data)
+            elif request.get("path"):
+                source = request["path"]
+            else:
+                source = None
+
+            # Limites antes de ler o arquivo inteiro (chave do cache) ou de ocupar um worker
+            if source is not None:
+                try:
+                    check_limits(source)
+                except ResourceLimitError as e:
+                    self.send({"id": request_id, **e.result()})
+                    continue
+                except PDF_READ_ERRORS as e:
+                    self.send({"id": request_id, **_error("invalid_pdf", f"Erro ao ler o PDF: {e}")})
+                    continue
+                except FileNotFoundError:
+                    self.send({"id": request_id, **_error("not_found", f"Erro: O arquivo {source} "
+                                                                       "não foi encontrado.")})
+                    continue
+                except OSError as e:
+                    self.send({"id": request_id, **_error("invalid_request", f"Erro ao abrir o PDF: {e}")})
+                    continue
+                except Exception as e:
+                    # Árvore de páginas malformada de um jeito que o PyPDF2 não trata
+                    self.send({"id": request_id, **_error("internal", f"Erro interno ao ler o PDF: {e}")})
+                    continue
+            if data is not None:
+                request["bytes"] = data
+            elif server.cache is not None and request.get("path"):
+                try:
+                    with open(request["path"], "rb") as file:
+                        # O arquivo pode ter crescido depois do stat
+                        data = file.read(MAX_PDF_BYTES + 1 if MAX_PDF_BYTES else -1)
+                except OSError:
+                    data = None
+                if data is not None and MAX_PDF_BYTES and len(data) > MAX_PDF_BYTES:
+                    self.send({"id": request_id, **_error("too_large", f"O PDF passa do limite de "
+                                                                       f"{MAX_PDF_BYTES / 1048576:g} MB.")})
+                    continue
+
+            # O cache só guarda resultados de um curso só, do backend padrão
+            if request.get("catalog") or backend not in (None, DEFAULT_BACKEND):
+                data = None
+
+            # Resultados em cache são respondidos sem ocupar um worker
+            if server.cache is not None and data is not None and not request.get("timings"):
+                cached = server.cache.get(data, cache_variant())
+                if cached is not None:
+                    server.count("completed")
+                    self.send({"id": request_id, **cached})
+                    continue
+
+            # Backpressure: enquanto não houver vaga, esta conexão não é lida
+            if not server.slots.acquire(timeout=server.queue_timeout):
+                server.count("rejected")
+                self.send({"id": request_id, **_error("busy", "Servidor ocupado, tente novamente.")})
+                continue
+
+            self.in_flight += 1
+            request["time_budget"] = server.time_budget
+            future = server.executor.submit(_handle_request, request)
+            future.add_done_callback(lambda f, rid=request_id, d=data: self._finish(rid, f, d))
+
+        # Aguardar as respostas pendentes antes de fechar a conexão
+        for _ in range(self.in_flight):
+            self.pending.acquire()
+
+    def _finish(self, request_id, future, data=None):
+        try:
+            result = future.result()
+        except Exception as e:
+            result = _error("internal", f"Erro ao processar o PDF: {e}")
+        cacheable = _cacheable(result) if self.server.cache is not None and data is not None else None
+        if cacheable is not None:
+            self.server.cache.put(data, cacheable, cache_variant())
+        self.server.slots.release()
+        self.server.count("completed")
+        self.send({"id": request_id, **result})
+        self.pending.release()
+
+
+def serve(socket_path, workers=2, queue_size=8, queue_timeout=30.0, cache=None, time_budget=None):
+    """Sobe o servidor de extração e atende até receber SIGINT/SIGTERM."""
+    server = CurriculumServer(socket_path, workers, queue_size, queue_timeout, cache, time_budget)
+    signal.signal(signal.SIGTERM, lambda *_: threading.Thread(target=server.shutdown).start())
+    print(f"Servidor de extração ouvindo em {socket_path} ({workers} workers)", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+# ============================================================
+# MODO EM LOTE (diretórios/listas de PDFs em um pool de processos)
+# ============================================================
+
+_batch_cache = None
+_batch_timings = False
+_batch_backend = DEFAULT_BACKEND
+_batch_time_budget = None
+
+
+def _init_batch_worker(cache_dir, cache_max_bytes, timings=False, backend=DEFAULT_BACKEND, time_budget=None):
+    global _batch_cache, _batch_timings, _batch_backend, _batch_time_budget
+    limit_memory(MAX_MEMORY_MB)
+    _batch_timings = timings
+    _batch_backend = backend
+    _batch_time_budget = time_budget
+    if cache_dir:
+        _batch_cache = CurriculumCache(cache_dir, PARSER_VERSION, cache_max_bytes)
+
+
+def _extract_timed(pdf_path):
+    """Extrai um PDF dentro de um worker e anota o tempo gasto."""
+    start = time.perf_counter()
+    try:
+        if _batch_cache is not None:
+            result = run_limited(extract_curriculum_cached, pdf_path, _batch_cache, timings=_batch_timings,
+                                 backend=_batch_backend, time_budget=_batch_time_budget)
+        else:
+            result = run_limited(extract_curriculum_from_pdf, pdf_path, timings=_batch_timings,
+                                 backend=_batch_backend, time_budget=_batch_time_budget)
+    except Exception as e:
+        result = _error("internal", f"Erro ao processar o PDF: {e}")
+    elapsed_ms = (time.perf_counter() - start) * 1000
+    return {"file": pdf_path, "elapsedMs": round(elapsed_ms, 1), **result}
+
+
+def iter_pdf_paths(inputs):
+    """Expande diretórios (recursivamente) em arquivos .pdf; arquivos passam direto."""
+    for item in inputs:
+        if os.path.isdir(item):
+            for root, dirs, files in os.walk(item):
+                dirs.sort()
+                for name in sorted(files):
+                    if name.lower().endswith(".pdf"):
+                        yield os.path.join(root, name)
+        else:
+            yield item
+
+
+def run_batch(paths, workers, out=sys.stdout, cache_dir=None, cache_max_bytes=64 * 1024 * 1024,
+              timings=False, backend=DEFAULT_BACKEND, course_ids=None, columns=False, time_budget=None):
+    """
+    Processa vários PDFs em paralelo e escreve uma linha JSON compacta por
+    documento, na ordem em que terminam. Cada linha traz "file",
+    "elapsedMs" e o resultado (ou "error") daquele arquivo.
+
+    Com course_ids ({caminho: courseId}), cada grade extraída também é
+    gravada no banco (load_curriculum) pelo processo principal, à medida
+    que os workers terminam; as transações reaproveitam as conexões do
+    pool. A linha ganha "courseId", "loaded" e "changes".
+    Com columns=True as disciplinas saem em colunas (veja curriculum_model).
+    time_budget vale para cada PDF (veja extract_curriculum_from_pdf).
+    Retorna (total, com_erro).
+    """
+    total = failed = 0
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_batch_worker,
+                             initargs=(cache_dir, cache_max_bytes, timings, backend, time_budget)) as executor:
+        futures = {executor.submit(_extract_timed, path): path for path in paths}
+        for future in as_completed(futures):
+            try:
+                line = future.result()
+            except Exception as e:
+                line = {"file": futures[future], **_error("internal", f"Erro ao processar o PDF: {e}")}
+            if course_ids is not None and "error" not in line:
+                _load_line(line, course_ids[line["file"]])
+            total += 1
+            if "error" in line:
+                failed += 1
+            out.write(dumps(line, compact=True, columns=columns) + "\n")
+            out.flush()
+    return total, failed
+
+
+# ============================================================
+# CARGA NO BANCO (course_curriculum)
+# ============================================================
+#
+# Reimportar a grade de um curso só toca as linhas que mudaram: as linhas
+# gravadas são lidas (com lock) e comparadas com as extraídas por
+# diff_subjects, e as operações (DELETE por id, UPDATE das colunas
+# alteradas, UPDATE de `order`, INSERT multi-linha das novas) rodam numa
+# única transação (mysql_pool). Ids, createdAt e descrições escritas no
+# painel das disciplinas que continuam na grade são preservados.
+
+SELECT_CURRICULUM_SQL = ("SELECT id, semester, subjectName, workload, description, `order` "
+                         "FROM course_curriculum WHERE courseId = %s FOR UPDATE")
+_CURRICULUM_COLUMNS = ("id", "semester", "subjectName", "workload", "description", "order")
+DELETE_CURRICULUM_ROWS_SQL = "DELETE FROM course_curriculum WHERE courseId = %s AND id IN "
+REORDER_CURRICULUM_SQL = "UPDATE course_curriculum SET `order` = %s WHERE id = %s"
+INSERT_CURRICULUM_SQL = ("INSERT INTO course_curriculum "
+                         "(courseId, semester, subjectName, workload, description, `order`) VALUES ")
+_INSERT_ROW = "(%s, %s, %s, %s, %s, %s)"
+
+# Linhas por INSERT/DELETE: mantém cada comando bem abaixo do max_allowed_packet
+LOAD_CHUNK_ROWS = 500
+
+
+def _chunks(items):
+    for start in range(0, len(items), LOAD_CHUNK_ROWS):
+        yield items[start:start + LOAD_CHUNK_ROWS]
+
+
+def apply_curriculum_diff(cursor, course_id, ops):
+    """Executa as operações de diff_subjects com o cursor (dentro da transação do chamador)."""
+    for ids in _chunks(ops["delete"]):
+        cursor.execute(DELETE_CURRICULUM_ROWS_SQL + "(" + ", ".join(["%s"] * len(ids)) + ")", [course_id, *ids])
+    for row_id, changes in ops["update"]:
+        columns = ", ".join(f"`{column}` = %s" for column in changes)
+        cursor.execute(f"UPDATE course_curriculum SET {columns} WHERE id = %s", [*changes.values(), row_id])
+    if ops["reorder"]:
+        cursor.executemany(REORDER_CURRICULUM_SQL, [(order, row_id) for row_id, order in ops["reorder"]])
+    rows = [(course_id, sub["semester"], sub["subjectName"][:255], sub["workload"], sub.get("description"), order)
+            for order, sub in ops["insert"]]
+    for chunk in _chunks(rows):
+        cursor.execute(INSERT_CURRICULUM_SQL + ", ".join([_INSERT_ROW] * len(chunk)),
+                       [value for row in chunk for value in row])
+
+
+def load_curriculum(course_id, result, transaction=None):
+    """
+    Grava o resultado da extração como a grade do curso course_id,
+    aplicando só a diferença em relação à grade gravada. transaction é um
+    context manager que entrega uma conexão DB-API (padrão:
+    mysql_pool.transaction). Retorna as contagens {"inserted", "updated",
+    "reordered", "deleted", "unchanged"}.
+    """
+    if "error" in result:
+        raise ValueError(result["error"])
+    if result.get("partial"):
+        # A grade parcial (tempo limite estourado) apagaria o resto da grade
+        raise ValueError(result.get("warning") or "Grade parcial.")
+    subjects = result.get("subjects", [])
+    if not subjects:
+        # Uma extração vazia apagaria a grade inteira do curso
+        raise ValueError("Nenhuma disciplina para gravar.")
+    transaction = transaction or mysql_pool.transaction
+
+    with transaction() as conn:
+        cursor = conn.cursor()
+        try:
+            cursor.execute(SELECT_CURRICULUM_SQL, (course_id,))
+            stored = [dict(zip(_CURRICULUM_COLUMNS, row)) for row in cursor.fetchall()]
+            ops = diff_subjects(stored, subjects)
+            apply_curriculum_diff(cursor, course_id, ops)
+        finally:
+            cursor.close()
+    return {"inserted": len(ops["insert"]), "updated": len(ops["update"]), "reordered": len(ops["reorder"]),
+            "deleted": len(ops["delete"]), "unchanged": ops["unchanged"]}
+
+
+def _load_line(result, course_id, transaction=None):
+    """Grava o resultado e anota "courseId", "loaded" e "changes" (ou "error") nele."""
+    result["courseId"] = course_id
+    try:
+        changes = load_curriculum(course_id, result, transaction)
+    except Exception as e:
+        result.update(_error("load_failed", f"Erro ao gravar no banco: {e}"))
+    else:
+        result["loaded"] = len(result["subjects"])
+        result["changes"] = changes
+    return result
+
+
+def read_load_map(path):
+    """
+    Lê o mapeamento da carga em lote: uma linha "courseId caminho_do_pdf"
+    por curso ('-' para stdin). Linhas vazias e iniciadas por # são ignoradas.
+    Retorna {caminho: courseId}.
+    """
+    course_ids = {}
+    with (sys.stdin if path == "-" else open(path, encoding="utf-8")) as f:
+        for number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            parts = line.split(None, 1)
+            if len(parts) != 2 or not parts[0].isdigit():
+                raise ValueError(f"Linha {number} do mapeamento inválida: {line!r}")
+            course_ids[parts[1]] = int(parts[0])
+    return course_ids
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extrai a grade curricular de PDFs de cursos.")
+    parser.add_argument("pdf", nargs="*", help="caminho do PDF (no modo --batch: arquivos e/ou diretórios)")
+    parser.add_argument("--serve", metavar="SOCKET", help="sobe o servidor de extração no socket Unix informado")
+    parser.add_argument("--stdin", action="store_true", help="lê o PDF (bytes) do stdin em vez de um arquivo")
+    parser.add_argument("--stdin-base64", action="store_true", help="lê o PDF em base64 do stdin")
+    parser.add_argument("--timings", action="store_true", help="inclui no resultado a duração de cada etapa e página")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=DEFAULT_BACKEND,
+                        help="extração de texto: full (PyPDF2, o padrão), fast (content stream, com fallback) "
+                             "ou auto (fast quando confere com o full nas primeiras páginas)")
+    parser.add_argument("--select-backend", action="store_true",
+                        help="mede os backends no PDF e mostra o mais rápido que dá as mesmas disciplinas")
+    parser.add_argument("--compact", action="store_true", help="JSON sem indentação (menor e mais rápido de ler)")
+    parser.add_argument("--columns", action="store_true",
+                        help="JSON compacto com as disciplinas em colunas (subjectColumns)")
+    parser.add_argument("--time-budget", type=float, default=None, metavar="SEGUNDOS",
+                        help="tempo máximo por PDF; estourado, sai a grade parcial "
+                             "(padrão: $CURRICULUM_TIME_BUDGET ou 30; 0 desliga)")
+    parser.add_argument("--catalog", action="store_true",
+                        help="PDF com vários cursos: separa pelos títulos e extrai cada grade (paralelo com --workers)")
+    parser.add_argument("--profile", metavar="ARQUIVO", help="grava um perfil cProfile (pstats) da execução")
+    parser.add_argument("--batch", action="store_true", help="processa vários PDFs e emite uma linha JSON por documento")
+    parser.add_argument("--file-list", help="arquivo com um caminho de PDF por linha para o modo --batch ('-' para stdin)")
+    parser.add_argument("--load", type=int, metavar="COURSE_ID",
+                        help="grava a grade extraída no banco (course_curriculum) para o curso informado")
+    parser.add_argument("--load-map", metavar="ARQUIVO",
+                        help="modo --batch com carga: linhas 'courseId caminho_do_pdf' ('-' para stdin)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="workers do servidor ou do lote")
+    parser.add_argument("--page-workers", type=int, default=1, help="processos para extrair as páginas de um PDF em paralelo")
+    parser.add_argument("--queue-size", type=int, default=8, help="requisições aguardando além das em execução")
+    parser.add_argument("--queue-timeout", type=float, default=30.0, help="segundos aguardando vaga antes de recusar")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR, help="diretório do cache de resultados (padrão: $CURRICULUM_CACHE_DIR)")
+    parser.add_argument("--cache-max-mb", type=float, default=64, help="tamanho máximo do cache em MB")
+    parser.add_argument("--cache-stats", action="store_true", help="mostra as estatísticas do cache e sai")
+    args = parser.parse_args(argv)
+
+    cache = None
+    if args.cache_dir:
+        cache = CurriculumCache(args.cache_dir, PARSER_VERSION, int(args.cache_max_mb * 1024 * 1024))
+
+    if args.cache_stats:
+        print(json.dumps(cache.stats() if cache else _error("invalid_request", "Cache não configurado.")))
+        return
+
+    if args.serve:
+        serve(args.serve, args.workers, args.queue_size, args.queue_timeout, cache, args.time_budget)
+        return
+
+    if args.load_map:
+        try:
+            course_ids = read_load_map(args.load_map)
+        except (OSError, ValueError) as e:
+            print(json.dumps(_error("invalid_request", str(e)), ensure_ascii=False))
+            return
+        start = time.perf_counter()
+        total, failed = run_batch(list(course_ids), args.workers, cache_dir=args.cache_dir,
+                                  cache_max_bytes=int(args.cache_max_mb * 1024 * 1024),
+                                  timings=args.timings, backend=args.backend, course_ids=course_ids,
+                                  columns=args.columns, time_budget=args.time_budget)
+        print(f"{total} curso(s) processado(s), {failed} com erro, em {time.perf_counter() - start:.1f}s",
+              file=sys.stderr)
+        return
+
+    if args.batch:
+        inputs = list(args.pdf)
+        if args.file_list:
+            with (sys.stdin if args.file_list == "-" else open(args.file_list, encoding="utf-8")) as f:
+                inputs.extend(line.strip() for line in f if line.strip())
+        start = time.perf_counter()
+        total, failed = run_batch(iter_pdf_paths(inputs), args.workers, cache_dir=args.cache_dir,
+                                  cache_max_bytes=int(args.cache_max_mb * 1024 * 1024),
+                                  timings=args.timings, backend=args.backend, columns=args.columns,
+                                  time_budget=args.time_budget)
+        print(f"{total} PDF(s) processado(s), {failed} com erro, em {time.perf_counter() - start:.1f}s",
+              file=sys.stderr)
+        return
+
+    if not (args.stdin or args.stdin_base64) and len(args.pdf) != 1:
+        print(json.dumps(_error("invalid_request", "Uso: python3 extract_curriculum.py <caminho_do_pdf>")))
+        return
+
+    if args.catalog and args.load is not None:
+        print(json.dumps(_error("invalid_request", "--load não se aplica a --catalog: carregue cada curso com seu id."),
+                         ensure_ascii=False))
+        return
+
+    if args.select_backend:
+        if args.pdf:
+            selection = select_backend(args.pdf[0])
+        else:
+            try:
+                data = read_pdf_stream(sys.stdin.buffer, "base64" if args.stdin_base64 else "raw")
+            except ResourceLimitError as e:
+                selection = e.result()
+            except ValueError as e:
+                selection = _error("invalid_pdf", str(e))
+            else:
+                selection = select_backend(io.BytesIO(data))
+        print(json.dumps(selection, indent=2, ensure_ascii=False))
+        return
+
+    # Uma extração só por processo: limites de memória e de CPU para o
+    # processo inteiro, além do prazo rígido em volta da extração
+    limit_memory(MAX_MEMORY_MB)
+    limit_cpu(DEADLINE)
+
+    profiler = None
+    if args.profile:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    if args.stdin or args.stdin_base64:
+        try:
+            data = read_pdf_stream(sys.stdin.buffer, "base64" if args.stdin_base64 else "raw")
+        except ResourceLimitError as e:
+            result = e.result()
+        except ValueError as e:
+            result = _error("invalid_pdf", str(e))
+        else:
+            if args.catalog:
+                result = run_limited(extract_catalog_from_pdf, io.BytesIO(data), args.workers,
+                                     args.page_workers, args.backend, args.time_budget)
+            else:
+                result = run_limited(extract_curriculum_from_bytes, data, cache, args.page_workers,
+                                     args.timings, args.backend, args.time_budget)
+    elif args.catalog:
+        result = run_limited(extract_catalog_from_pdf, args.pdf[0], args.workers, args.page_workers,
+                             args.backend, args.time_budget)
+    elif cache is not None:
+        result = run_limited(extract_curriculum_cached, args.pdf[0], cache, args.page_workers, args.timings,
+                             args.backend, args.time_budget)
     else:
-        pdf_file_path = sys.argv[1]
-        result = extract_curriculum_from_pdf(pdf_file_path)
-        print(json.dumps(result, indent=2, ensure_ascii=False))
+        result = run_limited(extract_curriculum_from_pdf, args.pdf[0], args.page_workers, args.timings,
+                             args.backend, args.time_budget)
+
+    if profiler is not None:
+        profiler.disable()
+        profiler.dump_stats(args.profile)
+
+    if args.load is not None and "error" not in result:
+        _load_line(result, args.load)
+
+    print(dumps(result, compact=args.compact, columns=args.columns))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,24 +1,583 @@
 import PyPDF2
+import argparse
+import io
+import json
+import math
+import re
 import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
 
-def extract_text_from_pdf(pdf_path):
-    text = ""
+# Abaixo disso não compensa subir processos para extrair em paralelo
+PARALLEL_MIN_PAGES = 8
+# Máximo de páginas por fatia entregue a um worker
+MAX_PAGES_PER_SLICE = 16
+
+# ============================================================
+# BACKENDS DE EXTRAÇÃO
+# ============================================================
+# "full": extract_text() do PyPDF2 (layout completo, lento).
+# "fast": lê só os operadores de texto do content stream da página; se a
+#         página usar algo que ele não entende (fontes Type0/ToUnicode,
+#         encodings com Differences, XObjects de formulário, texto girado...)
+#         ou a saída parecer suspeita, cai para o "full" naquela página.
+# "auto": por documento: extrai as primeiras GATE_PAGES páginas com os dois
+#         e só segue com o "fast" se ele der exatamente o mesmo texto, sem
+#         fallback; senão usa o "full" no resto do documento.
+#
+# O padrão é o "full": o "fast" só é usado quando pedido (ou quando o
+# "auto" confirma que ele é equivalente naquele documento).
+
+DEFAULT_BACKEND = "full"
+
+# Páginas comparadas pelo backend "auto" antes de decidir
+GATE_PAGES = 3
+
+# Encodings de fontes simples que o caminho rápido decodifica sozinho
+_SIMPLE_ENCODINGS = {
+    "/WinAnsiEncoding": "cp1252",
+    "/MacRomanEncoding": "mac_roman",
+}
+
+# Largura do espaço (milésimos de em) que o extract_text() do PyPDF2 assume
+# quando a fonte não informa, e a das fontes padrão (tabela do PyPDF2,
+# _cmap._default_fonts_space_width, inclusive o "/Courrier" escrito errado:
+# o Courier de verdade cai no padrão). As regras de _space_width reproduzem
+# as do PyPDF2 3.0.x, com as mesmas esquisitices, para os espaços saírem
+# nos mesmos pontos.
+_DEFAULT_SPACE_WIDTH = 200.0
+_STANDARD_SPACE_WIDTHS = {
+    "/Courrier": 600, "/Courier-Bold": 600, "/Courier-BoldOblique": 600, "/Courier-Oblique": 600,
+    "/Helvetica": 278, "/Helvetica-Bold": 278, "/Helvetica-BoldOblique": 278, "/Helvetica-Oblique": 278,
+    "/Helvetica-Narrow": 228, "/Helvetica-NarrowBold": 228, "/Helvetica-NarrowBoldOblique": 228,
+    "/Helvetica-NarrowOblique": 228,
+    "/Times-Roman": 250, "/Times-Bold": 250, "/Times-BoldItalic": 250, "/Times-Italic": 250,
+    "/Symbol": 250, "/ZapfDingbats": 278,
+}
+
+_TOKEN_RE = re.compile(rb"""
+    (?P<space>(?:[\x00\t\n\f\r ]+|%[^\r\n]*)+)
+  | (?P<string>\()
+  | (?P<hex><[0-9A-Fa-f\x00\t\n\f\r ]*>)
+  | (?P<dict><<|>>)
+  | (?P<array>[\[\]])
+  | (?P<name>/[^\x00\t\n\f\r ()<>\[\]{}/%]*)
+  | (?P<number>[+-]?(?:\d+\.?\d*|\.\d+))
+  | (?P<operator>[^\x00\t\n\f\r ()<>\[\]{}/%]+)
+  | (?P<brace>[{}])
+""", re.X)
+
+_LITERAL_SPECIAL_RE = re.compile(rb"[()\\]")
+_ESCAPE_RE = re.compile(rb"\\([0-7]{1,3}|\r\n|[\s\S])")
+_ESCAPES = {b"n": b"\n", b"r": b"\r", b"t": b"\t", b"b": b"\b", b"f": b"\f"}
+
+# Caracteres de controle (fora \n) ou de substituição indicam decodificação errada
+_SUSPICIOUS_RE = re.compile("[\x00-\x09\x0b-\x1f\ufffd]")
+
+
+class UnsupportedContent(Exception):
+    """O caminho rápido não sabe extrair esta página; use o extract_text()."""
+
+
+def _unescape_literal(raw):
+    def replace(match):
+        seq = match.group(1)
+        if seq[:1].isdigit():
+            return bytes((int(seq, 8) & 0xFF,))
+        if seq in (b"\r\n", b"\r", b"\n"):
+            return b""
+        return _ESCAPES.get(seq, seq)
+    return _ESCAPE_RE.sub(replace, raw) if b"\\" in raw else raw
+
+
+def _read_literal(data, pos):
+    """Lê uma string literal a partir do '(' em pos. Retorna (bytes, fim)."""
+    depth = 1
+    start = pos + 1
+    i = start
+    while True:
+        match = _LITERAL_SPECIAL_RE.search(data, i)
+        if match is None:
+            raise UnsupportedContent("string não terminada")
+        char = match.group()
+        i = match.end()
+        if char == b"\\":
+            i += 1
+        elif char == b"(":
+            depth += 1
+        else:
+            depth -= 1
+            if depth == 0:
+                return _unescape_literal(data[start:i - 1]), i
+
+
+def _iter_operations(data):
+    """Gera (operador, operandos) de um content stream já decodificado."""
+    operands = []
+    stack = []
+    pos = 0
+    end = len(data)
+    match_token = _TOKEN_RE.match
+    while pos < end:
+        match = match_token(data, pos)
+        if match is None:
+            raise UnsupportedContent("token inválido no content stream")
+        kind = match.lastgroup
+        pos = match.end()
+        if kind == "space":
+            continue
+        if kind == "string":
+            value, pos = _read_literal(data, match.start())
+        elif kind == "hex":
+            digits = re.sub(rb"\s", b"", match.group()[1:-1])
+            value = bytes.fromhex((digits + b"0" * (len(digits) % 2)).decode())
+        elif kind == "number":
+            value = float(match.group())
+        elif kind == "name":
+            value = match.group().decode("latin-1")
+        elif kind == "operator":
+            operator = match.group()
+            if operator in (b"true", b"false", b"null"):
+                value = None
+            else:
+                if stack:
+                    raise UnsupportedContent("operador dentro de array/dicionário")
+                if operator == b"BI":
+                    raise UnsupportedContent("imagem inline")
+                yield operator, operands
+                operands = []
+                continue
+        elif match.group() in (b"[", b"<<"):
+            stack.append(operands)
+            operands = []
+            continue
+        elif match.group() == b"]":
+            if not stack:
+                raise UnsupportedContent("array não aberto")
+            value = operands
+            operands = stack.pop()
+        elif match.group() == b">>":
+            if not stack:
+                raise UnsupportedContent("dicionário não aberto")
+            value = None
+            operands = stack.pop()
+        else:
+            raise UnsupportedContent("operador não suportado")
+        operands.append(value)
+
+
+def _page_content(page):
+    contents = page.get("/Contents")
+    if contents is None:
+        return b""
+    contents = contents.get_object()
+    if isinstance(contents, PyPDF2.generic.ArrayObject):
+        return b"\n".join(part.get_object().get_data() for part in contents)
+    return contents.get_data()
+
+
+def _font_info(font):
+    """(encoding Python, meia largura do espaço) de uma fonte simples, ou None."""
+    font = font.get_object()
+    if "/ToUnicode" in font or font.get("/Subtype") not in ("/Type1", "/TrueType", "/MMType1"):
+        return None
+    if font.get("/BaseFont") in ("/Symbol", "/ZapfDingbats"):
+        return None
+    encoding = font.get("/Encoding")
+    encoding = encoding.get_object() if encoding is not None else "/StandardEncoding"
+    if not isinstance(encoding, str):
+        return None
+    if encoding == "/StandardEncoding":
+        # Só ASCII sem as aspas ' e ` (que a StandardEncoding troca por ’ e ‘)
+        codec = None
+    else:
+        codec = _SIMPLE_ENCODINGS.get(encoding)
+        if codec is None:
+            return None
+    return codec, _space_width(font) / 2
+
+
+def _space_width(font):
+    """Largura do espaço de uma fonte simples como o extract_text() calcula."""
+    base_font = font.get("/BaseFont")
+    space_width = _STANDARD_SPACE_WIDTHS.get(base_font, _DEFAULT_SPACE_WIDTH)
+    # Sem /Encoding, o PyPDF2 usa a largura da fonte padrão como código do espaço
+    space_code = 32
+    if "/Encoding" not in font and base_font in _STANDARD_SPACE_WIDTHS:
+        space_code = _STANDARD_SPACE_WIDTHS[base_font]
+    widths = font.get("/Widths")
+    if widths is None:
+        # Sem /Widths o valor não é dividido ao meio como os demais
+        return space_width * 2
+    widths = [float(w) for w in widths.get_object()]
+    first = font.get("/FirstChar")
+    last = font.get("/LastChar")
+    if (first is not None and last is not None and first <= space_code <= last
+            and space_code - first < len(widths) and widths[space_code - first]):
+        return widths[space_code - first]
+    descriptor = font.get("/FontDescriptor")
+    descriptor = descriptor.get_object() if descriptor is not None else {}
+    if "/MissingWidth" in descriptor:
+        return float(descriptor["/MissingWidth"])
+    positive = [w for w in widths if w > 0]
+    return sum(positive) / max(1, len(positive)) / 2
+
+
+def _mult(m, n):
+    return [
+        m[0] * n[0] + m[1] * n[2],
+        m[0] * n[1] + m[1] * n[3],
+        m[2] * n[0] + m[3] * n[2],
+        m[2] * n[1] + m[3] * n[3],
+        m[4] * n[0] + m[5] * n[2] + n[4],
+        m[4] * n[1] + m[5] * n[3] + n[5],
+    ]
+
+
+def fast_page_text(page):
+    """
+    Extrai o texto de uma página lendo só os operadores de texto
+    (Tj, TJ, ', ") e de posição (Td, TD, Tm, T*, cm) do content stream.
+    Quebras de linha e espaços seguem as mesmas regras do extract_text()
+    do PyPDF2 para texto horizontal. Levanta UnsupportedContent quando a
+    página precisa da extração completa.
+    """
+    resources = page.get("/Resources")
+    resources = resources.get_object() if resources is not None else {}
+    fonts = resources.get("/Font")
+    fonts = fonts.get_object() if fonts is not None else {}
+    xobjects = resources.get("/XObject")
+    xobjects = xobjects.get_object() if xobjects is not None else {}
+    font_cache = {}
+
+    text = []
+    last = ""
+    cm = [1.0, 0.0, 0.0, 1.0, 0.0, 0.0]
+    tm = [1.0, 0.0, 0.0, 1.0, 0.0, 0.0]
+    tm_prev = [1.0, 0.0, 0.0, 1.0, 0.0, 0.0]
+    cm_stack = []
+    leading = 0.0
+    font_size = 1.0
+    codec = None
+    # Até o primeiro Tf o extract_text() usa 500 (e texto sem Tf cai no fallback)
+    half_space = 500.0
+
+    def show(value):
+        nonlocal last
+        if isinstance(value, str):
+            decoded = value
+        elif codec is None:
+            if any(b < 32 or b > 126 or b in (39, 96) for b in value):
+                raise UnsupportedContent("byte fora do ASCII em fonte sem encoding")
+            decoded = value.decode("ascii")
+        else:
+            decoded = value.decode(codec)
+        if decoded:
+            text.append(decoded)
+            last = decoded[-1]
+
+    def moved():
+        nonlocal tm_prev, last
+        m = _mult(tm, cm)
+        if m[1] or m[2] or m[0] <= 0 or m[3] <= 0:
+            raise UnsupportedContent("texto fora da horizontal")
+        delta_x = m[4] - tm_prev[4]
+        delta_y = m[5] - tm_prev[5]
+        f = font_size * math.sqrt(abs(m[0] * m[3]))
+        tm_prev = m
+        if delta_y < -0.8 * f:
+            if last != "\n":
+                text.append("\n")
+                last = "\n"
+        elif abs(delta_y) < f * 0.3 and abs(delta_x) > half_space / 1000 * f * 15:
+            if last != " ":
+                text.append(" ")
+                last = " "
+
+    for operator, operands in _iter_operations(_page_content(page)):
+        if operator == b"Tj":
+            show(operands[0])
+            moved()
+        elif operator == b"TJ":
+            for item in operands[0]:
+                if isinstance(item, bytes):
+                    show(item)
+                    moved()
+                elif isinstance(item, float) and abs(item) >= half_space and text and last != " ":
+                    show(" ")
+                    moved()
+        elif operator in (b"Td", b"TD"):
+            tx, ty = operands
+            if operator == b"TD":
+                leading = -ty
+            tm[4] += tx * tm[0] + ty * tm[2]
+            tm[5] += tx * tm[1] + ty * tm[3]
+            moved()
+        elif operator == b"T*" or operator in (b"'", b'"'):
+            tm[5] -= leading
+            moved()
+            if operator != b"T*":
+                show(operands[-1])
+                moved()
+        elif operator == b"Tm":
+            tm = [float(x) for x in operands]
+            moved()
+        elif operator == b"BT":
+            tm = [1.0, 0.0, 0.0, 1.0, 0.0, 0.0]
+        elif operator == b"TL":
+            leading = operands[0]
+        elif operator == b"Tf":
+            name, size = operands
+            if name not in font_cache:
+                font = fonts.get(name)
+                font_cache[name] = _font_info(font) if font is not None else None
+            if font_cache[name] is None:
+                raise UnsupportedContent(f"fonte {name} não suportada")
+            codec, half_space = font_cache[name]
+            font_size = size
+        elif operator == b"cm":
+            cm = _mult([float(x) for x in operands], cm)
+        elif operator == b"q":
+            cm_stack.append((cm, leading, font_size, codec, half_space))
+        elif operator == b"Q":
+            cm, leading, font_size, codec, half_space = cm_stack.pop() if cm_stack else (
+                [1.0, 0.0, 0.0, 1.0, 0.0, 0.0], leading, font_size, codec, half_space)
+        elif operator == b"Do":
+            xobject = xobjects.get(operands[0])
+            if xobject is None or xobject.get_object().get("/Subtype") != "/Image":
+                raise UnsupportedContent("XObject de formulário")
+            if text and last != "\n":
+                text.append("\n")
+                last = "\n"
+
+    return "".join(text)
+
+
+class FullTextBackend:
+    """Extração completa do PyPDF2."""
+
+    name = "full"
+
+    def page_text(self, page):
+        return page.extract_text()
+
+
+class ContentStreamBackend:
+    """Caminho rápido pelo content stream, com fallback página a página."""
+
+    name = "fast"
+
+    def __init__(self):
+        self.fallbacks = 0
+
+    def page_text(self, page):
+        try:
+            text = fast_page_text(page)
+        except (UnsupportedContent, UnicodeDecodeError, ValueError, KeyError, TypeError, IndexError):
+            text = None
+        if not text or not text.strip() or _SUSPICIOUS_RE.search(text):
+            self.fallbacks += 1
+            return page.extract_text()
+        return text
+
+
+class GatedBackend:
+    """
+    Escolhe por documento: as primeiras GATE_PAGES páginas são extraídas
+    pelos dois backends (vale o texto do "full"); se o "fast" deu o mesmo
+    texto em todas, sem fallback, ele extrai o resto, senão o "full".
+    """
+
+    name = "auto"
+
+    def __init__(self):
+        self.full = FullTextBackend()
+        self.fast = ContentStreamBackend()
+        self.compared = 0
+        self.chosen = None
+
+    def page_text(self, page):
+        if self.chosen is not None:
+            return self.chosen.page_text(page)
+        text = self.full.page_text(page)
+        fallbacks = self.fast.fallbacks
+        if self.fast.page_text(page) != text or self.fast.fallbacks != fallbacks:
+            self.chosen = self.full
+        else:
+            self.compared += 1
+            if self.compared >= GATE_PAGES:
+                self.chosen = self.fast
+        return text
+
+
+BACKENDS = {
+    FullTextBackend.name: FullTextBackend,
+    ContentStreamBackend.name: ContentStreamBackend,
+    GatedBackend.name: GatedBackend,
+}
+
+
+def get_backend(name=DEFAULT_BACKEND):
+    try:
+        return BACKENDS[name]()
+    except KeyError:
+        raise ValueError(f"Backend de extração desconhecido: {name}") from None
+
+
+def parse_page_ranges(spec, num_pages):
+    """
+    Converte "1-3,10,20-" (páginas a partir de 1, intervalos inclusivos,
+    abertos nas pontas) em índices (a partir de 0) ordenados e sem repetição.
+    """
+    indices = set()
+    for part in spec.split(","):
+        part = part.strip()
+        first, sep, last = part.partition("-")
+        try:
+            first = int(first) if first.strip() else 1
+            last = (int(last) if last.strip() else num_pages) if sep else first
+        except ValueError:
+            raise ValueError(f"Intervalo de páginas inválido: {part!r}") from None
+        if first < 1 or last < first:
+            raise ValueError(f"Intervalo de páginas inválido: {part!r}")
+        if last > num_pages:
+            raise ValueError(f"Página {last} fora do documento ({num_pages} páginas)")
+        indices.update(range(first - 1, last))
+    return sorted(indices)
+
+
+def _page_text(extractor, page, timed):
+    if not timed:
+        return extractor.page_text(page), None
+    start = time.perf_counter()
+    text = extractor.page_text(page)
+    return text, round((time.perf_counter() - start) * 1000, 2)
+
+
+# PDF aberto em cada worker do pool de iter_pages (veja _init_slice_worker)
+_worker_reader = None
+_worker_extractor = None
+
+
+def _init_slice_worker(source, backend=DEFAULT_BACKEND):
+    """
+    Inicializador do pool: o PDF (bytes ou caminho) chega uma vez por
+    worker e fica aberto; as tarefas levam só os índices das páginas.
+    """
+    global _worker_reader, _worker_extractor
+    file = io.BytesIO(source) if isinstance(source, bytes) else open(source, "rb")
+    _worker_reader = PyPDF2.PdfReader(file)
+    _worker_extractor = get_backend(backend)
+
+
+def _extract_page_slice(indices, timed=False):
+    """Worker: extrai as páginas indicadas do PDF aberto por _init_slice_worker."""
+    return [_page_text(_worker_extractor, _worker_reader.pages[i], timed) for i in indices]
+
+
+def iter_pages(reader, source=None, workers=1, backend=DEFAULT_BACKEND, pages=None, timed=False):
+    """
+    Gera (índice, texto, ms) de cada página conforme é extraída; ms é o
+    tempo de extração daquela página (None se timed=False).
+
+    pages restringe a extração a esses índices (a partir de 0, em ordem);
+    as demais páginas não são lidas.
+
+    Com workers > 1 e o PDF de origem (caminho ou bytes) em source, as
+    páginas são divididas em fatias extraídas em paralelo por um pool de
+    processos; os textos continuam saindo na ordem das páginas e iguais ao
+    caminho serial. Se o consumidor parar de ler, as fatias pendentes são
+    canceladas.
+
+    backend escolhe como o texto é extraído (veja BACKENDS).
+    """
+    indices = list(range(len(reader.pages)) if pages is None else pages)
+    if workers <= 1 or source is None or len(indices) < PARALLEL_MIN_PAGES:
+        extractor = get_backend(backend)
+        for i in indices:
+            text, ms = _page_text(extractor, reader.pages[i], timed)
+            yield i, text, ms
+        return
+
+    slice_size = max(1, min(MAX_PAGES_PER_SLICE, math.ceil(len(indices) / workers)))
+    slices = [indices[k:k + slice_size] for k in range(0, len(indices), slice_size)]
+    executor = ProcessPoolExecutor(max_workers=min(workers, len(slices)), initializer=_init_slice_worker,
+                                   initargs=(source, backend))
+    try:
+        results = executor.map(_extract_page_slice, slices, [timed] * len(slices))
+        for slice_indices, texts in zip(slices, results):
+            for i, (text, ms) in zip(slice_indices, texts):
+                yield i, text, ms
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_page_texts(reader, source=None, workers=1, backend=DEFAULT_BACKEND, pages=None):
+    """Gera o texto de cada página do PdfReader conforme é extraído (veja iter_pages)."""
+    for _, text, _ in iter_pages(reader, source, workers, backend, pages):
+        yield text
+
+
+def extract_text_from_pdf(pdf_path, workers=1, backend=DEFAULT_BACKEND, pages=None):
+    """Texto do PDF (ou só das páginas em pages, ex.: "1-3,10")."""
     try:
         with open(pdf_path, "rb") as file:
             reader = PyPDF2.PdfReader(file)
-            for page_num in range(len(reader.pages)):
-                page = reader.pages[page_num]
-                text += page.extract_text()
-        return text
+            indices = parse_page_ranges(pages, len(reader.pages)) if pages else None
+            return "".join(iter_page_texts(reader, pdf_path, workers, backend, indices))
     except FileNotFoundError:
         return f"Erro: O arquivo {pdf_path} não foi encontrado."
     except Exception as e:
         return f"Erro ao processar o PDF: {e}"
 
-if __name__ == "__main__":
-    if len(sys.argv) < 2:
+
+def stream_pages(pdf_path, out=sys.stdout, workers=1, backend=DEFAULT_BACKEND, pages=None):
+    """
+    Escreve uma linha JSON por página assim que ela é extraída, com
+    "page" (a partir de 1), "text", "chars" e "ms". Erros saem como uma
+    linha {"error": ...}. Retorna quantas páginas foram escritas.
+    """
+    written = 0
+    try:
+        with open(pdf_path, "rb") as file:
+            reader = PyPDF2.PdfReader(file)
+            indices = parse_page_ranges(pages, len(reader.pages)) if pages else None
+            for i, text, ms in iter_pages(reader, pdf_path, workers, backend, indices, timed=True):
+                line = {"page": i + 1, "text": text, "chars": len(text), "ms": ms}
+                out.write(json.dumps(line, ensure_ascii=False, separators=(",", ":")) + "\n")
+                out.flush()
+                written += 1
+    except FileNotFoundError:
+        error = f"Erro: O arquivo {pdf_path} não foi encontrado."
+    except Exception as e:
+        error = f"Erro ao processar o PDF: {e}"
+    else:
+        return written
+    out.write(json.dumps({"error": error}, ensure_ascii=False) + "\n")
+    out.flush()
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Extrai o texto de um PDF.")
+    parser.add_argument("pdf", nargs="?", help="caminho do PDF")
+    parser.add_argument("--workers", type=int, default=1, help="processos para extrair páginas em paralelo")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default=DEFAULT_BACKEND,
+                        help="como extrair o texto: full (PyPDF2, o padrão), fast (content stream, com "
+                             "fallback) ou auto (fast quando confere com o full nas primeiras páginas)")
+    parser.add_argument("--pages", help='só estas páginas, ex.: "1-3,10" ou "20-"')
+    parser.add_argument("--ndjson", action="store_true",
+                        help="uma linha JSON por página (page, text, chars, ms) assim que cada uma fica pronta")
+    args = parser.parse_args(argv)
+
+    if not args.pdf:
         print("Uso: python3 extract_pdf_text.py <caminho_do_pdf>")
+    elif args.ndjson:
+        stream_pages(args.pdf, sys.stdout, args.workers, args.backend, args.pages)
     else:
-        pdf_file_path = sys.argv[1]
-        extracted_text = extract_text_from_pdf(pdf_file_path)
+        extracted_text = extract_text_from_pdf(args.pdf, args.workers, args.backend, args.pages)
         print(extracted_text)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,4 @@
-import os
-import re
+from codemod_engine import BASE_DIR, Rule, RuleSet, run
 
 # Cores Alvo
 ROSA_LA = "#da1069"
@@ -20,9 +19,9 @@ replacements = [
     (r"bg-primary(?!\/)", f"bg-gradient-to-r from-[{ROSA_LA}] to-[{AZUL_ALVO}]"),
     (r"bg-accent(?!\/)", f"bg-gradient-to-r from-[{ROSA_LA}] to-[{AZUL_ALVO}]"),
     
-    # 3. Corrigir hovers
-    (r"hover:bg-primary", f"hover:from-[{ROSA_HOVER}] hover:to-[{AZUL_HOVER}]"),
-    (r"hover:bg-accent", f"hover:from-[{ROSA_HOVER}] hover:to-[{AZUL_HOVER}]"),
+    # 3. Corrigir hovers (sem "/" depois, o bg-primary/bg-accent já foi trocado acima)
+    (r"hover:bg-primary(?=\/)", f"hover:from-[{ROSA_HOVER}] hover:to-[{AZUL_HOVER}]"),
+    (r"hover:bg-accent(?=\/)", f"hover:from-[{ROSA_HOVER}] hover:to-[{AZUL_HOVER}]"),
     
     # 4. Substituir degradês manuais no CSS
     (r"linear-gradient\(135deg, #da1069 0%, #da1069 100%\)", DEGRADE_NOVO),
@@ -31,35 +30,16 @@ replacements = [
     # 5. Corrigir sombras
     (r"shadow-primary\/20", f"shadow-blue-500/30"),
     (r"shadow-accent\/20", f"shadow-blue-500/30"),
-]
 
-def fix_file(filepath):
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        new_content = content
-        for pattern, replacement in replacements:
-            new_content = re.sub(pattern, replacement, new_content)
-        
-        # Caso especial para o index.css para garantir as variáveis root
-        if "index.css" in filepath:
-            new_content = new_content.replace("--gradient-button: linear-gradient(135deg, #8b5cf6 0%, #da1069 100%);", 
-                                             f"--gradient-button: {DEGRADE_NOVO};")
+    # Caso especial para o index.css para garantir as variáveis root
+    Rule("--gradient-button: linear-gradient(135deg, #8b5cf6 0%, #da1069 100%);",
+         f"--gradient-button: {DEGRADE_NOVO};", literal=True, path="index.css"),
+]
 
-        if new_content != content:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(new_content)
-            print(f"Final Fix Applied: {filepath}")
-    except Exception as e:
-        print(f"Error: {e}")
+RULES = RuleSet("final_global_fix", replacements, message="Final Fix Applied")
 
 def main():
-    base_dir = "/var/www/faculdade-site/client/src"
-    for root, dirs, files in os.walk(base_dir):
-        for file in files:
-            if file.endswith(('.tsx', '.ts', '.css')):
-                fix_file(os.path.join(root, file))
+    run(RULES, BASE_DIR)
 
 if __name__ == "__main__":
     main()
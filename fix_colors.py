@@ -1,5 +1,4 @@
-import os
-import re
+from codemod_engine import BASE_DIR, RuleSet, run
 
 # Definições de cores
 ROXO_ESCURO = "#9d197d"
@@ -27,37 +26,14 @@ replacements = [
     (r"purple-200", "pink-200"),
     (r"purple-100", "pink-100"),
     (r"purple-50", "pink-50"),
-    (r"via-purple-500", "via-pink-500"),
-    (r"to-purple-600", f"to-[{ROSA_LA}]"),
-    (r"from-purple-500", "from-pink-500"),
-    (r"text-purple-700", "text-pink-700"),
-    (r"text-purple-500", "text-pink-500"),
-    (r"bg-purple-500", "bg-pink-500"),
-    (r"border-purple-500", "border-pink-500"),
-    (r"hover:text-purple-700", "hover:text-pink-700"),
-    (r"hover:bg-purple-50", "hover:bg-pink-50"),
-    (r"hover:border-purple-300", "hover:border-pink-300"),
+    # As variantes com prefixo (via-, to-, text-, hover:...) já são cobertas
+    # pelas trocas purple-N -> pink-N acima
 ]
 
-def fix_file(filepath):
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    new_content = content
-    for pattern, replacement in replacements:
-        new_content = re.sub(pattern, replacement, new_content)
-    
-    if new_content != content:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(new_content)
-        print(f"Fixed: {filepath}")
+RULES = RuleSet("fix_colors", replacements, message="Fixed")
 
 def main():
-    base_dir = "/var/www/faculdade-site/client/src"
-    for root, dirs, files in os.walk(base_dir):
-        for file in files:
-            if file.endswith(('.tsx', '.ts', '.css')):
-                fix_file(os.path.join(root, file))
+    run(RULES, BASE_DIR)
 
 if __name__ == "__main__":
     main()
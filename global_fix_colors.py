@@ -1,5 +1,4 @@
-import os
-import re
+from codemod_engine import BASE_DIR, Rule, RuleSet, run
 
 # Cores Alvo
 ROSA_LA = "#da1069"
@@ -29,36 +28,17 @@ replacements = [
     # Sombras relacionadas
     (r"shadow-pink-500/50", f"shadow-blue-500/30"),
     (r"shadow-purple-500/50", f"shadow-blue-500/30"),
-]
 
-def fix_file(filepath):
-    try:
-        with open(filepath, 'r', encoding='utf-8') as f:
-            content = f.read()
-        
-        new_content = content
-        for pattern, replacement in replacements:
-            new_content = re.sub(pattern, replacement, new_content)
-        
-        # Caso especial para o componente Button que pode ter sido alterado parcialmente
-        if "button.tsx" in filepath:
-            new_content = re.sub(r'gradient: "bg-gradient-to-br from-.* to-.*"', 
-                               f'gradient: "bg-gradient-to-br from-[{ROSA_LA}] to-[{AZUL_ALVO}] text-white hover:from-[{ROSA_HOVER}] hover:to-[{AZUL_HOVER}] hover:shadow-lg hover:shadow-blue-500/30 hover:-translate-y-0.5"', 
-                               new_content)
+    # Caso especial para o componente Button que pode ter sido alterado parcialmente
+    Rule(r'gradient: "bg-gradient-to-br from-.* to-.*"',
+         f'gradient: "bg-gradient-to-br from-[{ROSA_LA}] to-[{AZUL_ALVO}] text-white hover:from-[{ROSA_HOVER}] hover:to-[{AZUL_HOVER}] hover:shadow-lg hover:shadow-blue-500/30 hover:-translate-y-0.5"',
+         path="button.tsx"),
+]
 
-        if new_content != content:
-            with open(filepath, 'w', encoding='utf-8') as f:
-                f.write(new_content)
-            print(f"Global Fix: {filepath}")
-    except Exception as e:
-        print(f"Error fixing {filepath}: {e}")
+RULES = RuleSet("global_fix_colors", replacements, message="Global Fix")
 
 def main():
-    base_dir = "/var/www/faculdade-site/client/src"
-    for root, dirs, files in os.walk(base_dir):
-        for file in files:
-            if file.endswith(('.tsx', '.ts', '.css')):
-                fix_file(os.path.join(root, file))
+    run(RULES, BASE_DIR)
 
 if __name__ == "__main__":
     main()
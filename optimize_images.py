@@ -0,0 +1,280 @@
+"""
+Gera versões otimizadas (WebP/AVIF, várias larguras) das imagens de
+client/public, em paralelo e de forma incremental.
+
+Para cada PNG/JPEG (e WebP sem original PNG/JPEG ao lado) de client/public:
+  - gera variantes em WIDTHS (só as menores que a imagem, mais a largura
+    original limitada à maior de WIDTHS), em WebP e, se o Pillow tiver
+    suporte, AVIF;
+  - grava em client/public/optimized/<caminho>/<nome>-<largura>.<hash>.<formato>,
+    com o hash do conteúdo da origem no nome (cache longo sem risco de
+    servir versão antiga);
+  - registra tudo em client/public/optimized/manifest.json, que o front-end
+    usa para montar srcset/<picture>:
+
+    {"images": {"images/blog/foo.png": {"width": 1600, "height": 900,
+        "srcset": {"avif": "/optimized/... 320w, ...", "webp": "..."},
+        "variants": [{"format": "webp", "width": 320, "height": 180,
+                      "src": "/optimized/...", "bytes": 9123}, ...]}}}
+
+Origens inalteradas (mesmo conteúdo e mesmas configurações) são puladas:
+o manifesto guarda mtime/tamanho/sha256 de cada origem, e o sha256 só é
+recalculado quando o mtime muda. Variantes de origens alteradas ou
+removidas são apagadas.
+
+Uso:
+  python3 optimize_images.py [--root client/public] [--workers N] [--force] [--dry-run]
+"""
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from codemod_engine import BASE_DIR, write_atomic
+
+PUBLIC_DIR = os.path.join(os.path.dirname(BASE_DIR), "public")
+OUTPUT_DIRNAME = "optimized"
+MANIFEST_NAME = "manifest.json"
+MANIFEST_FORMAT = 1
+
+SOURCE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+WIDTHS = (320, 640, 960, 1280, 1920)
+
+# formato -> (extensão, opções do Image.save)
+FORMATS = {
+    "avif": (".avif", {"quality": 55, "speed": 6}),
+    "webp": (".webp", {"quality": 80, "method": 5}),
+}
+
+
+def available_formats():
+    from PIL import features
+
+    return [name for name in FORMATS if features.check(name)]
+
+
+def settings_key(formats):
+    """Muda quando larguras/formatos/qualidade mudam: força regerar tudo."""
+    data = json.dumps([WIDTHS, [(name, FORMATS[name]) for name in formats]], sort_keys=True)
+    return hashlib.sha256(data.encode("utf-8")).hexdigest()[:12]
+
+
+def target_widths(width):
+    widths = [w for w in WIDTHS if w < width]
+    widths.append(min(width, WIDTHS[-1]))
+    return sorted(set(widths))
+
+
+def iter_sources(root):
+    """Imagens de origem de root (relpath), fora do diretório de saída."""
+    output_dir = os.path.join(root, OUTPUT_DIRNAME)
+    for dirpath, dirs, files in os.walk(root):
+        if os.path.abspath(dirpath) == os.path.abspath(root):
+            dirs[:] = [d for d in dirs if d != OUTPUT_DIRNAME]
+        dirs.sort()
+        stems = {os.path.splitext(name)[0] for name in files
+                 if name.lower().endswith(SOURCE_EXTENSIONS)}
+        for name in sorted(files):
+            stem, ext = os.path.splitext(name)
+            ext = ext.lower()
+            # WebP feito à mão ao lado do PNG/JPEG: a origem é o original
+            if ext in SOURCE_EXTENSIONS or (ext == ".webp" and stem not in stems):
+                filepath = os.path.join(dirpath, name)
+                if not filepath.startswith(output_dir + os.sep):
+                    yield os.path.relpath(filepath, root)
+
+
+# ============================================================
+# MANIFESTO
+# ============================================================
+
+def manifest_path(root):
+    return os.path.join(root, OUTPUT_DIRNAME, MANIFEST_NAME)
+
+
+def load_manifest(path):
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+    if manifest.get("format") != MANIFEST_FORMAT:
+        return {}
+    return manifest.get("images", {})
+
+
+def save_manifest(path, images):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = json.dumps({"format": MANIFEST_FORMAT, "images": images}, indent=1, sort_keys=True, ensure_ascii=False)
+    write_atomic(path, data.encode("utf-8"))
+
+
+def _sha256(filepath):
+    h = hashlib.sha256()
+    with open(filepath, "rb") as f:
+        for chunk in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+def _is_current(entry, st, key, filepath, root):
+    """True se a origem não mudou e todas as variantes ainda existem."""
+    if not entry or entry.get("settings") != key or entry.get("size") != st.st_size:
+        return False
+    if entry.get("mtime") != st.st_mtime_ns and _sha256(filepath) != entry.get("sha256"):
+        return False
+    return all(os.path.exists(os.path.join(root, variant["src"].lstrip("/")))
+               for variant in entry.get("variants", []))
+
+
+def _variant_files(entry, root):
+    return {os.path.join(root, variant["src"].lstrip("/")) for variant in entry.get("variants", [])}
+
+
+# ============================================================
+# TRANSCODIFICAÇÃO
+# ============================================================
+
+def _open_image(filepath):
+    from PIL import Image, ImageOps
+
+    image = Image.open(filepath)
+    image = ImageOps.exif_transpose(image)
+    has_alpha = image.mode in ("RGBA", "LA", "PA") or (image.mode == "P" and "transparency" in image.info)
+    return image.convert("RGBA" if has_alpha else "RGB")
+
+
+def transcode(root, relpath, formats, key):
+    """
+    Worker: gera as variantes de uma origem e devolve a entrada do
+    manifesto (ou {"error": ...}).
+    """
+    from PIL import Image
+
+    filepath = os.path.join(root, relpath)
+    try:
+        st = os.stat(filepath)
+        sha256 = _sha256(filepath)
+        image = _open_image(filepath)
+        width, height = image.size
+        stem = os.path.splitext(relpath)[0].replace(os.sep, "/")
+        variants = []
+        for target in target_widths(width):
+            if target == width:
+                resized = image
+            else:
+                resized = image.resize((target, max(1, round(height * target / width))), Image.LANCZOS)
+            for name in formats:
+                ext, options = FORMATS[name]
+                src = f"/{OUTPUT_DIRNAME}/{stem}-{target}.{sha256[:10]}{ext}"
+                out_path = os.path.join(root, src.lstrip("/"))
+                os.makedirs(os.path.dirname(out_path), exist_ok=True)
+                tmp_path = f"{out_path}.tmp{os.getpid()}"
+                resized.save(tmp_path, format=name.upper(), **options)
+                os.replace(tmp_path, out_path)
+                variants.append({"format": name, "width": target, "height": resized.size[1],
+                                 "src": src, "bytes": os.path.getsize(out_path)})
+    except Exception as e:
+        return {"error": str(e)}
+
+    return {
+        "mtime": st.st_mtime_ns, "size": st.st_size, "sha256": sha256, "settings": key,
+        "width": width, "height": height,
+        "srcset": {name: ", ".join(f"{v['src']} {v['width']}w" for v in variants if v["format"] == name)
+                   for name in formats},
+        "variants": variants,
+    }
+
+
+def _transcode_args(args):
+    return transcode(*args)
+
+
+def run(root=PUBLIC_DIR, workers=None, force=False, dry_run=False):
+    """
+    Otimiza as imagens novas/alteradas de root e atualiza o manifesto.
+    Retorna (geradas, puladas, com_erro).
+    """
+    formats = available_formats()
+    if "webp" not in formats:
+        raise RuntimeError("Pillow sem suporte a WebP.")
+    if "avif" not in formats:
+        print("Aviso: Pillow sem suporte a AVIF; gerando só WebP.", file=sys.stderr)
+    key = settings_key(formats)
+    path = manifest_path(root)
+    previous = load_manifest(path)
+
+    images = {}
+    pending = []
+    for relpath in iter_sources(root):
+        st = os.stat(os.path.join(root, relpath))
+        entry = previous.get(relpath)
+        if not force and _is_current(entry, st, key, os.path.join(root, relpath), root):
+            images[relpath] = entry if entry["mtime"] == st.st_mtime_ns else dict(entry, mtime=st.st_mtime_ns)
+        else:
+            pending.append(relpath)
+
+    skipped = len(images)
+    if dry_run:
+        for relpath in pending:
+            print(f"[dry-run] {relpath}")
+        return len(pending), skipped, 0
+
+    failed = 0
+    jobs = [(root, relpath, formats, key) for relpath in pending]
+    workers = workers or os.cpu_count() or 1
+    if workers > 1 and len(jobs) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_transcode_args, jobs))
+    else:
+        results = [_transcode_args(job) for job in jobs]
+
+    for relpath, entry in zip(pending, results):
+        if "error" in entry:
+            failed += 1
+            print(f"Erro ao otimizar {relpath}: {entry['error']}", file=sys.stderr)
+            if relpath in previous:
+                images[relpath] = previous[relpath]
+            continue
+        images[relpath] = entry
+        largest = [v["bytes"] for v in entry["variants"] if v["width"] == entry["variants"][-1]["width"]]
+        print(f"{relpath}: {len(entry['variants'])} variante(s), "
+              f"{entry['size'] // 1024} KB -> {min(largest) // 1024} KB")
+
+    # Variantes que não pertencem mais a nenhuma origem (origem alterada ou removida)
+    keep = set()
+    for entry in images.values():
+        keep |= _variant_files(entry, root)
+    for entry in previous.values():
+        for filepath in _variant_files(entry, root) - keep:
+            if os.path.exists(filepath):
+                os.remove(filepath)
+
+    save_manifest(path, images)
+    return len(pending) - failed, skipped, failed
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Gera variantes WebP/AVIF responsivas das imagens públicas.")
+    parser.add_argument("--root", default=PUBLIC_DIR, help="diretório público (padrão: client/public)")
+    parser.add_argument("--workers", type=int, default=None, help="processos (padrão: número de CPUs)")
+    parser.add_argument("--force", action="store_true", help="regera tudo, ignorando o manifesto")
+    parser.add_argument("--dry-run", action="store_true", help="só lista o que seria gerado")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        generated, skipped, failed = run(args.root, args.workers, args.force, args.dry_run)
+    except Exception as e:
+        print(json.dumps({"error": str(e)}, ensure_ascii=False))
+        return 1
+    print(f"{generated} imagem(ns) otimizada(s), {skipped} sem mudança, {failed} com erro, "
+          f"em {time.perf_counter() - start:.1f}s", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,519 @@
+"""
+Consolidação incremental da tabela pageviews em resumos diários.
+
+O painel de analytics (server/analyticsRouter.ts) conta visualizações e
+visitantes únicos (COUNT(DISTINCT userAgent)) direto na tabela bruta
+pageviews, que só cresce. Este job lê apenas as linhas novas, a partir da
+marca d'água (último id/viewedAt consolidado), e mantém:
+
+  pageviews_daily_paths      (day, path)      views + sketch de visitantes
+  pageviews_daily_referrers  (day, referrer)  views + sketch de visitantes
+  pageviews_rollup_state     marca d'água (lastId, lastViewedAt)
+  pageviews_rollup_gaps      ids abaixo da marca que ainda não apareceram
+
+Com inserções concorrentes, uma linha de id menor pode ser confirmada
+depois que um id maior já foi consolidado. Os ids pulados ao avançar a
+marca ficam registrados como lacunas; cada execução relê só os ids das
+lacunas (WHERE id IN ...) e conta os que apareceram, e o --max-rows vale
+apenas para as linhas acima da marca. Lacunas que ficam mais de
+LATE_ROW_WINDOW ids atrás da marca são descartadas (transações desfeitas,
+saltos do auto_increment).
+
+Os visitantes únicos ficam em sketches HyperLogLog (~2% de erro), que
+podem ser unidos: visitantes de um período ou de todas as páginas saem
+da união dos sketches diários, sem voltar à tabela bruta.
+
+As linhas são lidas com um cursor não-bufferizado (streaming do servidor)
+e agregadas em memória só por (dia, chave); a cada FLUSH_ROWS linhas, ou
+quando há FLUSH_KEYS chaves pendentes, os resumos são gravados com um
+INSERT multi-linha ... ON DUPLICATE KEY UPDATE na mesma transação que
+avança a marca d'água. A memória não depende do tamanho da tabela, e uma
+falha no meio perde no máximo o lote em andamento (que é relido depois).
+
+O job cria as próprias tabelas (CREATE TABLE IF NOT EXISTS). Conexão:
+DATABASE_URL (mysql_pool).
+
+Uso:
+  python3 pageviews_rollup.py run [--rebuild] [--max-rows N]
+  python3 pageviews_rollup.py stats [--start AAAA-MM-DD] [--end AAAA-MM-DD] [--limit 10]
+"""
+import argparse
+import datetime
+import hashlib
+import json
+import math
+import sys
+import time
+import zlib
+
+import mysql_pool
+
+STATE_NAME = "pageviews"
+LOCK_NAME = "faculdade.pageviews_rollup"
+
+# Linhas lidas / chaves (dia, path|referrer) pendentes antes de gravar um lote
+FLUSH_ROWS = 100_000
+FLUSH_KEYS = 5_000
+
+# Linhas por INSERT / por consulta de sketches existentes
+WRITE_CHUNK_ROWS = 500
+
+# Até quantos ids abaixo da marca d'água uma linha atrasada ainda é aceita
+LATE_ROW_WINDOW = 5_000
+
+DDL = (
+    """CREATE TABLE IF NOT EXISTS `pageviews_rollup_state` (
+        `name` varchar(50) NOT NULL,
+        `lastId` int NOT NULL DEFAULT 0,
+        `lastViewedAt` timestamp NULL,
+        `updatedAt` timestamp NOT NULL DEFAULT CURRENT_TIMESTAMP ON UPDATE CURRENT_TIMESTAMP,
+        CONSTRAINT `pageviews_rollup_state_name` PRIMARY KEY(`name`)
+    )""",
+    """CREATE TABLE IF NOT EXISTS `pageviews_daily_paths` (
+        `day` date NOT NULL,
+        `path` varchar(500) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+        `views` int NOT NULL DEFAULT 0,
+        `visitors` blob NOT NULL,
+        CONSTRAINT `pageviews_daily_paths_day_path` PRIMARY KEY(`day`, `path`)
+    )""",
+    """CREATE TABLE IF NOT EXISTS `pageviews_daily_referrers` (
+        `day` date NOT NULL,
+        `referrer` varchar(500) CHARACTER SET utf8mb4 COLLATE utf8mb4_bin NOT NULL,
+        `views` int NOT NULL DEFAULT 0,
+        `visitors` blob NOT NULL,
+        CONSTRAINT `pageviews_daily_referrers_day_referrer` PRIMARY KEY(`day`, `referrer`)
+    )""",
+    """CREATE TABLE IF NOT EXISTS `pageviews_rollup_gaps` (
+        `id` int NOT NULL,
+        CONSTRAINT `pageviews_rollup_gaps_id` PRIMARY KEY(`id`)
+    )""",
+)
+
+# Tabela de resumo -> coluna da chave. Referrer vazio ("") = acesso direto.
+SUMMARY_TABLES = {
+    "pageviews_daily_paths": "path",
+    "pageviews_daily_referrers": "referrer",
+}
+
+
+# ============================================================
+# SKETCH DE VISITANTES ÚNICOS (HyperLogLog)
+# ============================================================
+
+class HyperLogLog:
+    """
+    HyperLogLog com 2**p registradores de 1 byte e hash de 64 bits
+    (blake2b). p=11 dá erro padrão de ~2,3% com 2 KB por sketch, que
+    ficam bem menores compactados (zlib) enquanto o sketch é esparso.
+    """
+
+    __slots__ = ("p", "registers")
+
+    P = 11
+
+    def __init__(self, registers=None, p=P):
+        self.p = p
+        self.registers = bytearray(registers) if registers is not None else bytearray(1 << p)
+
+    @staticmethod
+    def hash(value):
+        return int.from_bytes(hashlib.blake2b(value.encode("utf-8", "surrogatepass"), digest_size=8).digest(), "big")
+
+    def add(self, value):
+        self.add_hash(self.hash(value))
+
+    def add_hash(self, h):
+        bits = 64 - self.p
+        index = h >> bits
+        rank = bits - (h & ((1 << bits) - 1)).bit_length() + 1
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other):
+        """União com outro sketch (registrador a registrador, o maior)."""
+        self.registers = bytearray(map(max, self.registers, other.registers))
+        return self
+
+    def count(self):
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / math.fsum(2.0 ** -r for r in self.registers)
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)  # correção para cardinalidades pequenas
+        return int(round(estimate))
+
+    def to_bytes(self):
+        return zlib.compress(bytes(self.registers), 6)
+
+    @classmethod
+    def from_bytes(cls, data):
+        return cls(zlib.decompress(data))
+
+
+def visitor_key(user_agent, session_id):
+    """Mesmo critério do painel (userAgent), preferindo sessionId quando existir."""
+    return session_id or user_agent or None
+
+
+# ============================================================
+# AGREGAÇÃO EM MEMÓRIA
+# ============================================================
+
+class DailyRollup:
+    """
+    Acumula views e sketches por (dia, chave) para cada tabela de resumo.
+    As linhas chegam em ordem de id; as de id até a marca d'água só contam
+    se preencherem uma lacuna (gaps), e os ids pulados viram lacunas novas.
+    """
+
+    def __init__(self, last_id=0, last_viewed_at=None, gaps=()):
+        self.pending = {table: {} for table in SUMMARY_TABLES}
+        self.rows = 0
+        self.last_id = last_id
+        self.last_viewed_at = last_viewed_at
+        self.gaps = set(gaps)
+        # Desde o último lote gravado: lacunas preenchidas e lacunas novas
+        self.filled = set()
+        self.new_gaps = set()
+
+    @property
+    def keys(self):
+        return sum(len(entries) for entries in self.pending.values())
+
+    def add(self, row_id, path, referrer, user_agent, session_id, viewed_at):
+        """Conta a linha; False se ela já tinha sido consolidada."""
+        if row_id <= self.last_id:
+            if row_id not in self.gaps:
+                return False
+            self.gaps.discard(row_id)
+            self.filled.add(row_id)
+        else:
+            if row_id > self.last_id + 1:
+                missing = range(max(self.last_id + 1, row_id - LATE_ROW_WINDOW), row_id)
+                self.gaps.update(missing)
+                self.new_gaps.update(missing)
+            self.last_id = row_id
+            self.last_viewed_at = viewed_at
+        day = viewed_at.date()
+        visitor = visitor_key(user_agent, session_id)
+        visitor_hash = HyperLogLog.hash(visitor) if visitor else None
+        for table, key in (("pageviews_daily_paths", path),
+                           ("pageviews_daily_referrers", referrer or "")):
+            entry = self.pending[table].get((day, key))
+            if entry is None:
+                entry = self.pending[table][(day, key)] = [0, HyperLogLog()]
+            entry[0] += 1
+            if visitor_hash is not None:
+                entry[1].add_hash(visitor_hash)
+        self.rows += 1
+        return True
+
+    def clear(self):
+        for entries in self.pending.values():
+            entries.clear()
+        self.rows = 0
+        self.filled.clear()
+        self.new_gaps.clear()
+
+
+# ============================================================
+# BANCO
+# ============================================================
+
+def ensure_schema(conn):
+    cursor = conn.cursor()
+    try:
+        for statement in DDL:
+            cursor.execute(statement)
+    finally:
+        cursor.close()
+
+
+def read_watermark(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT lastId, lastViewedAt FROM pageviews_rollup_state WHERE name = %s", (STATE_NAME,))
+        row = cursor.fetchone()
+    finally:
+        cursor.close()
+    return (row[0], row[1]) if row else (0, None)
+
+
+def read_gaps(conn, last_id):
+    """Lacunas ainda dentro da janela LATE_ROW_WINDOW abaixo de last_id."""
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT id FROM pageviews_rollup_gaps WHERE id > %s", (last_id - LATE_ROW_WINDOW,))
+        return {row[0] for row in cursor.fetchall()}
+    finally:
+        cursor.close()
+
+
+def _write_gaps(cursor, rollup):
+    """Atualiza as lacunas: tira as preenchidas, grava as novas e esquece as antigas."""
+    filled = sorted(rollup.filled)
+    for start in range(0, len(filled), WRITE_CHUNK_ROWS):
+        chunk = filled[start:start + WRITE_CHUNK_ROWS]
+        cursor.execute("DELETE FROM pageviews_rollup_gaps WHERE id IN (" + ", ".join(["%s"] * len(chunk)) + ")",
+                       chunk)
+    new_gaps = sorted(rollup.new_gaps)
+    for start in range(0, len(new_gaps), WRITE_CHUNK_ROWS):
+        chunk = new_gaps[start:start + WRITE_CHUNK_ROWS]
+        cursor.execute("INSERT IGNORE INTO pageviews_rollup_gaps (id) VALUES " + ", ".join(["(%s)"] * len(chunk)),
+                       chunk)
+    cursor.execute("DELETE FROM pageviews_rollup_gaps WHERE id <= %s", (rollup.last_id - LATE_ROW_WINDOW,))
+    rollup.gaps = {gap for gap in rollup.gaps if gap > rollup.last_id - LATE_ROW_WINDOW}
+
+
+def _merge_existing(cursor, table, column, entries):
+    """Une os sketches pendentes com os já gravados para as mesmas chaves."""
+    keys = list(entries)
+    for start in range(0, len(keys), WRITE_CHUNK_ROWS):
+        chunk = keys[start:start + WRITE_CHUNK_ROWS]
+        placeholders = ", ".join(["(%s, %s)"] * len(chunk))
+        cursor.execute(
+            f"SELECT day, `{column}`, views, visitors FROM `{table}` "
+            f"WHERE (day, `{column}`) IN ({placeholders}) FOR UPDATE",
+            [value for key in chunk for value in key],
+        )
+        for day, key, views, visitors in cursor.fetchall():
+            entry = entries.get((day, key))
+            if entry is not None:
+                entry[0] += views
+                entry[1].merge(HyperLogLog.from_bytes(visitors))
+
+
+def flush(conn, rollup):
+    """
+    Grava os resumos pendentes, as lacunas e a nova marca d'água, tudo na
+    transação aberta em conn (quem chama faz commit).
+    """
+    cursor = conn.cursor()
+    try:
+        for table, column in SUMMARY_TABLES.items():
+            entries = rollup.pending[table]
+            if not entries:
+                continue
+            _merge_existing(cursor, table, column, entries)
+            rows = [(day, key, views, sketch.to_bytes()) for (day, key), (views, sketch) in entries.items()]
+            for start in range(0, len(rows), WRITE_CHUNK_ROWS):
+                chunk = rows[start:start + WRITE_CHUNK_ROWS]
+                cursor.execute(
+                    f"INSERT INTO `{table}` (day, `{column}`, views, visitors) VALUES "
+                    + ", ".join(["(%s, %s, %s, %s)"] * len(chunk))
+                    + " ON DUPLICATE KEY UPDATE views = VALUES(views), visitors = VALUES(visitors)",
+                    [value for row in chunk for value in row],
+                )
+        _write_gaps(cursor, rollup)
+        cursor.execute(
+            "INSERT INTO pageviews_rollup_state (name, lastId, lastViewedAt) VALUES (%s, %s, %s) "
+            "ON DUPLICATE KEY UPDATE lastId = VALUES(lastId), lastViewedAt = VALUES(lastViewedAt)",
+            (STATE_NAME, rollup.last_id, rollup.last_viewed_at),
+        )
+    finally:
+        cursor.close()
+
+
+def _try_lock(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT GET_LOCK(%s, 0)", (LOCK_NAME,))
+        return cursor.fetchone()[0] == 1
+    finally:
+        cursor.close()
+
+
+def _release_lock(conn):
+    cursor = conn.cursor()
+    try:
+        cursor.execute("SELECT RELEASE_LOCK(%s)", (LOCK_NAME,))
+        cursor.fetchone()
+    finally:
+        cursor.close()
+
+
+def rebuild(conn):
+    """Apaga os resumos e a marca d'água: a próxima execução relê tudo."""
+    cursor = conn.cursor()
+    try:
+        for table in SUMMARY_TABLES:
+            cursor.execute(f"DELETE FROM `{table}`")
+        cursor.execute("DELETE FROM pageviews_rollup_state WHERE name = %s", (STATE_NAME,))
+        cursor.execute("DELETE FROM pageviews_rollup_gaps")
+    finally:
+        cursor.close()
+    conn.commit()
+
+
+_SELECT_ROWS = "SELECT id, path, referrer, userAgent, sessionId, viewedAt FROM pageviews"
+
+
+def _consume(reader, sql, params, rollup, url):
+    """
+    Lê as linhas de sql sem buffer e grava um lote a cada FLUSH_ROWS linhas
+    ou FLUSH_KEYS chaves. Retorna (linhas gravadas, lotes gravados); o que
+    sobra fica pendente em rollup.
+    """
+    total = flushes = 0
+    # Sem buffer: as linhas chegam do servidor conforme são lidas
+    cursor = reader.cursor(buffered=False)
+    try:
+        cursor.execute(sql, params)
+        while True:
+            batch = cursor.fetchmany(1000)
+            if not batch:
+                break
+            for row in batch:
+                rollup.add(*row)
+            if rollup.rows >= FLUSH_ROWS or rollup.keys >= FLUSH_KEYS:
+                total += rollup.rows
+                # A conexão de leitura está ocupada pelo streaming:
+                # os lotes vão por outra conexão do pool.
+                with mysql_pool.transaction(url) as writer:
+                    flush(writer, rollup)
+                rollup.clear()
+                flushes += 1
+    finally:
+        cursor.close()
+    return total, flushes
+
+
+def run(max_rows=None, rebuild_first=False, url=None):
+    """
+    Consolida as linhas novas de pageviews. Retorna um dicionário com as
+    linhas lidas, os lotes gravados e a nova marca d'água.
+    """
+    start = time.perf_counter()
+    with mysql_pool.connection(url) as reader:
+        ensure_schema(reader)
+        if not _try_lock(reader):
+            raise RuntimeError("Outra consolidação de pageviews está em andamento.")
+        try:
+            if rebuild_first:
+                rebuild(reader)
+            last_id, last_viewed_at = read_watermark(reader)
+            gaps = sorted(read_gaps(reader, last_id))
+            reader.commit()
+
+            rollup = DailyRollup(last_id, last_viewed_at, gaps)
+            total = flushes = 0
+            # Linhas atrasadas: só os ids das lacunas, fora do --max-rows
+            for start in range(0, len(gaps), WRITE_CHUNK_ROWS):
+                chunk = gaps[start:start + WRITE_CHUNK_ROWS]
+                sql = f"{_SELECT_ROWS} WHERE id IN ({', '.join(['%s'] * len(chunk))}) ORDER BY id"
+                rows, batches = _consume(reader, sql, chunk, rollup, url)
+                total += rows
+                flushes += batches
+
+            sql = f"{_SELECT_ROWS} WHERE id > %s ORDER BY id"
+            params = [last_id]
+            if max_rows:
+                sql += " LIMIT %s"
+                params.append(max_rows)
+            rows, batches = _consume(reader, sql, params, rollup, url)
+            total += rows
+            flushes += batches
+
+            if rollup.rows or rollup.new_gaps:
+                total += rollup.rows
+                with mysql_pool.transaction(url) as writer:
+                    flush(writer, rollup)
+                flushes += 1
+            reader.commit()
+        finally:
+            _release_lock(reader)
+
+    return {
+        "rows": total,
+        "flushes": flushes,
+        "lastId": rollup.last_id,
+        "lastViewedAt": rollup.last_viewed_at.isoformat() if rollup.last_viewed_at else None,
+        "elapsedMs": round((time.perf_counter() - start) * 1000, 1),
+    }
+
+
+# ============================================================
+# CONSULTAS (equivalentes a getStats / getTopPages)
+# ============================================================
+
+def _date_filter(start_date, end_date):
+    conditions, params = [], []
+    if start_date:
+        conditions.append("day >= %s")
+        params.append(start_date)
+    if end_date:
+        conditions.append("day <= %s")
+        params.append(end_date)
+    return (" WHERE " + " AND ".join(conditions) if conditions else ""), params
+
+
+def stats(start_date=None, end_date=None, limit=10, url=None):
+    """
+    Totais do período a partir dos resumos diários: views, visitantes
+    únicos (união dos sketches), páginas por visitante e páginas/origens
+    mais acessadas.
+    """
+    where, params = _date_filter(start_date, end_date)
+    visitors = HyperLogLog()
+    totals = {}
+    with mysql_pool.connection(url) as conn:
+        cursor = conn.cursor()
+        try:
+            for table, column in SUMMARY_TABLES.items():
+                cursor.execute(f"SELECT `{column}`, views, visitors FROM `{table}`{where}", params)
+                by_key = totals[table] = {}
+                for key, views, sketch in cursor:
+                    by_key[key] = by_key.get(key, 0) + views
+                    if table == "pageviews_daily_paths":
+                        visitors.merge(HyperLogLog.from_bytes(sketch))
+        finally:
+            cursor.close()
+
+    total_views = sum(totals["pageviews_daily_paths"].values())
+    unique_visitors = visitors.count()
+
+    def top(table, label):
+        ranked = sorted(totals[table].items(), key=lambda item: item[1], reverse=True)[:limit]
+        return [{label: key, "views": views, "percentage": round(views / (total_views or 1) * 100)}
+                for key, views in ranked]
+
+    return {
+        "totalViews": total_views,
+        "uniqueVisitors": unique_visitors,
+        "pagesPerVisitor": f"{total_views / unique_visitors:.1f}" if unique_visitors else "0",
+        "topPages": top("pageviews_daily_paths", "page"),
+        "topReferrers": top("pageviews_daily_referrers", "referrer"),
+    }
+
+
+def _parse_day(value):
+    return datetime.date.fromisoformat(value)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Consolida pageviews em resumos diários.")
+    commands = parser.add_subparsers(dest="command", required=True)
+    run_cmd = commands.add_parser("run", help="consolida as visualizações novas")
+    run_cmd.add_argument("--rebuild", action="store_true", help="apaga os resumos e consolida tudo de novo")
+    run_cmd.add_argument("--max-rows", type=int, help="lê no máximo N linhas nesta execução")
+    stats_cmd = commands.add_parser("stats", help="totais do período a partir dos resumos")
+    stats_cmd.add_argument("--start", type=_parse_day, help="data inicial (AAAA-MM-DD)")
+    stats_cmd.add_argument("--end", type=_parse_day, help="data final (AAAA-MM-DD)")
+    stats_cmd.add_argument("--limit", type=int, default=10)
+    args = parser.parse_args(argv)
+
+    try:
+        if args.command == "run":
+            result = run(args.max_rows, args.rebuild)
+        else:
+            result = stats(args.start, args.end, args.limit)
+    except Exception as e:
+        print(json.dumps({"error": str(e)}, ensure_ascii=False))
+        return 1
+    print(json.dumps(result, indent=2, ensure_ascii=False))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
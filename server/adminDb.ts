@@ -1,4 +1,4 @@
-import { eq, and, gt, gte, lt, lte, sql, desc } from "drizzle-orm";
+import { eq, and, gt, gte, lt, lte, sql, desc, asc, inArray } from "drizzle-orm";
 import { getDb } from "./db";
 import {
   adminUsers,
@@ -124,7 +124,11 @@ export async function getCourseCurriculum(courseId: number): Promise<CourseCurri
   const db = await getDb();
   if (!db) return [];
   
-  return await db.select().from(courseCurriculum).where(eq(courseCurriculum.courseId, courseId));
+  return await db
+    .select()
+    .from(courseCurriculum)
+    .where(eq(courseCurriculum.courseId, courseId))
+    .orderBy(asc(courseCurriculum.order), asc(courseCurriculum.id));
 }
 
 export async function createCurriculumItem(item: InsertCourseCurriculum): Promise<void> {
@@ -148,6 +152,187 @@ export async function deleteCurriculumItem(id: number): Promise<void> {
   await db.delete(courseCurriculum).where(eq(courseCurriculum.id, id));
 }
 
+export interface CurriculumSubjectInput {
+  semester: number;
+  subjectName: string;
+  workload: number;
+  description?: string;
+}
+
+// Same key as diff_subjects (extract_curriculum.py): semester + name without
+// accents, case or extra whitespace
+function subjectKey(semester: number, name: string): string {
+  const normalized = name
+    .normalize("NFKD")
+    .replace(/\p{M}/gu, "")
+    .toLowerCase()
+    .split(/\s+/)
+    .filter(Boolean)
+    .join(" ");
+  return `${semester}\u0000${normalized}`;
+}
+
+export interface CurriculumSyncStats {
+  inserted: number;
+  updated: number;
+  reordered: number;
+  deleted: number;
+  unchanged: number;
+}
+
+type Database = NonNullable<Awaited<ReturnType<typeof getDb>>>;
+type Transaction = Parameters<Parameters<Database["transaction"]>[0]>[0];
+
+/**
+ * Replaces a course's curriculum by applying only the difference from the
+ * stored rows (same algorithm as diff_subjects in extract_curriculum.py):
+ * subjects matched by semester + normalized name keep their id, and only new,
+ * changed, removed or moved rows are written, in a single transaction.
+ *
+ * A partial extraction (time budget hit, `partial: true`) is refused: every
+ * subject it did not reach would be deleted.
+ */
+export async function syncCourseCurriculum(
+  courseId: number,
+  subjects: CurriculumSubjectInput[],
+  options: { partial?: boolean } = {}
+): Promise<CurriculumSyncStats> {
+  if (options.partial) {
+    throw new Error("Partial curriculum extraction cannot be synced: re-import the PDF");
+  }
+  const db = await getDb();
+  if (!db) throw new Error("Database not available");
+
+  return await db.transaction((tx) => syncCurriculumRows(tx, courseId, subjects));
+}
+
+/**
+ * Syncs every course of a catalog import in one transaction: a failure on
+ * any course rolls back the whole catalog. Partial courses are refused.
+ */
+export async function syncCatalogCurricula(
+  courses: { courseId: number; subjects: CurriculumSubjectInput[]; partial?: boolean }[]
+): Promise<{ courseId: number; changes: CurriculumSyncStats }[]> {
+  const partial = courses.filter((course) => course.partial).map((course) => course.courseId);
+  if (partial.length > 0) {
+    throw new Error(`Partial curriculum extraction cannot be synced (courses ${partial.join(", ")})`);
+  }
+  const db = await getDb();
+  if (!db) throw new Error("Database not available");
+
+  return await db.transaction(async (tx) => {
+    const results = [];
+    for (const course of courses) {
+      results.push({
+        courseId: course.courseId,
+        changes: await syncCurriculumRows(tx, course.courseId, course.subjects),
+      });
+    }
+    return results;
+  });
+}
+
+export interface CurriculumDiff {
+  inserts: InsertCourseCurriculum[];
+  // Changed columns per row; rows that only moved get just `order`
+  updates: { id: number; changes: Partial<InsertCourseCurriculum> }[];
+  deletes: number[];
+  stats: CurriculumSyncStats;
+}
+
+/**
+ * Minimal operations to turn the stored rows into `subjects` (in curriculum
+ * order; order = position). Pure: syncCurriculumRows applies the result.
+ */
+export function diffCourseCurriculum(
+  courseId: number,
+  stored: CourseCurriculum[],
+  subjects: CurriculumSubjectInput[]
+): CurriculumDiff {
+  // Repeated keys are matched in their stored order
+  const index = new Map<string, CourseCurriculum[]>();
+  const sorted = [...stored].sort((a, b) => a.order - b.order || a.id - b.id);
+  for (const row of sorted) {
+    const key = subjectKey(row.semester, row.subjectName);
+    const rows = index.get(key);
+    if (rows) rows.push(row);
+    else index.set(key, [row]);
+  }
+
+  const diff: CurriculumDiff = {
+    inserts: [],
+    updates: [],
+    deletes: [],
+    stats: { inserted: 0, updated: 0, reordered: 0, deleted: 0, unchanged: 0 },
+  };
+  for (let order = 0; order < subjects.length; order++) {
+    const subject = subjects[order];
+    // Stored names are cut to the column size: match on the same cut
+    const subjectName = subject.subjectName.slice(0, 255);
+    const row = index.get(subjectKey(subject.semester, subjectName))?.shift();
+    if (!row) {
+      diff.inserts.push({
+        courseId,
+        semester: subject.semester,
+        subjectName,
+        workload: subject.workload,
+        description: subject.description,
+        order,
+      });
+      continue;
+    }
+
+    const changes: Partial<InsertCourseCurriculum> = {};
+    if (row.subjectName !== subjectName) changes.subjectName = subjectName;
+    if (row.workload !== subject.workload) changes.workload = subject.workload;
+    // No description in the import: keep the one written in the admin panel
+    if (subject.description !== undefined && row.description !== subject.description) {
+      changes.description = subject.description;
+    }
+    const moved = row.order !== order;
+    if (Object.keys(changes).length > 0) {
+      if (moved) changes.order = order;
+      diff.updates.push({ id: row.id, changes });
+      diff.stats.updated++;
+    } else if (moved) {
+      diff.updates.push({ id: row.id, changes: { order } });
+      diff.stats.reordered++;
+    } else {
+      diff.stats.unchanged++;
+    }
+  }
+
+  diff.deletes = Array.from(index.values()).flat().map((row) => row.id);
+  diff.stats.deleted = diff.deletes.length;
+  diff.stats.inserted = diff.inserts.length;
+  return diff;
+}
+
+async function syncCurriculumRows(
+  tx: Transaction,
+  courseId: number,
+  subjects: CurriculumSubjectInput[]
+): Promise<CurriculumSyncStats> {
+  const stored = await tx
+    .select()
+    .from(courseCurriculum)
+    .where(eq(courseCurriculum.courseId, courseId))
+    .orderBy(asc(courseCurriculum.order), asc(courseCurriculum.id))
+    .for("update");
+
+  const diff = diffCourseCurriculum(courseId, stored, subjects);
+  for (const { id, changes } of diff.updates) {
+    await tx.update(courseCurriculum).set(changes).where(eq(courseCurriculum.id, id));
+  }
+  if (diff.deletes.length > 0) {
+    await tx.delete(courseCurriculum).where(inArray(courseCurriculum.id, diff.deletes));
+  }
+  if (diff.inserts.length > 0) {
+    await tx.insert(courseCurriculum).values(diff.inserts);
+  }
+  return diff.stats;
+}
+
 // ==================== Blog Posts ====================
 
 export async function getAllBlogPosts(): Promise<BlogPost[]> {
@@ -139,6 +139,18 @@ export const adminCoursesRouter = router({
     }),
 });
 
+const curriculumSubjectInput = z.object({
+  semester: z.number(),
+  subjectName: z.string(),
+  workload: z.number(),
+  description: z.string().min(0).optional(),
+});
+
+// Accents, case and extra spaces ignored: "TÉCNICO EM  ENFERMAGEM" == "Técnico em Enfermagem"
+function normalizeCourseName(name: string): string {
+  return name.normalize("NFKD").replace(/[\u0300-\u036f]/g, "").toLowerCase().replace(/\s+/g, " ").trim();
+}
+
 export const adminCurriculumRouter = router({
   getByCourseId: adminProcedure
     .input(z.object({ courseId: z.number() }))
@@ -206,34 +218,79 @@ export const adminCurriculumRouter = router({
   saveParsedCurriculum: adminProcedure
     .input(z.object({
       courseId: z.number(),
-      subjects: z.array(z.object({
-        semester: z.number(),
-        subjectName: z.string(),
-        workload: z.number(),
-        description: z.string().min(0).optional(),
-      })),
+      subjects: z.array(curriculumSubjectInput),
+      // "partial" from importFromPDF: the extraction hit its time limit
+      partial: z.boolean().optional(),
     }))
     .mutation(async ({ input }) => {
-      // Delete existing curriculum for this course
-      const existing = await adminDb.getCourseCurriculum(input.courseId);
-      for (const item of existing) {
-        await adminDb.deleteCurriculumItem(item.id);
+      if (input.partial) {
+        throw new TRPCError({
+          code: "BAD_REQUEST",
+          message: "A extração foi interrompida pelo tempo limite; a grade está incompleta e não pode ser salva.",
+        });
       }
+      // Only the rows that changed are written (ids are kept for the rest)
+      const changes = await adminDb.syncCourseCurriculum(input.courseId, input.subjects, { partial: input.partial });
+      
+      return { success: true, changes };
+    }),
+
+  // Catalog PDF with many courses: every curriculum is extracted in one run and
+  // matched by name to an existing course (courseId is null when none matches)
+  importCatalogFromPDF: adminProcedure
+    .input(z.object({
+      pdfBase64: z.string(),
+    }))
+    .mutation(async ({ input }) => {
+      const { processCatalogPDF } = await import("./pdfCurriculumParser");
+      
+      const pdfBuffer = Buffer.from(input.pdfBase64, 'base64');
+      const catalog = await processCatalogPDF(pdfBuffer);
       
-      // Insert new curriculum items
-      for (let i = 0; i < input.subjects.length; i++) {
-        const subject = input.subjects[i];
-        await adminDb.createCurriculumItem({
-          courseId: input.courseId,
-          semester: subject.semester,
-          subjectName: subject.subjectName,
-          workload: subject.workload,
-          description: subject.description,
-          order: i,
+      const courseIds = new Map<string, number>();
+      for (const course of await adminDb.getAllCourses()) {
+        courseIds.set(normalizeCourseName(course.name), course.id);
+        courseIds.set(normalizeCourseName(course.title), course.id);
+      }
+      
+      return {
+        success: true,
+        data: {
+          ...catalog,
+          courses: catalog.courses.map((course) => {
+            const name = normalizeCourseName(course.courseName ?? "");
+            return {
+              ...course,
+              // Courses may be registered without the degree ("Enfermagem")
+              courseId: courseIds.get(name)
+                ?? courseIds.get(name.replace(/^(tecnico|tecnologo|bacharelado|licenciatura) em /, ""))
+                ?? null,
+            };
+          }),
+        },
+      };
+    }),
+
+  saveParsedCatalog: adminProcedure
+    .input(z.object({
+      courses: z.array(z.object({
+        courseId: z.number(),
+        subjects: z.array(curriculumSubjectInput),
+        partial: z.boolean().optional(),
+      })),
+    }))
+    .mutation(async ({ input }) => {
+      const partial = input.courses.filter((course) => course.partial);
+      if (partial.length > 0) {
+        throw new TRPCError({
+          code: "BAD_REQUEST",
+          message: `A extração foi interrompida pelo tempo limite em ${partial.length} curso(s); o catálogo está incompleto e não pode ser salvo.`,
         });
       }
+      // All courses in one transaction: a failure leaves the catalog untouched
+      const changes = await adminDb.syncCatalogCurricula(input.courses);
       
-      return { success: true };
+      return { success: true, changes };
     }),
 });
 
@@ -0,0 +1,79 @@
+import { describe, expect, it, vi } from "vitest";
+import type { CourseCurriculum } from "../drizzle/schema";
+import { diffCourseCurriculum, syncCatalogCurricula, syncCourseCurriculum } from "./adminDb";
+
+vi.mock("./db", () => ({
+  getDb: vi.fn(async () => {
+    throw new Error("no database in tests");
+  }),
+}));
+
+function storedRow(id: number, semester: number, subjectName: string, workload: number, order: number): CourseCurriculum {
+  return {
+    id,
+    courseId: 7,
+    semester,
+    subjectName,
+    workload,
+    description: null,
+    order,
+    createdAt: new Date(),
+    updatedAt: new Date(),
+  };
+}
+
+describe("diffCourseCurriculum", () => {
+  it("writes only inserted, changed, moved and removed rows", () => {
+    const stored = [
+      storedRow(1, 1, "Ética", 40, 0),
+      storedRow(2, 1, "Redação Técnica", 50, 1),
+      storedRow(3, 2, "Anatomia", 80, 2),
+      storedRow(4, 2, "Química", 60, 3),
+    ];
+    const diff = diffCourseCurriculum(7, stored, [
+      { semester: 1, subjectName: "ÉTICA", workload: 40 }, // same key, new spelling
+      { semester: 2, subjectName: "Anatomia", workload: 80 }, // moved
+      { semester: 2, subjectName: "Química", workload: 60 }, // moved
+      { semester: 1, subjectName: "Redação técnica", workload: 60 }, // changed and moved
+      { semester: 3, subjectName: "Farmacologia", workload: 70 }, // new
+    ]);
+
+    expect(diff.stats).toEqual({ inserted: 1, updated: 2, reordered: 2, deleted: 0, unchanged: 0 });
+    expect(diff.updates).toEqual([
+      { id: 1, changes: { subjectName: "ÉTICA" } },
+      { id: 3, changes: { order: 1 } },
+      { id: 4, changes: { order: 2 } },
+      { id: 2, changes: { subjectName: "Redação técnica", workload: 60, order: 3 } },
+    ]);
+    expect(diff.inserts).toEqual([
+      { courseId: 7, semester: 3, subjectName: "Farmacologia", workload: 70, description: undefined, order: 4 },
+    ]);
+  });
+
+  it("deletes missing rows and leaves matching ones untouched", () => {
+    const stored = [storedRow(1, 1, "Ética", 40, 0), storedRow(2, 1, "Libras", 40, 1)];
+    const diff = diffCourseCurriculum(7, stored, [{ semester: 1, subjectName: "Ética", workload: 40 }]);
+
+    expect(diff.stats).toEqual({ inserted: 0, updated: 0, reordered: 0, deleted: 1, unchanged: 1 });
+    expect(diff.deletes).toEqual([2]);
+    expect(diff.updates).toEqual([]);
+  });
+
+  it("matches names longer than the column on the stored (truncated) name", () => {
+    const longName = "Tópicos Especiais ".repeat(20);
+    const stored = [storedRow(1, 1, longName.slice(0, 255), 40, 0)];
+    const diff = diffCourseCurriculum(7, stored, [{ semester: 1, subjectName: longName, workload: 40 }]);
+
+    expect(diff.stats).toEqual({ inserted: 0, updated: 0, reordered: 0, deleted: 0, unchanged: 1 });
+  });
+});
+
+describe("partial extractions", () => {
+  it("are refused before touching the database", async () => {
+    const subjects = [{ semester: 1, subjectName: "Ética", workload: 40 }];
+    await expect(syncCourseCurriculum(7, subjects, { partial: true })).rejects.toThrow(/Partial/);
+    await expect(
+      syncCatalogCurricula([{ courseId: 7, subjects }, { courseId: 8, subjects, partial: true }])
+    ).rejects.toThrow(/courses 8/);
+  });
+});
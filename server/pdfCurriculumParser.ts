@@ -1,6 +1,6 @@
-import { exec } from "child_process";
-import { promises as fs } from "fs";
-import { join } from "path";
+import { TRPCError } from "@trpc/server";
+import { spawn } from "child_process";
+import { createConnection } from "net";
 import { nanoid } from "nanoid";
 
 interface CurriculumSubject {
@@ -14,33 +14,136 @@ interface ParsedCurriculum {
   subjects: CurriculumSubject[];
   courseName?: string;
   totalSemesters?: number;
+  // Tempo limite da extração estourado: só as disciplinas lidas até ali
+  partial?: boolean;
+  warning?: string;
 }
 
-export async function processCurriculumPDF(pdfBuffer: Buffer): Promise<ParsedCurriculum> {
-  const tempPdfPath = join("/tmp", `${nanoid()}.pdf`);
-  const pythonScriptPath = "/var/www/faculdade-site/extract_curriculum.py";
+// Um curso de um catálogo (PDF com vários cursos): páginas [primeira, última]
+interface CatalogCourse extends ParsedCurriculum {
+  pages: [number, number];
+}
 
-  try {
-    await fs.writeFile(tempPdfPath, pdfBuffer);
-
-    const { stdout, stderr } = await new Promise<{ stdout: string; stderr: string }>((resolve, reject) => {
-      exec(`python3 ${pythonScriptPath} ${tempPdfPath}`, (error, stdout, stderr) => {
-        if (error) {
-          console.error(`exec error: ${error}`);
-          return reject(error);
-        }
-        if (stderr) {
-          console.error(`stderr: ${stderr}`);
-        }
-        resolve({ stdout, stderr });
-      });
+interface ParsedCatalog {
+  courses: CatalogCourse[];
+  totalCourses: number;
+  skippedSegments: number;
+  partial?: boolean;
+  warning?: string;
+}
+
+// Socket do servidor de extração (python3 extract_curriculum.py --serve <socket>).
+// Quando definido, evita subir um processo python3 novo a cada importação.
+const extractorSocket = process.env.CURRICULUM_EXTRACTOR_SOCKET;
+
+// O extract_curriculum.py se interrompe sozinho em CURRICULUM_DEADLINE
+// segundos; passado isso com folga, o processo é morto / a conexão fechada.
+const extractTimeoutMs = (Number(process.env.CURRICULUM_DEADLINE) || 60) * 1000 + 5000;
+
+// "code" do erro do extract_curriculum.py -> código da resposta tRPC
+const errorCodes: Record<string, TRPCError["code"]> = {
+  too_large: "PAYLOAD_TOO_LARGE",
+  too_many_pages: "PAYLOAD_TOO_LARGE",
+  memory: "PAYLOAD_TOO_LARGE",
+  timeout: "TIMEOUT",
+  busy: "TOO_MANY_REQUESTS",
+  invalid_pdf: "BAD_REQUEST",
+  no_text: "BAD_REQUEST",
+  no_subjects: "BAD_REQUEST",
+  invalid_request: "BAD_REQUEST",
+  internal: "INTERNAL_SERVER_ERROR",
+};
+
+function extractionTimeout(): TRPCError {
+  return new TRPCError({ code: "TIMEOUT", message: "Falha ao processar PDF: tempo limite excedido." });
+}
+
+function extractViaSocket(socketPath: string, pdfBuffer: Buffer, catalog = false): Promise<string> {
+  return new Promise((resolve, reject) => {
+    const socket = createConnection(socketPath);
+    let buffer = "";
+
+    socket.setEncoding("utf8");
+    socket.setTimeout(extractTimeoutMs, () => {
+      socket.destroy();
+      reject(extractionTimeout());
+    });
+    socket.on("connect", () => {
+      socket.write(JSON.stringify({ id: nanoid(), data: pdfBuffer.toString("base64"), catalog }) + "\n");
+    });
+    socket.on("data", (chunk: string) => {
+      buffer += chunk;
+      const newline = buffer.indexOf("\n");
+      if (newline !== -1) {
+        socket.end();
+        resolve(buffer.slice(0, newline));
+      }
+    });
+    socket.on("error", reject);
+    socket.on("close", () => reject(new Error("Servidor de extração encerrou a conexão sem resposta")));
+  });
+}
+
+// O PDF vai direto pelo stdin do processo, sem arquivo temporário em /tmp
+function extractViaExec(pythonScriptPath: string, pdfBuffer: Buffer, catalog = false): Promise<string> {
+  return new Promise((resolve, reject) => {
+    const args = [pythonScriptPath, "--stdin", "--compact"];
+    if (catalog) {
+      args.push("--catalog");
+    }
+    const child = spawn("python3", args, {
+      timeout: extractTimeoutMs,
+      killSignal: "SIGKILL",
+    });
+    const stdout: Buffer[] = [];
+    const stderr: Buffer[] = [];
+
+    child.stdout.on("data", (chunk: Buffer) => stdout.push(chunk));
+    child.stderr.on("data", (chunk: Buffer) => stderr.push(chunk));
+    child.on("error", reject);
+    child.on("close", (code, signal) => {
+      const errorOutput = Buffer.concat(stderr).toString("utf8");
+      if (errorOutput) {
+        console.error(`stderr: ${errorOutput}`);
+      }
+      // SIGKILL: estourou o timeout; SIGXCPU: estourou o limite de CPU do próprio script
+      if (signal === "SIGKILL" || signal === "SIGXCPU") {
+        return reject(extractionTimeout());
+      }
+      if (code !== 0) {
+        console.error(`exec error: python3 saiu com código ${code}`);
+        return reject(new Error(`python3 saiu com código ${code}`));
+      }
+      resolve(Buffer.concat(stdout).toString("utf8"));
     });
 
-    const parsedResult = JSON.parse(stdout);
+    child.stdin.on("error", reject);
+    child.stdin.end(pdfBuffer);
+  });
+}
+
+const pythonScriptPath = "/var/www/faculdade-site/extract_curriculum.py";
+
+async function runExtractor(pdfBuffer: Buffer, catalog: boolean): Promise<any> {
+  const stdout = extractorSocket
+    ? await extractViaSocket(extractorSocket, pdfBuffer, catalog)
+    : await extractViaExec(pythonScriptPath, pdfBuffer, catalog);
+
+  const parsedResult = JSON.parse(stdout);
 
-    if (parsedResult.error) {
-      throw new Error(parsedResult.error);
+  if (parsedResult.error) {
+    const code = errorCodes[parsedResult.code];
+    if (code) {
+      throw new TRPCError({ code, message: `Falha ao processar PDF: ${parsedResult.error}` });
     }
+    throw new Error(parsedResult.error);
+  }
+  return parsedResult;
+}
+
+export async function processCurriculumPDF(pdfBuffer: Buffer): Promise<ParsedCurriculum> {
+  try {
+    const parsedResult = await runExtractor(pdfBuffer, false);
 
     if (!parsedResult.subjects || parsedResult.subjects.length === 0) {
       throw new Error("Nenhuma disciplina foi encontrada no PDF. Verifique se o documento contém uma grade curricular válida.");
@@ -48,8 +151,22 @@ export async function processCurriculumPDF(pdfBuffer: Buffer): Promise<ParsedCur
 
     return parsedResult as ParsedCurriculum;
   } catch (error: any) {
+    if (error instanceof TRPCError) {
+      throw error;
+    }
+    throw new Error(`Falha ao processar PDF: ${error.message}`);
+  }
+}
+
+// Catálogo com vários cursos: o PDF é separado pelos títulos de curso
+// ("TÉCNICO EM ...", "BACHARELADO EM ...") e cada grade é extraída à parte
+export async function processCatalogPDF(pdfBuffer: Buffer): Promise<ParsedCatalog> {
+  try {
+    return (await runExtractor(pdfBuffer, true)) as ParsedCatalog;
+  } catch (error: any) {
+    if (error instanceof TRPCError) {
+      throw error;
+    }
     throw new Error(`Falha ao processar PDF: ${error.message}`);
-  } finally {
-    await fs.unlink(tempPdfPath).catch(console.error);
   }
 }
@@ -0,0 +1,182 @@
+"""
+Sincroniza textos do site (tabela home_settings) a partir de um arquivo
+de mudanças declarativo, em vez de um script avulso por alteração.
+
+Formato do arquivo (JSON): uma lista de mudanças, ou {"changes": [...]}.
+  [
+    {
+      "section": "about",
+      "field": "title",
+      "value": "Novo título",
+      "fallback": {"file": "components/About.tsx", "old": "Título antigo"}
+    }
+  ]
+
+"fallback" é opcional: troca o texto antigo pelo novo valor (ou por
+"new", se informado) no código-fonte, para quando o componente ainda
+usa o texto fixo. "file" é relativo a --root (client/src).
+
+Tudo acontece de uma vez:
+  - banco: uma única transação em uma conexão do pool (mysql_pool), com
+    executemany para os UPDATEs e para os INSERTs dos campos que ainda
+    não existem; qualquer erro desfaz tudo;
+  - código-fonte: cada arquivo é lido uma vez e recebe todas as suas
+    trocas; os arquivos só são gravados (de forma atômica) depois do
+    commit do banco, então uma falha não deixa nada pela metade.
+
+Uso:
+  python3 settings_sync.py mudancas.json [--dry-run] [--skip-db] [--skip-source]
+"""
+import argparse
+import json
+import os
+import sys
+
+from codemod_engine import BASE_DIR, write_atomic
+import mysql_pool
+
+UPDATE_SQL = "UPDATE home_settings SET value = %s, updated_at = CURRENT_TIMESTAMP WHERE section = %s AND field = %s"
+INSERT_SQL = "INSERT INTO home_settings (section, field, value, sort_order, active) VALUES (%s, %s, %s, 0, 1)"
+
+
+def load_changes(path):
+    """Lê e valida o arquivo de mudanças ('-' para stdin)."""
+    if path == "-":
+        data = json.load(sys.stdin)
+    else:
+        with open(path, "r", encoding="utf-8") as f:
+            data = json.load(f)
+    changes = data.get("changes", []) if isinstance(data, dict) else data
+    for i, change in enumerate(changes):
+        missing = [key for key in ("section", "field", "value") if key not in change]
+        if missing:
+            raise ValueError(f"Mudança {i + 1}: faltando {', '.join(missing)}")
+        fallback = change.get("fallback")
+        if fallback is not None and not (fallback.get("file") and fallback.get("old")):
+            raise ValueError(f"Mudança {i + 1}: fallback precisa de 'file' e 'old'")
+    return changes
+
+
+def _dedupe(changes):
+    """Última mudança vence quando o mesmo (section, field) aparece mais de uma vez."""
+    latest = {}
+    for change in changes:
+        latest[(change["section"], change["field"])] = change["value"]
+    return latest
+
+
+def apply_database(changes, transaction=None):
+    """
+    Aplica as mudanças em uma transação. Retorna (atualizados, inseridos).
+    transaction é um context manager que entrega uma conexão DB-API
+    (padrão: mysql_pool.transaction).
+    """
+    latest = _dedupe(changes)
+    if not latest:
+        return 0, 0
+    transaction = transaction or mysql_pool.transaction
+    sections = sorted({section for section, _ in latest})
+
+    with transaction() as conn:
+        cursor = conn.cursor()
+        try:
+            placeholders = ", ".join(["%s"] * len(sections))
+            cursor.execute(
+                f"SELECT section, field FROM home_settings WHERE section IN ({placeholders})",
+                sections,
+            )
+            existing = {(section, field) for section, field in cursor.fetchall()}
+
+            updates = [(value, section, field) for (section, field), value in latest.items()
+                       if (section, field) in existing]
+            inserts = [(section, field, value) for (section, field), value in latest.items()
+                       if (section, field) not in existing]
+            if updates:
+                cursor.executemany(UPDATE_SQL, updates)
+            if inserts:
+                cursor.executemany(INSERT_SQL, inserts)
+        finally:
+            cursor.close()
+    return len(updates), len(inserts)
+
+
+def plan_source_patches(changes, root=BASE_DIR):
+    """
+    Agrupa os fallbacks por arquivo e calcula o novo conteúdo de cada um
+    (uma leitura por arquivo). Retorna {caminho: (conteúdo novo, trocas)}
+    só para os arquivos que mudam.
+    """
+    by_file = {}
+    for change in changes:
+        fallback = change.get("fallback")
+        if fallback:
+            new = fallback.get("new", change["value"])
+            by_file.setdefault(os.path.join(root, fallback["file"]), []).append((fallback["old"], new))
+
+    patches = {}
+    for filepath, replacements in by_file.items():
+        try:
+            with open(filepath, "r", encoding="utf-8") as f:
+                content = f.read()
+        except FileNotFoundError:
+            print(f"Aviso: {filepath} não encontrado; fallback ignorado.", file=sys.stderr)
+            continue
+        new_content = content
+        applied = 0
+        for old, new in replacements:
+            if old in new_content:
+                new_content = new_content.replace(old, new)
+                applied += 1
+        if new_content != content:
+            patches[filepath] = (new_content, applied)
+    return patches
+
+
+def write_source_patches(patches):
+    for filepath, (content, _) in patches.items():
+        write_atomic(filepath, content.encode("utf-8"))
+
+
+def sync(changes, root=BASE_DIR, skip_db=False, skip_source=False, dry_run=False, transaction=None):
+    """
+    Aplica as mudanças no banco e no código-fonte. Os arquivos só são
+    gravados depois que a transação do banco foi confirmada.
+    """
+    patches = {} if skip_source else plan_source_patches(changes, root)
+
+    if dry_run:
+        for (section, field), value in _dedupe(changes).items():
+            print(f"[dry-run] home_settings {section}.{field} = {value!r}")
+        for filepath, (_, applied) in patches.items():
+            print(f"[dry-run] {filepath}: {applied} troca(s)")
+        return
+
+    if not skip_db:
+        updated, inserted = apply_database(changes, transaction)
+        print(f"Banco de dados atualizado: {updated} campo(s) atualizado(s), {inserted} inserido(s).")
+
+    write_source_patches(patches)
+    for filepath in patches:
+        print(f"Código-fonte atualizado: {filepath}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Aplica mudanças de textos do site (home_settings) em lote.")
+    parser.add_argument("changes", help="arquivo JSON de mudanças ('-' para stdin)")
+    parser.add_argument("--root", default=BASE_DIR, help="diretório dos fontes do cliente (para os fallbacks)")
+    parser.add_argument("--dry-run", action="store_true", help="só mostra o que seria feito")
+    parser.add_argument("--skip-db", action="store_true", help="não altera o banco")
+    parser.add_argument("--skip-source", action="store_true", help="não altera o código-fonte")
+    args = parser.parse_args(argv)
+
+    try:
+        changes = load_changes(args.changes)
+        sync(changes, args.root, args.skip_db, args.skip_source, args.dry_run)
+    except Exception as e:
+        print(f"Erro ao sincronizar: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
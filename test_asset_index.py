@@ -0,0 +1,29 @@
+import json
+import os
+
+import asset_index
+
+
+def test_asset_index_keeps_quoted_names_with_spaces(tmp_path, capsys):
+    public, src, build = tmp_path / "public", tmp_path / "src", tmp_path / "build"
+    for root in (public, build):
+        (root / "logos").mkdir(parents=True)
+        for name in ("MDE - PNG.png", "Design sem nome.png", "Logo Antigo.png", "sobra.png"):
+            (root / "logos" / name).write_bytes(name.encode())
+    src.mkdir()
+    (src / "Menu.tsx").write_text(
+        'const a = "/logos/MDE - PNG.png";\n'
+        "const b = '/logos/Design%20sem%20nome.png';\n"
+        "// Logo Antigo.png era o logo anterior\n",
+        encoding="utf-8",
+    )
+
+    report = asset_index.run(str(public), [str(src)], db_export="")
+    unreferenced = [item["path"] for item in report["unreferenced"]]
+    assert unreferenced == ["logos/Logo Antigo.png", "logos/sobra.png"]
+
+    # O nome citado fora de uma string bloqueia o --prune inteiro
+    argv = ["--root", str(public), "--src", str(src), "--db-export", "", "--prune", str(build)]
+    assert asset_index.main(argv) == 1
+    assert json.loads(capsys.readouterr().out)["mentioned"] == ["logos/Logo Antigo.png"]
+    assert sorted(os.listdir(build / "logos")) == sorted(os.listdir(public / "logos"))
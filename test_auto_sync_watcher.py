@@ -0,0 +1,48 @@
+import subprocess
+import threading
+
+import auto_sync_watcher
+
+SYNC_CMD = "git add -A && git commit -qm auto && git push -q origin HEAD"
+
+
+def git(*args, cwd=None):
+    done = subprocess.run(["git", *args], cwd=cwd, capture_output=True, text=True, check=True)
+    return done.stdout
+
+
+class ReadyWatcher(auto_sync_watcher.SyncWatcher):
+    """Avisa quando os watches estão no lugar (o log "Observando ...")."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.ready = threading.Event()
+
+    def log(self, message):
+        if message.startswith("Observando"):
+            self.ready.set()
+
+
+def test_burst_of_writes_becomes_one_push_to_bare_repo(tmp_path):
+    remote, copy = tmp_path / "remoto.git", tmp_path / "copia"
+    git("init", "-q", "--bare", str(remote))
+    git("clone", "-q", str(remote), str(copy))
+    git("config", "user.email", "watcher@example.com", cwd=copy)
+    git("config", "user.name", "Watcher", cwd=copy)
+
+    watcher = ReadyWatcher(str(copy), SYNC_CMD, quiet=0.3, max_delay=5)
+    result = {}
+    thread = threading.Thread(target=lambda: result.update(watcher.run(initial_sync=False, max_syncs=1)))
+    thread.start()
+    assert watcher.ready.wait(10)
+    for i in range(5):
+        (copy / f"pagina{i}.md").write_text(f"versão {i}\n", encoding="utf-8")
+    thread.join(30)
+    assert not thread.is_alive()
+
+    assert result["syncs"] == 1 and result["failedSyncs"] == 0
+    assert result["events"] >= 5
+    assert result["eventsMerged"] == result["events"] - 1
+    assert git("log", "--all", "--format=%s", cwd=remote).split() == ["auto"]
+    files = git("ls-tree", "--name-only", "-r", "HEAD", cwd=remote).split()
+    assert files == [f"pagina{i}.md" for i in range(5)]
@@ -0,0 +1,42 @@
+import contextlib
+import os
+
+import curriculum_cache
+from curriculum_cache import CurriculumCache
+
+VERSION = 1
+
+
+def test_cache_keys_by_content_version_and_variant(tmp_path):
+    cache = CurriculumCache(str(tmp_path), VERSION)
+    result = {"courseName": "Curso", "subjects": []}
+    cache.put(b"pdf", result, "full:500:100")
+    assert cache.get(b"pdf", "full:500:100") == result
+    assert cache.get(b"pdf", "fast:500:100") is None
+    assert cache.get(b"outro pdf", "full:500:100") is None
+    assert CurriculumCache(str(tmp_path), VERSION + 1).get(b"pdf", "full:500:100") is None
+
+
+def test_cache_prunes_over_limit_and_skips_vanished_entries(tmp_path, monkeypatch):
+    cache = CurriculumCache(str(tmp_path), VERSION, 600)
+    for i in range(10):
+        cache.put(b"pdf %d" % i, {"courseName": "x" * 100, "subjects": []})
+    assert cache.stats()["bytes"] <= 600
+    assert cache.get(b"pdf 9") is not None
+
+    # Entrada removida por outro processo entre a listagem e o stat
+    class VanishedEntry:
+        name = "v0-removida.json"
+
+        def is_file(self):
+            return True
+
+        def stat(self):
+            raise FileNotFoundError(self.name)
+
+    real_scandir = os.scandir
+    listing = lambda path: contextlib.nullcontext(list(real_scandir(path)) + [VanishedEntry()])
+    monkeypatch.setattr(curriculum_cache.os, "scandir", listing)
+    entries = cache.stats()["entries"]
+    cache.prune()
+    assert entries == len(os.listdir(tmp_path))
@@ -0,0 +1,812 @@
+import base64
+import contextlib
+import io
+import json
+import os
+import pstats
+import random
+import re
+import socket
+import subprocess
+import sys
+import threading
+import time
+
+import PyPDF2
+import pytest
+
+import extract_curriculum
+from bench_curriculum import LAYOUTS, generate_layout, make_pdf, make_pdf_from_streams
+from curriculum_cache import CurriculumCache
+from curriculum_model import Curriculum, dumps
+from extract_curriculum import (
+    CurriculumLineParser,
+    is_header_or_noise,
+    try_format_alternating_lines,
+    try_format_inline_table,
+    try_format_semesters,
+)
+from extract_pdf_text import PARALLEL_MIN_PAGES, get_backend, iter_pages, parse_page_ranges, stream_pages
+
+
+# ============================================================
+# IMPLEMENTAÇÃO ANTERIOR (referência)
+# ============================================================
+# Cópia literal das funções antes da classificação em passagem única.
+# A saída do parser atual precisa continuar idêntica a esta.
+
+def legacy_is_header_or_noise(name):
+    """Verifica se o texto é um cabeçalho ou ruído, não uma disciplina."""
+    name_upper = name.upper().strip()
+    
+    # Palavras que são ruído APENAS quando são exatamente iguais
+    exact_noise = [
+        "DISCIPLINAS", "DISCIPLINA", "CARGA", "CARGA HORÁRIA", "CARGA HORARIA",
+        "QDE DE", "HORÁRIA", "HORARIA", "PROVAS", "AULAS",
+        "MÓDULO", "MODULO", "SEMESTRE", "PERÍODO", "PERIODO",
+        "ESTRUTURA CURRICULAR", "ESTRUTURA", "CURRICULAR",
+        "PLANO DE ESTUDOS", "AVALIAÇÃO", "AVALIACAO", "CERTIFICAÇÃO",
+        "PRAZO", "HORAS", "CADA DISCIPLINA",
+        "FORMAÇÃO", "CERTIFICADO", "BIBLIOTECA",
+    ]
+    
+    # Palavras que são ruído quando o texto COMEÇA com elas
+    startswith_noise = [
+        "CARGA HORARIA TOTAL", "CARGA HORÁRIA TOTAL", "TOTAL DO CURSO",
+        "CARGA HOR",
+    ]
+    
+    for noise in exact_noise:
+        if name_upper == noise:
+            return True
+    
+    for noise in startswith_noise:
+        if name_upper.startswith(noise):
+            return True
+    
+    # Muito curto (menos de 3 caracteres)
+    if len(name_upper) < 3:
+        return True
+    
+    # É apenas um número
+    if re.match(r'^\d+$', name_upper):
+        return True
+    
+    # Começa com número seguido de espaço (como "3" ou "800 HORAS")
+    if re.match(r'^\d+\s*(h|horas?)?\s*$', name_upper, re.IGNORECASE):
+        return True
+    
+    return False
+
+
+def legacy_try_format_inline_table(text):
+    """
+    FORMATO A: Disciplina e dados na MESMA linha.
+    Exemplos:
+      "LÍNGUA PORTUGUESA 350h 37 3"
+      "MATEMÁTICA 315h 38 3"
+      "HISTÓRIA 72h"
+    """
+    subjects = []
+    lines = text.split("\n")
+    in_table = False
+    
+    for line in lines:
+        line = line.strip()
+        
+        # Detectar início da tabela (pode estar colado: "DISCIPLINASCARGA")
+        # Deve começar com DISCIPLINA (cabeçalho de tabela) - não no meio de uma frase
+        if re.match(r'^DISCIPLINAS?', line, re.IGNORECASE):
+            in_table = True
+            continue
+        
+        if not in_table:
+            continue
+        
+        # Detectar fim da tabela (só quando já estamos dentro da tabela)
+        if re.search(r"^(AVALIA[CÇ][AÃ]O|CERTIFICA[CÇ][AÃ]O|CADA DISCIPLINA|CARGA HOR[AÁ]RIA TOTAL|CARGA HORARIA TOTAL)", line, re.IGNORECASE):
+            break
+        
+        # Formato: NOME XXXh N N (4 colunas)
+        match_4col = re.match(
+            r"^([A-ZÀ-Úa-zà-ú][A-ZÀ-Úa-zà-ú\s\-\.]+?)\s+(\d+)h\s+(\d+)\s+(\d+)",
+            line
+        )
+        if match_4col:
+            subject_name = match_4col.group(1).strip()
+            if legacy_is_header_or_noise(subject_name):
+                continue
+            subjects.append({
+                "semester": 1,
+                "subjectName": subject_name.title(),
+                "workload": int(match_4col.group(2)),
+                "numClasses": int(match_4col.group(3)),
+                "numExams": int(match_4col.group(4))
+            })
+            continue
+        
+        # Formato: NOME XXXh (2 colunas)
+        match_2col = re.match(
+            r"^([A-ZÀ-Úa-zà-ú][A-ZÀ-Úa-zà-ú\s\-\.]+?)\s+(\d+)h",
+            line
+        )
+        if match_2col:
+            subject_name = match_2col.group(1).strip()
+            if legacy_is_header_or_noise(subject_name):
+                continue
+            subjects.append({
+                "semester": 1,
+                "subjectName": subject_name.title(),
+                "workload": int(match_2col.group(2))
+            })
+            continue
+    
+    return subjects
+
+
+def legacy_try_format_alternating_lines(text):
+    """
+    FORMATO B: Disciplina em uma linha, carga horária na próxima linha.
+    Exemplos:
+      "REDAÇÃO TÉCNICA"
+      "50"
+      
+      "INFORMÁTICA APLICADA"
+      "40"
+    
+    Organizado por MÓDULOS ou sem módulos.
+    """
+    subjects = []
+    lines = text.split("\n")
+    current_module = 0
+    in_curriculum = False
+    i = 0
+    
+    while i < len(lines):
+        line = lines[i].strip()
+        
+        # Detectar início da grade (MÓDULO, ESTRUTURA CURRICULAR, etc.)
+        if re.search(r"(MÓDULO|MODULO)\s*(\d+)", line, re.IGNORECASE):
+            match = re.search(r"(MÓDULO|MODULO)\s*(\d+)", line, re.IGNORECASE)
+            current_module = int(match.group(2))
+            in_curriculum = True
+            i += 1
+            continue
+        
+        if re.search(r"ESTRUTURA\s+CURRICULAR", line, re.IGNORECASE):
+            in_curriculum = True
+            i += 1
+            continue
+        
+        # Detectar fim da grade
+        if re.search(r"^(CARGA\s+HOR[AÁ]RIA\s+TOTAL|CARGA\s+HORARIA\s+TOTAL)", line, re.IGNORECASE):
+            break
+        
+        # Ignorar cabeçalhos
+        if legacy_is_header_or_noise(line):
+            i += 1
+            continue
+        
+        if not in_curriculum:
+            i += 1
+            continue
+        
+        # Verificar se a linha atual parece um nome de disciplina
+        # (texto com letras, não é apenas número, não é cabeçalho)
+        is_subject_name = (
+            re.match(r'^[A-ZÀ-Úa-zà-ú]', line) and
+            not re.match(r'^\d+\s*$', line) and
+            not re.match(r'^\d+\s*(h|horas?)\s*$', line, re.IGNORECASE) and
+            len(line) >= 3 and
+            not legacy_is_header_or_noise(line)
+        )
+        
+        if is_subject_name:
+            subject_name = line.strip()
+            workload = 0
+            
+            # Verificar se a próxima linha é um número (carga horária)
+            if i + 1 < len(lines):
+                next_line = lines[i + 1].strip()
+                
+                # Próxima linha é apenas um número (carga horária)
+                workload_match = re.match(r'^(\d+)\s*h?\s*$', next_line, re.IGNORECASE)
+                if workload_match:
+                    workload = int(workload_match.group(1))
+                    i += 1  # Pular a linha da carga horária
+            
+            # Usar módulo atual ou 1 como padrão
+            semester = current_module if current_module > 0 else 1
+            
+            subject_data = {
+                "semester": semester,
+                "subjectName": subject_name.title(),
+                "workload": workload
+            }
+            subjects.append(subject_data)
+        
+        i += 1
+    
+    return subjects
+
+
+def legacy_try_format_semesters(text):
+    """
+    FORMATO C: Disciplinas agrupadas por semestres/períodos.
+    Exemplos:
+      "1º SEMESTRE"
+      "Disciplina 1 - 60h"
+      "Disciplina 2 - 80h"
+      "2º SEMESTRE"
+      ...
+    """
+    subjects = []
+    lines = text.split("\n")
+    current_semester = 0
+    
+    semester_pattern = re.compile(
+        r"(?:(\d+)[ºª°]?\s*)?(?:SEMESTRE|PERÍODO|PERIODO)\s*(\d+)?",
+        re.IGNORECASE
+    )
+    
+    for line in lines:
+        line = line.strip()
+        
+        # Detectar semestre/período
+        sem_match = semester_pattern.search(line)
+        if sem_match:
+            # Pegar o número do semestre (pode estar antes ou depois)
+            sem_num = sem_match.group(1) or sem_match.group(2)
+            if sem_num:
+                current_semester = int(sem_num)
+            else:
+                current_semester += 1
+            continue
+        
+        if current_semester == 0:
+            continue
+        
+        # Tentar extrair disciplina com carga horária
+        # Formato: "Nome da Disciplina - XXh" ou "Nome XXXh"
+        patterns = [
+            r"^([A-ZÀ-Úa-zà-ú][\w\s.,-]+?)\s*[-–]\s*(\d+)\s*h",
+            r"^([A-ZÀ-Úa-zà-ú][\w\s.,-]+?)\s+(\d+)\s*h",
+        ]
+        
+        for pattern in patterns:
+            match = re.match(pattern, line, re.IGNORECASE)
+            if match:
+                subject_name = match.group(1).strip()
+                workload = int(match.group(2))
+                
+                if legacy_is_header_or_noise(subject_name):
+                    break
+                
+                subjects.append({
+                    "semester": current_semester,
+                    "subjectName": subject_name.title() if subject_name.isupper() else subject_name,
+                    "workload": workload
+                })
+                break
+    
+    return subjects
+
+
+def legacy_parse(text):
+    results = []
+    subjects_a = legacy_try_format_inline_table(text)
+    if subjects_a:
+        results.append(("inline", subjects_a))
+    subjects_b = legacy_try_format_alternating_lines(text)
+    if subjects_b:
+        results.append(("alternating", subjects_b))
+    subjects_c = legacy_try_format_semesters(text)
+    if subjects_c:
+        results.append(("semesters", subjects_c))
+    return results
+
+
+# ============================================================
+# DOCUMENTOS DE EXEMPLO
+# ============================================================
+
+TECNICO = """TÉCNICO EM ENFERMAGEM
+ESTRUTURA CURRICULAR
+MÓDULO 1
+DISCIPLINAS
+CARGA HORÁRIA
+REDAÇÃO TÉCNICA
+50
+INFORMÁTICA APLICADA
+40 h
+MÓDULO 2
+ANATOMIA HUMANA
+80
+ÉTICA PROFISSIONAL
+PRIMEIROS SOCORROS
+60
+CARGA HORÁRIA TOTAL
+1200
+MÓDULO 3
+IGNORADA
+20
+"""
+
+EJA = """PROJETO EJA PREMIUM
+DISCIPLINASCARGA HORÁRIAQDE DE AULASPROVAS
+LÍNGUA PORTUGUESA 350h 37 3
+MATEMÁTICA 315h 38 3
+HISTÓRIA 72h
+CARGA HORÁRIA 10h
+AVALIAÇÃO
+GEOGRAFIA 72h
+"""
+
+SEMESTRES = """Curso de Administração
+
+1º SEMESTRE
+Teoria Geral da Administração - 60h
+Contabilidade Básica 80h
+SEMESTRE
+Marketing – 40 h
+Estatística, Probabilidade 40h
+3º PERÍODO
+CARGA HORÁRIA TOTAL 60h
+Gestão de Pessoas - 80h
+"""
+
+FRAGMENTS = [
+    "", " ", "DISCIPLINAS", "Disciplina", "DISCIPLINASCARGA", "MÓDULO 2", "módulo3",
+    "MODULO 10", "ESTRUTURA CURRICULAR", "CARGA HORÁRIA TOTAL", "CARGA HORARIA TOTAL 800h",
+    "AVALIAÇÃO", "CERTIFICACAO", "CADA DISCIPLINA", "1º SEMESTRE", "2ª semestre",
+    "PERÍODO 3", "periodo", "SEMESTRE", "LÍNGUA PORTUGUESA 350h 37 3", "HISTÓRIA 72h",
+    "Ética - 40h", "Física Aplicada 60 h", "50", "40h", "800 HORAS", "3", "  REDAÇÃO TÉCNICA  ",
+    "xx", "CARGA", "Biologia", "TOTAL DO CURSO 900h", "Gestão, Ética e Cidadania - 30h",
+    "A-B. 10h 2 3", "9h", "Química 100H", "à vista 20h",
+]
+
+
+def random_document(rng, lines=60):
+    return "\n".join(rng.choice(FRAGMENTS) for _ in range(lines))
+
+
+# Pedaços para montar linhas caractere a caractere: exercitam os cortes do
+# tokenizador (espaços, traços, º, dígitos colados em "h") que os
+# FRAGMENTS inteiros não alcançam.
+LINE_PIECES = [
+    "a", "Z", "É", "ç", " ", "  ", "\t", "-", "–", ".", ",", "_", "1", "40", "h", "H",
+    "º", "ª", "°", "SEMESTRE", "periodo", "PERÍODO", "DISCIPLINAS", "horas", "x", "3 4",
+]
+
+
+def random_line(rng):
+    return "".join(rng.choice(LINE_PIECES) for _ in range(rng.randint(0, 12)))
+
+
+# ============================================================
+# TESTES
+# ============================================================
+
+def test_fused_parser_matches_legacy_on_examples():
+    for text in (TECNICO, EJA, SEMESTRES, TECNICO + EJA + SEMESTRES):
+        parser = CurriculumLineParser()
+        parser.feed_text(text)
+        assert parser.results() == legacy_parse(text)
+
+
+def test_fused_parser_matches_legacy_on_random_documents():
+    rng = random.Random(20240601)
+    for _ in range(2000):
+        text = random_document(rng, rng.randint(1, 80))
+        parser = CurriculumLineParser()
+        parser.feed_text(text)
+        assert parser.results() == legacy_parse(text), text
+
+
+def test_single_format_functions_match_legacy():
+    rng = random.Random(7)
+    texts = [TECNICO, EJA, SEMESTRES] + [random_document(rng) for _ in range(300)]
+    for text in texts:
+        assert try_format_inline_table(text) == legacy_try_format_inline_table(text)
+        assert try_format_alternating_lines(text) == legacy_try_format_alternating_lines(text)
+        assert try_format_semesters(text) == legacy_try_format_semesters(text)
+
+
+def test_is_header_or_noise_matches_legacy():
+    for fragment in FRAGMENTS + ["Carga Horária", "carga horaria total", "12 horas", "12 hora", "ab"]:
+        assert is_header_or_noise(fragment) == legacy_is_header_or_noise(fragment)
+
+
+def test_extract_course_name():
+    assert extract_curriculum.extract_course_name(TECNICO) == "TÉCNICO EM ENFERMAGEM"
+    assert extract_curriculum.extract_course_name("nada aqui") == "Curso Não Identificado"
+
+
+def test_fast_backend_matches_full_extraction():
+    for layout in LAYOUTS:
+        data = make_pdf(generate_layout(layout, 4, 40))
+        reader = PyPDF2.PdfReader(io.BytesIO(data))
+        fast, full = get_backend("fast"), get_backend("full")
+        for page in reader.pages:
+            assert fast.page_text(page) == full.page_text(page)
+        assert fast.fallbacks == 0
+        assert (extract_curriculum.extract_curriculum_from_pdf(io.BytesIO(data), backend="fast")
+                == extract_curriculum.extract_curriculum_from_pdf(io.BytesIO(data), backend="full"))
+
+    # Colunas próximas (Td curto) e fontes padrão sem /Widths, com e sem
+    # /Encoding: os espaços têm de sair nos mesmos pontos do extract_text()
+    streams = [
+        "BT /F1 10 Tf 40 800 Td (DISCIPLINA X) Tj 25 0 Td (350h) Tj 0 -14 Td (HISTORIA) Tj 25 0 Td (72h) Tj ET",
+        "BT /F1 10 Tf 40 800 Td (ETICA) Tj 20 0 Td (40h) Tj 60 0 Td (2) Tj -80 -14 Td [(GEO) -300 (GRAFIA)] TJ ET",
+        "BT /F1 9 Tf 1.2 0 0 1.2 40 700 Tm (QUIMICA) Tj 33 0 Td (60h) Tj 14 0 Td (4) Tj ET",
+    ]
+    fonts = [f"<< /Type /Font /Subtype /Type1 /BaseFont /{name}{encoding} >>"
+             for name in ("Helvetica", "Courier", "Times-Roman", "Helvetica-Narrow", "Arial")
+             for encoding in ("", " /Encoding /WinAnsiEncoding")]
+    fonts.append("<< /Type /Font /Subtype /TrueType /BaseFont /Arial /Encoding /WinAnsiEncoding "
+                 "/FirstChar 32 /LastChar 33 /Widths [500 600] >>")
+    fonts.append("<< /Type /Font /Subtype /TrueType /BaseFont /Arial /Encoding /WinAnsiEncoding "
+                 "/FirstChar 65 /LastChar 66 /Widths [600 700] >>")
+    for font in fonts:
+        reader = PyPDF2.PdfReader(io.BytesIO(make_pdf_from_streams(streams, font)))
+        fast = get_backend("fast")
+        for page in reader.pages:
+            assert fast.page_text(page) == page.extract_text(), font
+        assert fast.fallbacks == 0, font
+
+    # O "auto" decide por documento e sempre devolve o texto do "full"
+    auto = get_backend("auto")
+    for page in reader.pages:
+        assert auto.page_text(page) == page.extract_text()
+    assert auto.chosen is auto.fast
+
+
+def test_stream_pages_only_requested_pages(tmp_path):
+    pdf_path = tmp_path / "grade.pdf"
+    pdf_path.write_bytes(make_pdf(generate_layout("alternating", 6, 60)))
+    assert parse_page_ranges("5-,1, 2-3", 6) == [0, 1, 2, 4, 5]
+
+    out = io.StringIO()
+    assert stream_pages(str(pdf_path), out, pages="2,4-5") == 3
+    lines = [json.loads(line) for line in out.getvalue().splitlines()]
+    reader = PyPDF2.PdfReader(str(pdf_path))
+    assert [line["page"] for line in lines] == [2, 4, 5]
+    for line in lines:
+        assert line["text"] == get_backend().page_text(reader.pages[line["page"] - 1])
+        assert line["chars"] == len(line["text"])
+
+
+def test_parallel_page_slices_match_sequential(tmp_path):
+    data = make_pdf(generate_layout("semesters", PARALLEL_MIN_PAGES + 4, 120))
+    reader = PyPDF2.PdfReader(io.BytesIO(data))
+    sequential = [(i, text) for i, text, _ in iter_pages(reader)]
+    assert len(sequential) == PARALLEL_MIN_PAGES + 4
+    (tmp_path / "grade.pdf").write_bytes(data)
+    for source in (data, str(tmp_path / "grade.pdf")):
+        parallel = [(i, text) for i, text, _ in iter_pages(reader, source, workers=2)]
+        assert parallel == sequential
+    pages = [1, 3] + list(range(5, PARALLEL_MIN_PAGES + 4))
+    parallel = [(i, text) for i, text, _ in iter_pages(reader, data, workers=3, pages=pages)]
+    assert parallel == [item for item in sequential if item[0] in pages]
+
+
+def test_columns_round_trip_keeps_every_field():
+    for layout in LAYOUTS:
+        result = extract_curriculum.extract_curriculum_from_pdf(io.BytesIO(make_pdf(generate_layout(layout, 3, 30))))
+        assert json.loads(dumps(result, compact=True)) == result
+        columnar = json.loads(dumps(result, columns=True))
+        assert "subjects" not in columnar
+        assert Curriculum.from_dict(columnar).to_dict() == result
+
+    partial = dict(result, partial=True, warning="Tempo limite de 5s excedido: grade parcial.")
+    curriculum = Curriculum.from_dict(json.loads(dumps(partial, columns=True)))
+    assert curriculum.partial and curriculum.warning == partial["warning"]
+    assert curriculum.to_dict() == partial
+
+
+def test_tokenizer_matches_legacy_on_random_lines():
+    rng = random.Random(2110)
+    for _ in range(5000):
+        text = "\n".join(random_line(rng) for _ in range(rng.randint(1, 8)))
+        parser = CurriculumLineParser()
+        parser.feed_text(text)
+        assert parser.results() == legacy_parse(text), text
+
+
+def test_adversarial_lines_parse_in_linear_time():
+    n = 50000
+    lines = [
+        "A" + " " * n + "x",
+        "Disciplina " * (n // 11) + "x",
+        "A" + " 1" * n,
+        "A" + " -" * n,
+        "1" * n + " SEMESTRE",
+        "1" + " " * n + "x",
+        "SEMESTRE " * (n // 9),
+    ]
+    start = time.perf_counter()
+    for line in lines:
+        parser = CurriculumLineParser()
+        parser.feed(line)
+        parser.results()
+    # As regex anteriores levavam minutos nestas linhas
+    assert time.perf_counter() - start < 2
+
+
+def test_time_budget_returns_partial_result_and_skips_cache(tmp_path, monkeypatch):
+    data = make_pdf(generate_layout("alternating", 20, 400))
+    full = extract_curriculum.extract_curriculum_from_pdf(io.BytesIO(data), time_budget=0)
+
+    # Relógio falso: cada consulta avança um segundo
+    clock = iter(range(10 ** 6))
+    monkeypatch.setattr(extract_curriculum.time, "monotonic", lambda: next(clock))
+    cache = CurriculumCache(str(tmp_path), extract_curriculum.PARSER_VERSION, 1024 * 1024)
+    result = extract_curriculum.extract_curriculum_from_bytes(data, cache, time_budget=5)
+    assert result["partial"] is True
+    assert "de 20 página(s)" in result["warning"]
+    assert 0 < len(result["subjects"]) < len(full["subjects"])
+    assert result["subjects"] == full["subjects"][:len(result["subjects"])]
+    assert cache.get(data, extract_curriculum.cache_variant()) is None
+
+    # A API tipada também mostra o corte
+    curriculum = extract_curriculum.extract(io.BytesIO(data), time_budget=5)
+    assert curriculum.partial is True
+    assert "de 20 página(s)" in curriculum.warning
+    assert 0 < len(curriculum) < len(full["subjects"])
+
+    with pytest.raises(ValueError):
+        extract_curriculum.load_curriculum(1, result, transaction=None)
+
+
+def test_resource_limits_return_error_codes(tmp_path):
+    data = make_pdf(generate_layout("semesters", 6, 60))
+    result = extract_curriculum.extract_curriculum_from_pdf(io.BytesIO(data), max_pages=5)
+    assert result["code"] == "too_many_pages"
+    result = extract_curriculum.extract_curriculum_from_pdf(io.BytesIO(data), max_bytes=len(data) - 1)
+    assert result["code"] == "too_large"
+    assert "code" not in extract_curriculum.extract_curriculum_from_pdf(io.BytesIO(data), max_pages=6)
+
+    with pytest.raises(extract_curriculum.ResourceLimitError) as error:
+        extract_curriculum.read_pdf_stream(io.BytesIO(data), chunk_size=1024, max_bytes=2048)
+    assert error.value.code == "too_large"
+
+    # Caminho com cache: mesmos limites, e um resultado gravado com limites
+    # folgados não é servido sob limites mais apertados
+    pdf_path = tmp_path / "grade.pdf"
+    pdf_path.write_bytes(data)
+    cache = CurriculumCache(str(tmp_path / "cache"), extract_curriculum.PARSER_VERSION, 1024 * 1024)
+    result = extract_curriculum.extract_curriculum_cached(str(pdf_path), cache, max_bytes=len(data) - 1)
+    assert result["code"] == "too_large"
+    assert "code" not in extract_curriculum.extract_curriculum_cached(str(pdf_path), cache, max_pages=6)
+    result = extract_curriculum.extract_curriculum_cached(str(pdf_path), cache, max_pages=5)
+    assert result["code"] == "too_many_pages"
+
+    result = extract_curriculum.run_limited(time.sleep, 5, deadline=0.05)
+    assert result["code"] == "timeout"
+
+
+CLI = os.path.join(os.path.dirname(os.path.abspath(__file__)), "extract_curriculum.py")
+
+
+def run_cli(*args, stdin=b""):
+    """Roda a linha de comando num processo à parte (ela aplica limites ao processo)."""
+    done = subprocess.run([sys.executable, CLI, *args], input=stdin, capture_output=True, timeout=60)
+    return done.stdout.decode("utf-8")
+
+
+@contextlib.contextmanager
+def running_server(tmp_path, **kwargs):
+    socket_path = str(tmp_path / "extrator.sock")
+    server = extract_curriculum.CurriculumServer(socket_path, workers=1, **kwargs)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    try:
+        yield socket_path
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def ask_server(socket_path, *lines):
+    """Envia as linhas (bytes) numa conexão e devolve as respostas por ordem de chegada."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as conn:
+        conn.settimeout(60)
+        conn.connect(socket_path)
+        conn.sendall(b"".join(line + b"\n" for line in lines))
+        conn.shutdown(socket.SHUT_WR)
+        with conn.makefile("rb") as replies:
+            return [json.loads(reply) for reply in replies]
+
+
+def test_every_error_path_has_a_code(tmp_path, monkeypatch):
+    assert extract_curriculum._handle_request({})["code"] == "invalid_request"
+
+    with running_server(tmp_path) as socket_path:
+        replies = ask_server(
+            socket_path,
+            b"{nada",
+            json.dumps({"id": 1, "path": "x.pdf", "backend": "turbo"}).encode(),
+            json.dumps({"id": 2, "data": "não é base64"}).encode(),
+        )
+    codes = {reply.get("id"): reply["code"] for reply in replies}
+    assert codes == {None: "invalid_request", 1: "invalid_request", 2: "invalid_pdf"}
+
+    assert json.loads(run_cli())["code"] == "invalid_request"
+    assert json.loads(run_cli("a.pdf", "--catalog", "--load", "1"))["code"] == "invalid_request"
+    assert json.loads(run_cli("--cache-stats"))["code"] == "invalid_request"
+    assert json.loads(run_cli("--load-map", str(tmp_path / "nada.txt")))["code"] == "invalid_request"
+    assert json.loads(run_cli("--stdin-base64", stdin=b"%%%"))["code"] == "invalid_pdf"
+    assert json.loads(run_cli("--stdin-base64", "--select-backend", stdin=b"%%%"))["code"] == "invalid_pdf"
+
+    # Falha inesperada dentro do worker do lote / ao gravar no banco
+    def broken(*args, **kwargs):
+        raise RuntimeError("bug")
+
+    monkeypatch.setattr(extract_curriculum, "extract_curriculum_from_pdf", broken)
+    assert extract_curriculum._extract_timed("a.pdf")["code"] == "internal"
+    result = {"courseName": "X", "subjects": [{"semester": 1, "subjectName": "A", "workload": 40}]}
+    assert extract_curriculum._load_line(result, 1, transaction=broken)["code"] == "load_failed"
+
+
+def test_socket_server_round_trip(tmp_path):
+    data = make_pdf(generate_layout("semesters", 2, 20))
+    pdf_path = tmp_path / "grade.pdf"
+    pdf_path.write_bytes(data)
+    expected = extract_curriculum.extract_curriculum_from_pdf(io.BytesIO(data))
+
+    with running_server(tmp_path) as socket_path:
+        replies = ask_server(
+            socket_path,
+            json.dumps({"id": "ping", "op": "ping"}).encode(),
+            json.dumps({"id": "path", "path": str(pdf_path)}).encode(),
+            json.dumps({"id": "data", "data": base64.b64encode(data).decode()}).encode(),
+        )
+    by_id = {reply.pop("id"): reply for reply in replies}
+    assert by_id["ping"] == {"ok": True}
+    assert by_id["path"] == expected
+    assert by_id["data"] == expected
+
+
+def test_socket_server_applies_limits_to_path_requests(tmp_path, monkeypatch):
+    data = make_pdf(generate_layout("semesters", 3, 30))
+    pdf_path = tmp_path / "grade.pdf"
+    pdf_path.write_bytes(data)
+    cache = CurriculumCache(str(tmp_path / "cache"), extract_curriculum.PARSER_VERSION, 1024 * 1024)
+
+    with running_server(tmp_path, cache=cache) as socket_path:
+        request = lambda **fields: json.dumps({"path": str(pdf_path), **fields}).encode()
+        monkeypatch.setattr(extract_curriculum, "MAX_PAGES", 2)
+        (pages,) = ask_server(socket_path, request())
+        monkeypatch.setattr(extract_curriculum, "MAX_PAGES", 500)
+        monkeypatch.setattr(extract_curriculum, "MAX_PDF_BYTES", len(data) - 1)
+        (size,) = ask_server(socket_path, request())
+        (missing,) = ask_server(socket_path, request(path=str(tmp_path / "nada.pdf")))
+    assert [pages["code"], size["code"], missing["code"]] == ["too_many_pages", "too_large", "not_found"]
+    assert cache.stats()["entries"] == 0
+
+
+def test_batch_mode_writes_one_ndjson_line_per_pdf(tmp_path):
+    expected = {}
+    for i, layout in enumerate(("semesters", "inline")):
+        data = make_pdf(generate_layout(layout, 2, 20 + i))
+        pdf_path = tmp_path / "pdfs" / f"grade{i}.pdf"
+        pdf_path.parent.mkdir(exist_ok=True)
+        pdf_path.write_bytes(data)
+        expected[str(pdf_path)] = extract_curriculum.extract_curriculum_from_pdf(io.BytesIO(data))["subjects"]
+
+    lines = run_cli("--batch", str(tmp_path / "pdfs"), "--workers", "2").splitlines()
+    assert len(lines) == 2
+    results = [json.loads(line) for line in lines]
+    assert {result["file"]: result["subjects"] for result in results} == expected
+
+
+def test_stdin_modes_extract_valid_pdf():
+    data = make_pdf(generate_layout("alternating", 2, 20))
+    expected = extract_curriculum.extract_curriculum_from_pdf(io.BytesIO(data))
+    # Base64 com quebras de linha, como o "base64" do shell produz
+    encoded = base64.encodebytes(data)
+    assert json.loads(run_cli("--stdin-base64", stdin=encoded)) == expected
+    assert json.loads(run_cli("--stdin", stdin=data)) == expected
+
+
+def test_timings_report_every_stage_and_page(tmp_path):
+    pdf_path = tmp_path / "grade.pdf"
+    pdf_path.write_bytes(make_pdf(generate_layout("semesters", 3, 30)))
+    profile_path = tmp_path / "grade.prof"
+    result = json.loads(run_cli(str(pdf_path), "--timings", "--profile", str(profile_path)))
+
+    timings = result.pop("timings")
+    assert result == extract_curriculum.extract_curriculum_from_pdf(str(pdf_path))
+    for stage in ("openMs", "extractMs", "parseMs", "courseNameMs", "totalMs"):
+        assert timings[stage] >= 0
+    assert set(timings["formats"]) == {"inline", "alternating", "semesters"}
+    assert timings["backend"] == "full"
+    assert timings["pagesRead"] == len(timings["pages"]) == 3
+    assert [page["page"] for page in timings["pages"]] == [1, 2, 3]
+    assert sum(page["lines"] for page in timings["pages"]) == timings["lines"]
+    assert pstats.Stats(str(profile_path)).total_calls > 0
+
+
+def test_only_pdf_read_errors_are_invalid_pdf(monkeypatch):
+    data = make_pdf(generate_layout("semesters", 2, 20))
+    for broken in (b"nao e um PDF", b"", data[:len(data) // 2]):
+        result = extract_curriculum.run_limited(extract_curriculum.extract_curriculum_from_pdf, io.BytesIO(broken))
+        assert result["code"] == "invalid_pdf"
+
+    # Bug no parser: erro interno, não culpa do PDF
+    def parser_bug(self, raw_line):
+        raise KeyError("formato")
+
+    monkeypatch.setattr(CurriculumLineParser, "feed", parser_bug)
+    result = extract_curriculum.run_limited(extract_curriculum.extract_curriculum_from_pdf, io.BytesIO(data))
+    assert result["code"] == "internal"
+
+
+def test_diff_subjects_touches_only_changed_rows():
+    stored = [
+        {"id": 10, "semester": 1, "subjectName": "Anatomia", "workload": 60, "description": "Escrita no painel", "order": 0},
+        {"id": 11, "semester": 1, "subjectName": "Etica", "workload": 40, "description": None, "order": 1},
+        {"id": 12, "semester": 1, "subjectName": "Química", "workload": 80, "description": None, "order": 2},
+        {"id": 13, "semester": 2, "subjectName": "Física", "workload": 60, "description": None, "order": 3},
+        {"id": 14, "semester": 2, "subjectName": "Biologia", "workload": 60, "description": None, "order": 4},
+    ]
+    subjects = [
+        {"semester": 1, "subjectName": "Anatomia", "workload": 60},
+        {"semester": 1, "subjectName": "Ética", "workload": 40},
+        {"semester": 2, "subjectName": "Física", "workload": 72},
+        {"semester": 2, "subjectName": "Biologia", "workload": 60},
+        {"semester": 2, "subjectName": "Estatística", "workload": 40},
+    ]
+    ops = extract_curriculum.diff_subjects(stored, subjects)
+    assert ops["insert"] == [(4, subjects[4])]
+    assert ops["delete"] == [12]
+    assert ops["update"] == [(11, {"subjectName": "Ética"}), (13, {"workload": 72, "order": 2})]
+    assert ops["reorder"] == [(14, 3)]
+    assert ops["unchanged"] == 1
+
+    # Aplicar as operações dá exatamente a grade extraída (e mantém a descrição)
+    table = {row["id"]: dict(row) for row in stored}
+    for row_id in ops["delete"]:
+        del table[row_id]
+    for row_id, changes in ops["update"]:
+        table[row_id].update(changes)
+    for row_id, order in ops["reorder"]:
+        table[row_id]["order"] = order
+    for order, sub in ops["insert"]:
+        table[100 + order] = dict(sub, id=100 + order, description=None, order=order)
+    rows = sorted(table.values(), key=lambda row: row["order"])
+    assert [(r["semester"], r["subjectName"], r["workload"]) for r in rows] == \
+        [(s["semester"], s["subjectName"], s["workload"]) for s in subjects]
+    assert rows[0]["description"] == "Escrita no painel"
+    assert extract_curriculum.diff_subjects(rows, subjects)["unchanged"] == len(subjects)
+
+    # Nome maior que a coluna: casa com o nome gravado (cortado), sem apagar e reinserir
+    long_name = "Tópicos Especiais " * 20
+    stored = [{"id": 1, "semester": 1, "subjectName": long_name[:255], "workload": 40, "description": None, "order": 0}]
+    ops = extract_curriculum.diff_subjects(stored, [{"semester": 1, "subjectName": long_name, "workload": 40}])
+    assert (ops["insert"], ops["delete"], ops["unchanged"]) == ([], [], 1)
+
+
+def test_catalog_is_split_by_course_headings():
+    names = ["TÉCNICO EM ENFERMAGEM", "BACHARELADO EM DIREITO", "LICENCIATURA EM PEDAGOGIA"]
+    pages = [["CATÁLOGO DE CURSOS", "SUMÁRIO"] + names]
+    singles = []
+    for i, name in enumerate(names):
+        course_pages = generate_layout("semesters", 2, 20 + 10 * i)
+        course_pages[0] = [name] + course_pages[0][1:]
+        # Título repetido no cabeçalho da página seguinte: mesmo curso
+        course_pages[1] = [name] + course_pages[1]
+        # Optativa depois do total, na mesma página: o PDF avulso também a lê
+        course_pages[1] = course_pages[1] + ["Libras Optativa - 40h"]
+        singles.append(extract_curriculum.extract_curriculum_from_pdf(io.BytesIO(make_pdf(course_pages))))
+        pages.extend(course_pages)
+    data = make_pdf(pages)
+
+    catalog = extract_curriculum.extract_catalog_from_pdf(io.BytesIO(data))
+    assert catalog["totalCourses"] == 3
+    assert [course["courseName"] for course in catalog["courses"]] == names
+    assert [course["pages"] for course in catalog["courses"]] == [[2, 3], [4, 5], [6, 7]]
+    for course, single in zip(catalog["courses"], singles):
+        assert course["subjects"] == single["subjects"]
+    assert extract_curriculum.extract_catalog_from_pdf(io.BytesIO(data), workers=2) == catalog
+    assert "courses" in json.loads(dumps(catalog, columns=True))
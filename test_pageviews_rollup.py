@@ -0,0 +1,109 @@
+import contextlib
+import datetime
+
+import pageviews_rollup
+
+
+class FakeDatabase:
+    """Tabelas do job em memória; entende só os comandos que o job envia."""
+
+    def __init__(self, pageview_ids):
+        day = datetime.datetime(2026, 1, 1, 12)
+        self.pageviews = {}
+        for row_id in pageview_ids:
+            self.add_pageview(row_id, day)
+        self.state = None
+        self.gaps = set()
+        self.views = {}
+
+    def add_pageview(self, row_id, viewed_at):
+        self.pageviews[row_id] = (row_id, "/cursos", None, "ua", f"s{row_id}", viewed_at)
+
+    def execute(self, sql, params):
+        sql = " ".join(sql.split())
+        params = list(params or ())
+        if sql.startswith(("CREATE TABLE", "SELECT GET_LOCK", "SELECT RELEASE_LOCK")):
+            return [(1,)]
+        if sql.startswith("SELECT lastId"):
+            return [self.state] if self.state else []
+        if sql.startswith("SELECT id FROM pageviews_rollup_gaps WHERE id >"):
+            return [(gap,) for gap in sorted(self.gaps) if gap > params[0]]
+        if "FROM pageviews WHERE id IN" in sql:
+            return [self.pageviews[i] for i in sorted(params) if i in self.pageviews]
+        if "FROM pageviews WHERE id >" in sql:
+            rows = [self.pageviews[i] for i in sorted(self.pageviews) if i > params[0]]
+            return rows[:params[1]] if "LIMIT" in sql else rows
+        if sql.startswith("SELECT day"):
+            return []
+        if sql.startswith("INSERT INTO `pageviews_daily_paths`"):
+            for i in range(0, len(params), 4):
+                key = (params[i], params[i + 1])
+                self.views[key] = self.views.get(key, 0) + params[i + 2]
+            return []
+        if sql.startswith("INSERT IGNORE INTO pageviews_rollup_gaps"):
+            self.gaps.update(params)
+        elif sql.startswith("DELETE FROM pageviews_rollup_gaps WHERE id IN"):
+            self.gaps.difference_update(params)
+        elif sql.startswith("DELETE FROM pageviews_rollup_gaps WHERE id <="):
+            self.gaps = {gap for gap in self.gaps if gap > params[0]}
+        elif sql.startswith("INSERT INTO pageviews_rollup_state"):
+            self.state = (params[1], params[2])
+        return []
+
+
+class FakeCursor:
+    def __init__(self, db):
+        self.db = db
+        self.rows = []
+
+    def execute(self, sql, params=None):
+        self.rows = list(self.db.execute(sql, params))
+
+    def fetchone(self):
+        return self.rows.pop(0) if self.rows else None
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def fetchmany(self, size):
+        rows, self.rows = self.rows[:size], self.rows[size:]
+        return rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    def __init__(self, db):
+        self.db = db
+
+    def cursor(self, buffered=True):
+        return FakeCursor(self.db)
+
+    def commit(self):
+        pass
+
+
+def _use_database(monkeypatch, db):
+    connect = lambda url=None: contextlib.nullcontext(FakeConnection(db))
+    monkeypatch.setattr(pageviews_rollup.mysql_pool, "connection", connect)
+    monkeypatch.setattr(pageviews_rollup.mysql_pool, "transaction", connect)
+
+
+def test_run_advances_past_permanent_hole_with_small_max_rows(monkeypatch):
+    # id 11 nunca é confirmado (insert desfeito), dentro de LATE_ROW_WINDOW
+    db = FakeDatabase([i for i in range(1, 31) if i != 11])
+    _use_database(monkeypatch, db)
+
+    last_ids = [pageviews_rollup.run(max_rows=5)["lastId"] for _ in range(6)]
+    assert last_ids == [5, 10, 16, 21, 26, 30]
+    assert db.gaps == {11}
+    assert sum(db.views.values()) == 29
+
+    # A linha atrasada aparece depois: conta uma vez e fecha a lacuna
+    db.add_pageview(11, datetime.datetime(2026, 1, 1, 13))
+    result = pageviews_rollup.run(max_rows=5)
+    assert (result["rows"], result["lastId"]) == (1, 30)
+    assert db.gaps == set()
+    assert sum(db.views.values()) == 30
@@ -0,0 +1,98 @@
+import contextlib
+
+import pytest
+
+import settings_sync
+
+
+class FakeCursor:
+    def __init__(self, conn):
+        self.conn = conn
+        self.rows = []
+
+    def execute(self, sql, params=None):
+        self.conn.log.append(("execute", sql, list(params or ())))
+        if sql.startswith("SELECT section, field FROM home_settings"):
+            self.rows = sorted(self.conn.existing)
+
+    def executemany(self, sql, rows):
+        if self.conn.fail_on and sql.startswith(self.conn.fail_on):
+            raise RuntimeError("falha no banco")
+        self.conn.log.append(("executemany", sql, list(rows)))
+
+    def fetchall(self):
+        rows, self.rows = self.rows, []
+        return rows
+
+    def close(self):
+        pass
+
+
+class FakeConnection:
+    """Conexão DB-API de mentira: guarda os comandos e o desfecho da transação."""
+
+    def __init__(self, existing=(), fail_on=None, events=None):
+        self.existing = set(existing)
+        self.fail_on = fail_on
+        self.log = []
+        self.events = events if events is not None else []
+
+    def cursor(self):
+        return FakeCursor(self)
+
+    @contextlib.contextmanager
+    def transaction(self):
+        # Mesmo contrato de mysql_pool.transaction
+        try:
+            yield self
+        except BaseException:
+            self.events.append("rollback")
+            raise
+        self.events.append("commit")
+
+
+CHANGES = [
+    {"section": "about", "field": "title", "value": "Título antigo"},
+    {"section": "about", "field": "subtitle", "value": "Novo subtítulo"},
+    {"section": "about", "field": "title", "value": "Novo título",
+     "fallback": {"file": "About.tsx", "old": "Sobre nós"}},
+]
+
+
+def test_apply_database_batches_updates_and_inserts():
+    conn = FakeConnection(existing=[("about", "title")])
+    assert settings_sync.apply_database(CHANGES, conn.transaction) == (1, 1)
+    batches = [(sql, rows) for kind, sql, rows in conn.log if kind == "executemany"]
+    assert batches == [
+        (settings_sync.UPDATE_SQL, [("Novo título", "about", "title")]),
+        (settings_sync.INSERT_SQL, [("about", "subtitle", "Novo subtítulo")]),
+    ]
+    assert conn.events == ["commit"]
+
+
+def test_sync_rolls_back_and_leaves_sources_on_failure(tmp_path):
+    source = tmp_path / "About.tsx"
+    source.write_text("<h1>Sobre nós</h1>", encoding="utf-8")
+    conn = FakeConnection(existing=[("about", "title")], fail_on="INSERT")
+
+    with pytest.raises(RuntimeError):
+        settings_sync.sync(CHANGES, root=str(tmp_path), transaction=conn.transaction)
+    assert conn.events == ["rollback"]
+    assert source.read_text(encoding="utf-8") == "<h1>Sobre nós</h1>"
+
+
+def test_sync_patches_sources_only_after_commit(tmp_path, monkeypatch):
+    source = tmp_path / "About.tsx"
+    source.write_text("<h1>Sobre nós</h1>", encoding="utf-8")
+    events = []
+    conn = FakeConnection(existing=[("about", "title")], events=events)
+
+    def write_atomic(filepath, data):
+        events.append("write")
+        with open(filepath, "wb") as f:
+            f.write(data)
+
+    monkeypatch.setattr(settings_sync, "write_atomic", write_atomic)
+    settings_sync.sync(CHANGES, root=str(tmp_path), transaction=conn.transaction)
+    assert events == ["commit", "write"]
+    assert source.read_text(encoding="utf-8") == "<h1>Novo título</h1>"
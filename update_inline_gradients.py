@@ -1,5 +1,4 @@
-import os
-import re
+from codemod_engine import BASE_DIR, RuleSet, run
 
 replacements = [
     (r"from-\[#da1069\] to-pink-600", "from-[#da1069] to-[#3b82f6]"),
@@ -8,25 +7,10 @@ replacements = [
     (r"from-\[#9d197d\] via-pink-500 to-transparent", "from-[#da1069] via-[#3b82f6] to-transparent"),
 ]
 
-def fix_file(filepath):
-    with open(filepath, 'r', encoding='utf-8') as f:
-        content = f.read()
-    
-    new_content = content
-    for pattern, replacement in replacements:
-        new_content = re.sub(pattern, replacement, new_content)
-    
-    if new_content != content:
-        with open(filepath, 'w', encoding='utf-8') as f:
-            f.write(new_content)
-        print(f"Fixed inline gradient: {filepath}")
+RULES = RuleSet("update_inline_gradients", replacements, extensions=(".tsx",), message="Fixed inline gradient")
 
 def main():
-    base_dir = "/var/www/faculdade-site/client/src"
-    for root, dirs, files in os.walk(base_dir):
-        for file in files:
-            if file.endswith('.tsx'):
-                fix_file(os.path.join(root, file))
+    run(RULES, BASE_DIR)
 
 if __name__ == "__main__":
     main()